@@ -100,6 +100,10 @@ class DrSaiAPP(DrSai):
         params.update({"apikey": apikey})
         if "messages" not in params or "model" not in params:
             raise HTTPException(status_code=400, detail="messages and model must be required, see https://platform.openai.com/docs/api-reference/chat")
+        # 增量上下文请求：在开始流式响应前重建完整历史，历史不一致时返回409
+        params = await self.try_except_raise_http_exception(
+            self.resolve_context_delta, params
+            )
         # return self.try_except_raise_http_exception(
         #     self.a_start_chat_completions, **params
         #     )
@@ -187,6 +191,7 @@ class DrSaiAPP(DrSai):
                 "FileNotFoundError": 404,
                 "OSError": 500,
                 "RuntimeError": 500,
+                "ContextMismatchError": 409,
                 # 添加更多映射...
             }
             status_code = error_mapping.get(e_class, 400)
@@ -89,6 +89,10 @@ async def run_backend(agent_factory: callable, **kwargs):
         pipelines_dir: str = None,  # openwebui pipelines目录
         history_mode: str = "backend",  # 历史消息的加载模式，可选值：backend、frontend 默认backend
         use_api_key_mode: str = "frontend",  # api key的使用模式，可选值：frontend、backend 默认frontend， 调试模式下建议设置为backend
+        agent_pool_size: int = 256,  # 常驻内存的智能体实例数量上限，超出后按LRU将状态保存到数据库并释放，None表示不限制
+        agent_idle_ttl: float = 3600,  # 智能体实例的空闲超时(秒)，None表示不超时
+        stream_coalesce_ms: float = 0,  # 流式输出时合并该时间窗口(毫秒)内的token为一个SSE帧，0表示不合并
+        checkpoint_snapshot_interval: int = 20,  # Thread状态增量检查点的完整快照间隔，每隔该数量的增量写一次快照
     '''
     host: str =  kwargs.pop("host", "0.0.0.0")
     port: int =  kwargs.pop("port", 42801)
@@ -228,10 +232,11 @@ class DrSaiWorkerModel(HRModel):  # Define a custom worker model inheriting from
     @HRModel.remote_callable
     async def lazy_init(self, chat_id: str, api_key: str) -> Dict[str, Any]:
         try:
+            await self.drsai.agent_instance.wait_for_spill(chat_id)
             agent: DrSaiGroupChat|DrSaiAgent = self.drsai.agent_instance.get(chat_id, None)
             if agent is None:
                 agent = await self.drsai._create_agent_instance()
-                self.drsai.agent_instance[chat_id] = agent
+                await self.drsai.agent_instance.put(chat_id, agent)
             message = await agent.lazy_init(api_key=api_key)
             return {"status": True, "message": message}
         except Exception as e:
@@ -295,6 +300,10 @@ async def run_worker(agent_factory: callable, **kwargs):
         history_mode: str = "backend",  # 历史消息的加载模式，可选值：backend、frontend 默认backend
         use_api_key_mode: str = "frontend",  # api key的使用模式，可选值：frontend、backend 默认frontend， 调试模式下建议设置为backend
         enable_pipeline: bool = False,  # 是否启动openwebui pipelines
+        agent_pool_size: int = 256,  # 常驻内存的智能体实例数量上限，超出后按LRU将状态保存到数据库并释放，None表示不限制
+        agent_idle_ttl: float = 3600,  # 智能体实例的空闲超时(秒)，None表示不超时
+        stream_coalesce_ms: float = 0,  # 流式输出时合并该时间窗口(毫秒)内的token为一个SSE帧，0表示不合并
+        checkpoint_snapshot_interval: int = 20,  # Thread状态增量检查点的完整快照间隔，每隔该数量的增量写一次快照
     '''
     model_args_obj: DrSaiModelConfig = DrSaiModelConfig
     worker_args_obj: DrSaiWorkerConfig = DrSaiWorkerConfig
@@ -47,8 +47,8 @@ from autogen_agentchat.messages import (
 from autogen_agentchat.teams import BaseGroupChat
 from autogen_agentchat.ui import Console
 
-# from loguru import logger
-# logger = logger.bind(name="dr_sai.py")
+from loguru import logger
+logger = logger.bind(name="dr_sai.py")
 
 # 单个模型日志
 import logging
@@ -65,24 +65,41 @@ third_party_logger3.propagate = False
 # from drsai.modules.managers.base_thread import Thread
 
 from drsai.modules.managers.database import DatabaseManager
+from drsai.modules.managers.agent_pool import AgentPool, AgentPoolEntry
 from drsai.modules.managers.datamodel import (
     UserInput,
     Thread,
+    ThreadCheckpoint,
 )
 
 from drsai.modules.managers.datamodel.db import RunStatus
 from drsai.modules.managers.datamodel.types import Response, TeamResult
 from drsai.configs import CONST
-from drsai.utils.utils import decompress_state
+from drsai.utils.utils import decompress_state, hash_messages
+from drsai.utils.state_checkpoint import CheckpointLog
+from drsai.modules.components.model_client_registry import (
+    SharedOpenAIClient,
+    model_client_registry,
+    set_request_api_key,
+)
+from drsai.modules.components.response_cache import (
+    create_cache_store,
+    response_cache,
+    set_request_cache_seed,
+)
 from drsai.utils.oai_stream_event import (
-    chatcompletionchunk, 
-    chatcompletionchunkend,
+    SSEChunkEncoder,
+    coalesce_streaming_chunks,
     chatcompletions)
 
 import uuid
 from dotenv import load_dotenv
 load_dotenv(dotenv_path = "drsai_test.env")
 
+
+class ContextMismatchError(Exception):
+    """增量上下文请求的history_hash与服务端保存的历史不一致，客户端需要重新发送完整历史"""
+
 class DrSai:
     """
     This is the main class of OpenDrSai, in
@@ -97,19 +114,44 @@ class DrSai:
             base_dir = kwargs.pop('base_dir', None) or CONST.FS_DIR
             self.db_manager = DatabaseManager(
                 engine_uri = engine_uri,
-                base_dir = base_dir
+                base_dir = base_dir,
+                pool_size = kwargs.pop('db_pool_size', 10),
+                max_workers = kwargs.pop('db_max_workers', 8),
             )
             auto_upgrade = kwargs.pop('auto_upgrade', False)
             init_response = self.db_manager.initialize_database(auto_upgrade=auto_upgrade)
             assert init_response.status, init_response.message
+        ## Thread状态的增量检查点日志：每次只写入变化的子状态，定期写完整快照
+        self.checkpoint_log = CheckpointLog(
+            self.db_manager,
+            ThreadCheckpoint,
+            snapshot_interval = kwargs.pop('checkpoint_snapshot_interval', 20),
+        )
 
         # 智能体管理
         self.agent_factory: callable = kwargs.pop('agent_factory', None)
-        self.agent_instance: Dict[str, AssistantAgent | BaseGroupChat] = {}
+        ## 有界的智能体实例池，超出容量或空闲超时的实例会save_state()到Thread.state后释放
+        self.agent_instance: AgentPool = AgentPool(
+            max_size = kwargs.pop('agent_pool_size', 256),
+            idle_ttl = kwargs.pop('agent_idle_ttl', 3600),
+            on_evict = self._spill_agent_state,
+        )
 
         # 额外设置
         # self.history_mode = kwargs.pop('history_mode', 'backend') # backend or frontend
         self.use_api_key_mode = kwargs.pop('use_api_key_mode', "frontend") # frontend or backend
+        ## 流式输出时合并该时间窗口(毫秒)内到达的token为一个SSE帧，0表示不合并
+        self.stream_coalesce_ms: float = kwargs.pop('stream_coalesce_ms', 0)
+        ## 模型响应缓存：请求带cache_seed时相同的模型调用直接重放缓存结果，后端为memory(默认)、sqlite或diskcache
+        response_cache_backend = kwargs.pop('response_cache_backend', None)
+        response_cache_path = kwargs.pop('response_cache_path', None)
+        response_cache_size = kwargs.pop('response_cache_size', None)
+        if response_cache_backend is not None:
+            response_cache.set_store(create_cache_store(
+                response_cache_backend,
+                path = response_cache_path,
+                max_entries = response_cache_size,
+            ))
 
         # 后端测试接口
         load_test_api_key = os.environ.get("LOAD_TEST_API_KEY", None)
@@ -147,6 +189,10 @@ class DrSai:
     async def close(self):
         """Explicitly close database connections and cleanup resources"""
         try:
+            # Spill idle agent states to the database before closing connections
+            if hasattr(self, 'agent_instance') and self.db_manager is not None:
+                await self.agent_instance.evict_all()
+
             if hasattr(self, 'db_manager') and self.db_manager is not None:
                 await self.db_manager.close()
                 self.db_manager = None
@@ -154,6 +200,9 @@ class DrSai:
             # Clear agent instances
             if hasattr(self, 'agent_instance'):
                 self.agent_instance.clear()
+
+            # Close the shared model client connection pools
+            await model_client_registry.close_all()
                 
         except Exception as e:
             print(f"Error closing DrSai resources: {e}")
@@ -166,7 +215,89 @@ class DrSai:
             else (self.agent_factory())
         )
         return agent
+
+    async def _spill_agent_state(self, thread_id: str, entry: AgentPoolEntry) -> None:
+        """
+        智能体实例被AgentPool淘汰时调用：保存状态到Thread.state并释放实例资源
+        """
+        agent: AssistantAgent | BaseGroupChat = entry.agent
+        if self.db_manager is not None:
+            filters = {"thread_id": thread_id}
+            if entry.user_id is not None:
+                filters["user_id"] = entry.user_id
+            response: Response = await self.db_manager.a_get(Thread, filters=filters, return_json=False)
+            if response.status and response.data:
+                state = await agent.save_state()
+                thread: Thread = response.data[0]
+                await asyncio.to_thread(
+                    self.checkpoint_log.save,
+                    {"user_id": thread.user_id, "thread_id": thread_id},
+                    state,
+                )
+                if thread.state is not None:
+                    # 旧版本保存在Thread.state中的完整状态已由检查点日志取代
+                    thread.state = None
+                    response = await self.db_manager.a_upsert(thread)
+                    if not response.status:
+                        raise RuntimeError(f"Failed to save thread state: {response.message}")
+        if hasattr(agent, "close"):
+            try:
+                await agent.close()
+            except Exception as e:
+                logger.warning(f"Error closing evicted agent of thread `{thread_id}`: {e}")
     
+    async def _release_agent(self, thread_id: str | None, agent: AssistantAgent | BaseGroupChat) -> None:
+        """请求结束时释放智能体实例：池中的实例取消固定，临时实例直接关闭"""
+        if thread_id is not None:
+            self.agent_instance.unpin(thread_id)
+        elif hasattr(agent, "close"):
+            try:
+                await agent.close()
+            except Exception as e:
+                logger.warning(f"Error closing temporary agent: {e}")
+
+    @staticmethod
+    def _get_user_and_chat_id(params: Dict) -> Tuple[str, str | None]:
+        """从请求参数中解析用户名和前端的chat_id"""
+        extra_body: Union[Dict, None] = params.get('extra_body', None)
+        if extra_body is not None:
+            ## 用户信息 从DDF2传入的
+            user_info: Dict = extra_body.get("user", {})
+            chat_id = extra_body.get("chat_id", None)
+        else:
+            user_info = params.get('user', {})
+            chat_id = params.get('chat_id', None)
+        username = user_info.get('email', None) or user_info.get('name', "anonymous")
+        return username, chat_id
+
+    async def resolve_context_delta(self, params: Dict) -> Dict:
+        """
+        处理增量上下文请求(context_mode="delta")：客户端只发送新增的消息，以及已确认的历史的
+        history_length和history_hash，这里用UserInput中保存的上一轮完整消息列表重建完整的messages。
+        历史不一致时抛出ContextMismatchError(HTTP 409)，客户端应回退为发送完整历史。
+        """
+        if params.pop('context_mode', None) != "delta":
+            return params
+        history_hash: str | None = params.pop('history_hash', None)
+        history_length: int = params.pop('history_length', 0)
+        username, chat_id = self._get_user_and_chat_id(params)
+        if chat_id is None:
+            raise ContextMismatchError("chat_id is required for delta context requests")
+
+        response = await self.db_manager.a_get(
+            UserInput,
+            filters={"user_id": username, "thread_id": chat_id},
+            return_json=False
+            )
+        if not response.status or not response.data:
+            raise ContextMismatchError(f"No history found for chat `{chat_id}`")
+        history: List[Dict] = response.data[0].user_messages or []
+        if len(history) < history_length or hash_messages(history[:history_length]) != history_hash:
+            raise ContextMismatchError(f"History of chat `{chat_id}` does not match, resend the full context")
+
+        params['messages'] = history[:history_length] + params.get('messages', [])
+        return params
+
     async def handle_input_info(self, **kwargs) -> UserInput:
         ## 传入的消息列表
         messages: List[Dict[str, str]] = kwargs.pop('messages', [])
@@ -179,22 +310,16 @@ class DrSai:
         max_tokens = kwargs.pop('max_tokens', 100000)
         stream = kwargs.pop('stream', True)
         ## 额外的请求参数处理
+        #  {'model': 'drsai_pipeline', 'user': {'name': '888', 'id': '888', 'email': 888', 'role': 'admin'}, 'metadata': {}, 'base_models': 'openai/gpt-4o', 'apikey': 'sk-88'}
+        username, chat_id = self._get_user_and_chat_id(kwargs) # 获取前端聊天界面的chat_id
         extra_body: Union[Dict, None] = kwargs.pop('extra_body', None)
-        if extra_body is not None:
-            ## 用户信息 从DDF2传入的
-            user_info: Dict = kwargs.get('extra_body', {}).get("user", {})
-            username = user_info.get('email', None) or user_info.get('name', "anonymous")
-            chat_id = extra_body.get("chat_id", None) # 获取前端聊天界面的chat_id
-        else:
-            #  {'model': 'drsai_pipeline', 'user': {'name': '888', 'id': '888', 'email': 888', 'role': 'admin'}, 'metadata': {}, 'base_models': 'openai/gpt-4o', 'apikey': 'sk-88'}
-            user_info = kwargs.get('user', {})
-            username = user_info.get('email', None) or user_info.get('name', "anonymous")
-            chat_id = kwargs.pop('chat_id', None) # 获取前端聊天端口的chat_id
+        if extra_body is None:
+            kwargs.pop('chat_id', None)
             # history_mode = kwargs.pop('history_mode', None) or self.history_mode # backend or frontend
         ## 保存用户的extra_requests
         extra_requests: Dict = copy.deepcopy(kwargs)
         ## 保存用户的参数
-        response = self.db_manager.get(
+        response = await self.db_manager.a_get(
             UserInput,
             filters={"user_id": username,"thread_id": chat_id},
             return_json=False
@@ -227,7 +352,10 @@ class DrSai:
             user_input.stream = stream
             user_input.extra_requests = extra_requests
 
-        response: Response = self.db_manager.upsert(user_input)
+        ## 本次请求的模型调用是否使用响应缓存(cache_seed为None时不使用)
+        set_request_cache_seed(cache_seed)
+
+        response: Response = await self.db_manager.a_upsert(user_input)
         if not response.status or not response.data:
             raise RuntimeError(f"Failed to save user input: {response.message}")
         else:
@@ -244,7 +372,7 @@ class DrSai:
         # 加载/检查Thread
 
         thread : Thread | None = None
-        response: Response = self.db_manager.get(
+        response: Response = await self.db_manager.a_get(
             Thread, 
             filters={"user_id": user_id,"thread_id": thread_id},
             return_json=False
@@ -252,14 +380,24 @@ class DrSai:
         if response.status and response.data:
             thread: Thread = response.data[0]
         
-        # 创建或者获取智能体实例
-        
-        if thread_id in self.agent_instance:
-            agent = self.agent_instance[thread_id]
-        else:
+        # 创建或者获取智能体实例，被淘汰的实例从Thread.state中重新加载
+        ## 运行期间将实例固定在池中防止被淘汰，由调用方结束时通过_release_agent释放；
+        ## 没有thread_id的临时实例不放入池中，请求结束时直接关闭
+        pin = thread_id is not None
+        agent = None
+        if pin:
+            # 该thread的实例正在被淘汰时，等待其状态写入检查点后再加载，避免读到旧的检查点
+            await self.agent_instance.wait_for_spill(thread_id)
+            agent = self.agent_instance.get(thread_id)
+        if agent is None:
             agent = await self._create_agent_instance()
             if thread is not None:
-                state = thread.state
+                state = await asyncio.to_thread(
+                    self.checkpoint_log.load,
+                    {"user_id": thread.user_id, "thread_id": thread_id},
+                )
+                # 没有检查点日志时回退到旧版本的Thread.state
+                state = state or thread.state
                 if state:
                     if isinstance(state, str):
                         try:
@@ -272,27 +410,35 @@ class DrSai:
                             await agent.load_state(state_dict)
                     else:
                         await agent.load_state(state)
-            if thread_id is None:
-                    thread_id = str(uuid.uuid4())
-            self.agent_instance[thread_id] = agent
+        if pin:
+            await self.agent_instance.put(thread_id, agent, user_id=user_id, pin=True)
         
         ## 是否使用流式模式
-        if isinstance(agent, BaseGroupChat) and stream:
-            for participant in agent._participants:
-                if not participant._model_client_stream:
-                    raise ValueError("Streaming mode is not supported when participant._model_client_stream is False")
-        else:
-            if agent._model_client_stream != stream:
-                raise ValueError("Streaming mode is not supported when agent._model_client_stream is False")
+        try:
+            if isinstance(agent, BaseGroupChat) and stream:
+                for participant in agent._participants:
+                    if not participant._model_client_stream:
+                        raise ValueError("Streaming mode is not supported when participant._model_client_stream is False")
+            else:
+                if agent._model_client_stream != stream:
+                    raise ValueError("Streaming mode is not supported when agent._model_client_stream is False")
+        except ValueError:
+            await self._release_agent(thread_id, agent)
+            raise
         
         ## 判断是否为智能体添加前端的API_KEY
+        ## 共享客户端(HepAIChatCompletionClient)通过contextvar使用本次请求的key，不修改共享状态；
+        ## 其他模型客户端仍直接设置其私有的_client
         if self.use_api_key_mode == "frontend":
-            if hasattr(agent, "_model_client"):
-                agent._model_client._client.api_key = api_key
-            if hasattr(agent, "_participants"):
-                for participant in agent._participants:
-                    if hasattr(participant, "_model_client"):
-                        participant._model_client._client.api_key = api_key
+            set_request_api_key(api_key)
+            model_clients = [getattr(agent, "_model_client", None)] + [
+                getattr(participant, "_model_client", None)
+                for participant in getattr(agent, "_participants", [])
+            ]
+            for model_client in model_clients:
+                client = getattr(model_client, "_client", None)
+                if client is not None and not isinstance(client, SharedOpenAIClient):
+                    client.api_key = api_key
         
         return agent, thread
 
@@ -301,6 +447,7 @@ class DrSai:
         """
         为drsai ui提供completions接口，yield autogen的BaseChatMessage和BaseAgentEvent
         """
+        agent: AssistantAgent | BaseGroupChat | None = None
         try:
             start_time = time.time()
             # 处理用户的kwargs参数，保存UserInput到数据库
@@ -351,7 +498,7 @@ class DrSai:
                 thread.user_input = user_input.model_dump(mode="json")
                 thread.status = RunStatus.ACTIVE
                 thread.messages.append(task[-1].model_dump(mode="json")) # 已经存在的Thread只添加最后一条消息
-            response: Response = self.db_manager.upsert(thread)
+            response: Response = await self.db_manager.a_upsert(thread)
             if not response.status:
                 raise RuntimeError(f"Failed to create thread: {response.message}")
                 
@@ -388,8 +535,11 @@ class DrSai:
         except Exception as e:
             raise traceback.print_exc()
         finally:
+            # 释放智能体实例，允许其被AgentPool淘汰
+            if agent is not None:
+                await self._release_agent(thread_id, agent)
             # 更新thread状态
-            response: Response = self.db_manager.get(
+            response: Response = await self.db_manager.a_get(
                 Thread, 
                 filters={"user_id": user_id,"thread_id": thread_id},
                 return_json=False
@@ -409,7 +559,7 @@ class DrSai:
                             )
                     else:
                         thread.team_result["task_result"] = agent_result.model_dump(mode="json")
-            response: Response = self.db_manager.upsert(thread)
+            response: Response = await self.db_manager.a_upsert(thread)
             if not response.status:
                 raise RuntimeError(f"Failed to create thread: {response.message}")
 
@@ -427,6 +577,7 @@ class DrSai:
         chat_mode: str, 聊天模式，默认once
         **kwargs: 其他参数
         """
+        agent: AssistantAgent | BaseGroupChat | None = None
         try:
             start_time = time.time()
 
@@ -500,7 +651,7 @@ class DrSai:
                 thread.user_input = user_input.model_dump(mode="json")
                 thread.status = RunStatus.ACTIVE
                 thread.messages.append(task[-1].model_dump(mode="json")) # 已经存在的Thread只添加最后一条消息
-            response: Response = self.db_manager.upsert(thread)
+            response: Response = await self.db_manager.a_upsert(thread)
             if not response.status:
                 raise RuntimeError(f"Failed to create thread: {response.message}")
                 
@@ -512,33 +663,25 @@ class DrSai:
             rely_messages: List[BaseChatMessage] = []
             agent_result: TaskResult|None = None
 
+            # 预编译的chunk编码器，避免每个token都deepcopy和json.dumps整个chunk模板
+            encoder = SSEChunkEncoder()
             res = agent.run_stream(task=task)
+            if stream and self.stream_coalesce_ms > 0:
+                res = coalesce_streaming_chunks(res, self.stream_coalesce_ms / 1000)
             async for message in res:
                 
                 # print(message)
-                oai_chunk = copy.deepcopy(chatcompletionchunk)
-                # The Unix timestamp (in seconds) of when the chat completion was created
-                oai_chunk["created"] = int(time.time())
                 if isinstance(message, ModelClientStreamingChunkEvent):
                     if stream and isinstance(agent, BaseChatAgent):
-                        content = message.content
-                        oai_chunk["choices"][0]["delta"]['content'] = content
-                        oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                        yield f'data: {json.dumps(oai_chunk)}\n\n'
+                        yield encoder.encode_content(message.content)
                     elif stream and isinstance(agent, BaseGroupChat):
                         role_tmp = message.source
                         if role != role_tmp:
                             role = role_tmp
-                            # oai_chunk["choices"][0]["delta"]['content'] = f"\n\n**Speaker: {role}**\n\n"
                             if role:
-                                oai_chunk["choices"][0]["delta"]['content'] = f"\n\n**{role}发言：**\n\n"
-                                oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                                yield f'data: {json.dumps(oai_chunk)}\n\n'
+                                yield encoder.encode_content(f"\n\n**{role}发言：**\n\n")
                         
-                        content = message.content
-                        oai_chunk["choices"][0]["delta"]['content'] = content
-                        oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                        yield f'data: {json.dumps(oai_chunk)}\n\n'
+                        yield encoder.encode_content(message.content)
                         
                     else:
                         if stream:
@@ -581,9 +724,7 @@ class DrSai:
                             {"id": tool.id, "type": "function","function": {"name": tool.name,"arguments": tool.arguments}}
                             )
                     if stream:
-                        oai_chunk["choices"][0]["delta"]['tool_calls'] = tool_calls
-                        oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                        yield f'data: {json.dumps(oai_chunk)}\n\n'
+                        yield encoder.encode_delta(tool_calls=tool_calls, role='assistant')
                     else:
                         chatcompletions["choices"][0]["message"]["tool_calls"] = tool_calls
                 elif isinstance(message, ToolCallExecutionEvent):
@@ -602,13 +743,9 @@ class DrSai:
                             yield f'data: {json.dumps(chatcompletions)}\n\n'
                         else:
                             if role and isinstance(agent, BaseGroupChat):
-                                oai_chunk["choices"][0]["delta"]['content'] = f"\n\n**{role}发言：**\n\n"
-                                oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                                yield f'data: {json.dumps(oai_chunk)}\n\n'
+                                yield encoder.encode_content(f"\n\n**{role}发言：**\n\n")
 
-                            oai_chunk["choices"][0]["delta"]['content'] = message.content + "\n\n"
-                            oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                            yield f'data: {json.dumps(oai_chunk)}\n\n'
+                            yield encoder.encode_content(message.content + "\n\n")
                         tool_flag = 0
 
                 elif isinstance(message, HandoffMessage):
@@ -617,9 +754,7 @@ class DrSai:
                     # 解析handoff_target
                     if isinstance(message.content, str):
                         content = message.content
-                        oai_chunk["choices"][0]["delta"]['content'] = f"""\n\n**{message.source}转移给{message.target}：**\n\n{content}\n\n"""
-                        oai_chunk["choices"][0]["delta"]['role'] = 'assistant'
-                        yield f'data: {json.dumps(oai_chunk)}\n\n'
+                        yield encoder.encode_content(f"""\n\n**{message.source}转移给{message.target}：**\n\n{content}\n\n""")
                 
                 elif isinstance(message, ThoughtEvent):
                     ThoughtContent = message.content
@@ -634,8 +769,7 @@ class DrSai:
                     #     thread.team_result.task_result = message
                     if stream:
                         # 最后一个chunk
-                        chatcompletionchunkend["created"] = int(time.time())
-                        yield f'data: {json.dumps(chatcompletionchunkend)}\n\n'
+                        yield encoder.encode_end()
 
                 # TODO：其他消息类型暂时不处理
                 # elif isinstance(message, Response):
@@ -652,8 +786,11 @@ class DrSai:
         except Exception as e:
             raise traceback.print_exc()
         finally:
+            # 释放智能体实例，允许其被AgentPool淘汰
+            if agent is not None:
+                await self._release_agent(thread_id, agent)
             # 更新thread状态
-            response: Response = self.db_manager.get(
+            response: Response = await self.db_manager.a_get(
                 Thread, 
                 filters={"user_id": user_id,"thread_id": thread_id},
                 return_json=False
@@ -672,7 +809,7 @@ class DrSai:
                         )
                 else:
                     thread.team_result["task_result"] = agent_result.model_dump(mode="json")
-            response: Response = self.db_manager.upsert(thread)
+            response: Response = await self.db_manager.a_upsert(thread)
             if not response.status:
                 raise RuntimeError(f"Failed to create thread: {response.message}")
 
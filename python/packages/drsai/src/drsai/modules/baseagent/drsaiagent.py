@@ -144,6 +144,13 @@ class DrSaiAgent(AssistantAgent):
         
         # Close the model client.
         await self._model_client.close()
+        await self._close_memory_function()
+
+    async def _close_memory_function(self) -> None:
+        """释放memory_function持有的资源(如RAGFlow的HTTP连接)，memory_function提供close()时调用"""
+        close = getattr(self._memory_function, "close", None)
+        if close is not None:
+            await close()
 
     async def pause(self) -> None:
         """Pause the agent by setting the paused state."""
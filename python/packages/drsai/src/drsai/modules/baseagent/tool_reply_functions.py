@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import json
-from typing import List, Dict, Union, AsyncGenerator, Tuple, Any
+import asyncio
+from typing import List, Dict, Union, AsyncGenerator, Tuple, Any, Optional
 
 # Model client
 from drsai import HepAIChatCompletionClient, AssistantAgent
@@ -45,6 +46,44 @@ from autogen_agentchat.messages import (
     ToolCallRequestEvent,
 )
 
+async def execute_tool_calls(
+    workbench: Workbench,
+    function_calls: List[FunctionCall],
+    cancellation_token: CancellationToken,
+    max_concurrency: int = 8,
+    timeout: Optional[float] = None,
+) -> List[ToolResult]:
+    """
+    并发执行模型在同一轮中请求的多个工具调用，结果按原始调用顺序返回，保证后续提示词的确定性。
+    args:
+        max_concurrency: 同时执行的最大工具数量
+        timeout: 单个工具的超时时间(秒)，None表示不超时；超时或异常的工具返回is_error=True的ToolResult
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _call(function_call: FunctionCall) -> ToolResult:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    workbench.call_tool(
+                        name=function_call.name,
+                        arguments=json.loads(function_call.arguments),
+                        cancellation_token=cancellation_token,
+                    ),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                error = f"Tool `{function_call.name}` timed out after {timeout} seconds."
+            except Exception as e:
+                error = f"Tool `{function_call.name}` failed: {e}"
+            return ToolResult(
+                name=function_call.name,
+                result=[TextResultContent(content=error)],
+                is_error=True,
+            )
+
+    return list(await asyncio.gather(*[_call(function_call) for function_call in function_calls]))
+
 async def tools_reply_function( 
     agent: AssistantAgent,  # DrSai assistant agent
     oai_messages: List[str],  # OAI messages
@@ -83,17 +122,22 @@ async def tools_reply_function(
         assert isinstance(model_result.content, list) and all(
             isinstance(item, FunctionCall) for item in model_result.content
         )
-        function_calls_new = [] # 储存不在mp_structure_reply_function中处理的函数，如handoff_function等
         function_calls: List[FunctionCall] = model_result.content
         function_call_contents: str = ""
-        for function_call in function_calls:
-            if function_call.name in tools_name:
-                tool_result: ToolResult = await workbench.call_tool(name=function_call.name, arguments=json.loads(function_call.arguments), cancellation_token=cancellation_token)
-                name = tool_result.name
-                content: str = "\n".join([str(i.content) for i  in tool_result.result])
-                function_call_contents += f"{name}:\n{content}\n\n"
-            else:
-                function_calls_new.append(function_call)
+        # 并发执行工具集中的工具，结果按调用顺序拼接
+        tool_calls = [function_call for function_call in function_calls if function_call.name in tools_name]
+        function_calls_new = [function_call for function_call in function_calls if function_call.name not in tools_name] # 储存不在mp_structure_reply_function中处理的函数，如handoff_function等
+        tool_results = await execute_tool_calls(
+            workbench,
+            tool_calls,
+            cancellation_token,
+            max_concurrency=kwargs.get("max_tool_concurrency", 8),
+            timeout=kwargs.get("tool_timeout", None),
+        )
+        for tool_result in tool_results:
+            name = tool_result.name
+            content: str = "\n".join([str(i.content) for i  in tool_result.result])
+            function_call_contents += f"{name}:\n{content}\n\n"
         if function_calls_new:
             model_result.content = function_calls_new
             yield model_result
@@ -162,21 +206,26 @@ async def tools_recycle_reply_function(
                 assert isinstance(model_result.content, list) and all(
                     isinstance(item, FunctionCall) for item in model_result.content
                 )
-                function_calls_new = [] # 储存不在mp_structure_reply_function中处理的函数，如handoff_function等
                 function_calls: List[FunctionCall] = model_result.content
                 function_call_contents: str = ""
-                for function_call in function_calls:
-                    if function_call.name in tools_name:
-                        tool_result: ToolResult = await workbench.call_tool(name=function_call.name, arguments=json.loads(function_call.arguments), cancellation_token=cancellation_token)
-                        name = tool_result.name
-                        content: str = "\n".join([str(i.content) for i  in tool_result.result])
-                        yield f"工具{name}的执行结果如下:\n"
-                        yield "<think>\n"
-                        yield f"{content}\n\n"
-                        yield "</think>\n"
-                        function_call_contents += f"工具{name}的执行结果如下:\n{content}\n\n"
-                    else:
-                        function_calls_new.append(function_call)
+                # 并发执行工具集中的工具，结果按调用顺序输出
+                tool_calls = [function_call for function_call in function_calls if function_call.name in tools_name]
+                function_calls_new = [function_call for function_call in function_calls if function_call.name not in tools_name] # 储存不在mp_structure_reply_function中处理的函数，如handoff_function等
+                tool_results = await execute_tool_calls(
+                    workbench,
+                    tool_calls,
+                    cancellation_token,
+                    max_concurrency=kwargs.get("max_tool_concurrency", 8),
+                    timeout=kwargs.get("tool_timeout", None),
+                )
+                for tool_result in tool_results:
+                    name = tool_result.name
+                    content: str = "\n".join([str(i.content) for i  in tool_result.result])
+                    yield f"工具{name}的执行结果如下:\n"
+                    yield "<think>\n"
+                    yield f"{content}\n\n"
+                    yield "</think>\n"
+                    function_call_contents += f"工具{name}的执行结果如下:\n{content}\n\n"
 
                 # 将执行结果以AssistMessage的形式放入
                 llm_messages.append(UserMessage(content=function_call_contents, source=agent_name))
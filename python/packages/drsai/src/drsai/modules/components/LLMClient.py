@@ -1,6 +1,7 @@
 
 from typing_extensions import Unpack
 import os
+import hashlib
 import logging
 import warnings
 from typing import (
@@ -11,6 +12,7 @@ from typing import (
     Mapping,
     Optional,
     Sequence,
+    Tuple,
     Type,
     Union,
     cast,
@@ -43,19 +45,54 @@ from autogen_core.tools import Tool, ToolSchema
 
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_ext.models.openai._openai_client import (
+    BaseOpenAIChatCompletionClient,
     convert_tools, 
     _add_usage,
+    _create_args_from_config,
+    _openai_client_from_config,
     to_oai_type,
     create_kwargs
     )
 from autogen_ext.models.openai.config import OpenAIClientConfiguration
 
+from .model_client_registry import OPENAI_CLIENT_KWARGS, SharedOpenAIClient
+from .response_cache import (
+    ResponseCache,
+    get_request_cache_seed,
+    request_fingerprint,
+    response_cache as default_response_cache,
+)
+from .single_flight import single_flight as default_single_flight
+
 logger = logging.getLogger(EVENT_LOGGER_NAME)
 
 
 class HepAIChatCompletionClient(OpenAIChatCompletionClient):
+    """
+    OpenAI-compatible client for the HepAI gateway.
+
+    Clients with the same connection settings (base_url, api_key, timeout, ...) share one
+    AsyncOpenAI and its connection pool through `model_client_registry`, and a per-request
+    API key set with `set_request_api_key` is used without touching the shared client.
+    Pass `shared_client=False` to give the client a private connection pool.
+
+    When a cache seed is set for the request (see `set_request_cache_seed`), results are looked
+    up in `response_cache` (or the given `response_cache`) first and identical calls are replayed,
+    `create_stream` replays the cached chunks.
+
+    With `single_flight=True`, identical requests that are in flight at the same time are sent
+    only once and the result (or stream) is shared. Concurrent sampled requests then get the
+    same sample, so it is opt-in; requests with `n > 1` are never coalesced.
+    """
 
-    def __init__(self, **kwargs: Unpack[OpenAIClientConfiguration]):
+    def __init__(
+        self,
+        *,
+        shared_client: bool = True,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: bool = False,
+        **kwargs: Unpack[OpenAIClientConfiguration],
+    ):
 
         if "api_key" not in kwargs:
             kwargs["api_key"] = os.environ.get("HEPAI_API_KEY")
@@ -185,8 +222,112 @@ class HepAIChatCompletionClient(OpenAIChatCompletionClient):
                 kwargs["model_info"]["structured_output"] = True
                 break
 
-        super().__init__(**kwargs)
-    
+        client_options = {k: v for k, v in kwargs.items() if k in OPENAI_CLIENT_KWARGS}
+        # A caller-provided http_client is already a dedicated pool
+        self._shared_client = shared_client and "http_client" not in client_options
+        if not self._shared_client:
+            super().__init__(**kwargs)
+        else:
+            # What OpenAIChatCompletionClient.__init__ does, but with the shared client instead of
+            # a private AsyncOpenAI (base_url and api_key are always set above, so its
+            # gemini-/claude- defaults do not apply)
+            self._raw_config: Dict[str, Any] = dict(kwargs)
+            config = {k: v for k, v in kwargs.items() if k not in ("model_capabilities", "model_info")}
+            BaseOpenAIChatCompletionClient.__init__(
+                self,
+                client=SharedOpenAIClient(client_options),  # type: ignore[arg-type]
+                create_args=_create_args_from_config(config),
+                model_capabilities=kwargs.get("model_capabilities"),
+                model_info=kwargs.get("model_info"),
+                add_name_prefixes=kwargs.get("add_name_prefixes", False),
+            )
+        self._response_cache = response_cache if response_cache is not None else default_response_cache
+        self._single_flight = single_flight
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        # Caches hold locks and connections; an unpickled client uses the process-wide cache
+        state["_response_cache"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self._response_cache is None:
+            self._response_cache = default_response_cache
+        client_options = {k: v for k, v in self._raw_config.items() if k in OPENAI_CLIENT_KWARGS}
+        if self.__dict__.get("_shared_client"):
+            self._client = SharedOpenAIClient(client_options)  # type: ignore[assignment]
+        else:
+            self._client = _openai_client_from_config(self._raw_config)
+
+    def _request_keys(
+        self,
+        kind: str,
+        messages: Sequence[LLMMessage],
+        tools: Sequence[Tool | ToolSchema],
+        json_output: Optional[bool | type[BaseModel]],
+        extra_create_args: Mapping[str, Any],
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Keys of the request in the response cache and for single-flight, None where they do
+        not apply. The request is only fingerprinted when at least one of them applies.
+        """
+        cache_seed = get_request_cache_seed()
+        create_args = {**self._create_args, **extra_create_args}
+        # n > 1 asks for independent samples, which must not be shared between callers
+        coalesce = self._single_flight and (create_args.get("n") or 1) <= 1
+        if cache_seed is None and not coalesce:
+            return None, None
+
+        fingerprint = request_fingerprint(
+            messages=messages,
+            tools=tools,
+            json_output=json_output,
+            create_args=create_args,
+        )
+        cache_key = self._response_cache.make_key(fingerprint, cache_seed) if cache_seed is not None else None
+        flight_key = None
+        if coalesce:
+            # Only coalesce requests that would have been sent with the same credentials
+            api_key = self._client.api_key or ""
+            credentials = hashlib.sha256(f"{self._client.base_url}|{api_key}".encode("utf-8")).hexdigest()
+            flight_key = f"{kind}:{credentials}:{fingerprint}"
+        return cache_key, flight_key
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        cache_key, flight_key = self._request_keys("create", messages, tools, json_output, extra_create_args)
+        if cache_key is not None:
+            cached = await self._response_cache.aget(cache_key)
+            if cached is not None:
+                return cached[0]
+
+        upstream_create = super().create
+
+        async def _create(token: Optional[CancellationToken]) -> CreateResult:
+            result = await upstream_create(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=token,
+            )
+            if cache_key is not None:
+                await self._response_cache.aput(cache_key, result)
+            return result
+
+        if flight_key is None:
+            return await _create(cancellation_token)
+        # The shared call is only cancelled once every waiter has been cancelled
+        return await default_single_flight.do(flight_key, lambda: _create(None), cancellation_token)
+
     async def create_stream(
         self,
         messages: Sequence[LLMMessage],
@@ -199,6 +340,63 @@ class HepAIChatCompletionClient(OpenAIChatCompletionClient):
     ) -> AsyncGenerator[Union[str, CreateResult], None]:
         """Create a stream of string chunks from the model ending with a :class:`~autogen_core.models.CreateResult`.
 
+        If a cache seed is set and the request is in the response cache, the cached chunks and
+        result are replayed instead; an identical stream already in flight is followed instead
+        of being requested again. See :meth:`_create_stream` for the supported arguments.
+        """
+        cache_key, flight_key = self._request_keys("stream", messages, tools, json_output, extra_create_args)
+        if cache_key is not None:
+            cached = await self._response_cache.aget(cache_key)
+            if cached is not None:
+                result, chunks = cached
+                if chunks is None:
+                    # Cached by create(): replay the thought and the text content as chunks
+                    chunks = []
+                    if result.thought and isinstance(result.content, str):
+                        chunks.append(f"<think>{result.thought}</think>")
+                    if isinstance(result.content, str) and result.content:
+                        chunks.append(result.content)
+                for chunk in chunks:
+                    yield chunk
+                yield result
+                return
+
+        async def _stream(token: Optional[CancellationToken]) -> AsyncGenerator[Union[str, CreateResult], None]:
+            streamed: List[str] = []
+            async for item in self._create_stream(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=token,
+                max_consecutive_empty_chunk_tolerance=max_consecutive_empty_chunk_tolerance,
+            ):
+                if isinstance(item, CreateResult):
+                    if cache_key is not None:
+                        await self._response_cache.aput(cache_key, item, streamed)
+                elif cache_key is not None:
+                    streamed.append(item)
+                yield item
+
+        if flight_key is None:
+            stream = _stream(cancellation_token)
+        else:
+            stream = default_single_flight.stream(flight_key, lambda: _stream(None), cancellation_token)
+        async for item in stream:
+            yield item
+
+    async def _create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+        max_consecutive_empty_chunk_tolerance: int = 0,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        """Create a stream of string chunks from the model ending with a :class:`~autogen_core.models.CreateResult`.
+
         Extends :meth:`autogen_core.models.ChatCompletionClient.create_stream` to support OpenAI API.
 
         In streaming, the default behaviour is not return token usage counts.
@@ -1,5 +1,8 @@
+import asyncio
 import requests
-from typing import Any
+from typing import Any, Optional
+
+import aiohttp
 
 class RAGFlowMemory:
     """
@@ -7,6 +10,8 @@ class RAGFlowMemory:
     - List datasets 
     - list_documents
     - retrieve chunks by question
+    `a_retrieve_chunks_by_content` is the non-blocking variant for async code; it reuses one
+    aiohttp session (keep-alive connections) per event loop until `close()` is called.
     """
     def __init__(
             self,
@@ -19,6 +24,43 @@ class RAGFlowMemory:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # aiohttp sessions are bound to the loop that created them
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            if self._session is not None:
+                await self._close_stale_session(self._session, self._session_loop)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ttl_dns_cache=300)
+            )
+            self._session_loop = loop
+        return self._session
+
+    @staticmethod
+    async def _close_stale_session(
+        session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Close a session created on another event loop"""
+        if session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # Still serving another thread: close it on its own loop
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        try:
+            await session.close()
+        except RuntimeError:
+            # The loop is closed; its transports cannot be closed anymore and are freed with it
+            pass
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
 
     def list_datasets(self) -> list[dict[str, Any]]:
         try:
@@ -73,6 +115,42 @@ class RAGFlowMemory:
         except:
             return {}
 
+    async def a_retrieve_chunks_by_content(
+            self,
+            question: str,
+            dataset_ids: list[str] = [],
+            document_ids: list[str] = [],
+            similarity_threshold: float = 0.2,
+            vector_similarity_weight: float = 0.3,
+            timeout: Optional[float] = None,
+            **kwargs: Any
+            ) -> dict[str, Any]:
+        """
+        Async version of `retrieve_chunks_by_content`.
+        timeout: total seconds allowed for the request, None means no limit.
+        """
+        params = {
+            "question": question,
+            "dataset_ids": dataset_ids,
+            "document_ids": document_ids,
+            "similarity_threshold": similarity_threshold,
+            "vector_similarity_weight": vector_similarity_weight,
+            **kwargs
+        }
+        if not dataset_ids and not document_ids:
+            return {}
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/api/v1/retrieval",
+                headers=self.headers,
+                json=params,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as response:
+                return (await response.json(content_type=None))["data"]
+        except Exception:
+            return {}
+
 if __name__ == "__main__":
 
     import json
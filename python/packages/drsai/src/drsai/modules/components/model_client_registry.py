@@ -0,0 +1,222 @@
+"""
+进程内共享的OpenAI兼容客户端注册表：相同配置(base_url、api_key、超时等)的模型客户端共用一个AsyncOpenAI及其httpx连接池，
+不再为每个线程的每个智能体单独建立连接和TLS握手；请求级的API key通过contextvar覆盖，不修改共享的客户端。
+"""
+import asyncio
+import inspect
+import json
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from loguru import logger
+from openai import AsyncOpenAI
+
+logger = logger.bind(name="model_client_registry.py")
+
+# AsyncOpenAI的构造参数，其余配置(model、temperature等)是每次请求的参数，不影响连接池
+OPENAI_CLIENT_KWARGS = set(inspect.getfullargspec(AsyncOpenAI.__init__).kwonlyargs)
+
+_request_api_key: ContextVar[Optional[str]] = ContextVar("drsai_request_api_key", default=None)
+
+
+def set_request_api_key(api_key: Optional[str]) -> Token:
+    """
+    为当前请求(当前任务及其之后创建的子任务)设置API key，共享客户端发请求时使用该key。
+    返回的Token可用于reset_request_api_key恢复。
+    """
+    return _request_api_key.set(api_key or None)
+
+
+def reset_request_api_key(token: Token) -> None:
+    _request_api_key.reset(token)
+
+
+@contextmanager
+def request_api_key(api_key: Optional[str]) -> Iterator[None]:
+    """在with块内使用指定的API key"""
+    token = set_request_api_key(api_key)
+    try:
+        yield
+    finally:
+        reset_request_api_key(token)
+
+
+@dataclass
+class _ClientEntry:
+    client: AsyncOpenAI
+    config: str
+    loop: Optional["weakref.ReferenceType[asyncio.AbstractEventLoop]"]
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ModelClientRegistry:
+    """
+    按客户端配置共享AsyncOpenAI。httpx的连接绑定在事件循环上，因此键中包含事件循环id。
+    - 仍被模型客户端(SharedOpenAIClient)引用的配置不会被回收；
+    - 没有引用的客户端(如请求级API key对应的客户端)空闲超过idle_ttl后关闭。
+    Args:
+        idle_ttl (float): 无引用客户端的空闲超时(秒)。默认: 600
+    Usage:
+        client = model_client_registry.get({"base_url": "...", "api_key": "..."})
+        ...
+        await model_client_registry.close_all()
+    """
+
+    def __init__(self, idle_ttl: float = 600) -> None:
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[Tuple[int, str], _ClientEntry] = {}
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.closed = 0
+
+    @staticmethod
+    def config_key(options: Mapping[str, Any]) -> str:
+        return json.dumps(dict(options), sort_keys=True, default=str)
+
+    def retain(self, options: Mapping[str, Any]) -> str:
+        """登记一个引用该配置的模型客户端，返回配置键(用于release)"""
+        config = self.config_key(options)
+        with self._lock:
+            self._refs[config] = self._refs.get(config, 0) + 1
+        return config
+
+    def release(self, config: str) -> None:
+        with self._lock:
+            refs = self._refs.get(config, 0) - 1
+            if refs > 0:
+                self._refs[config] = refs
+            else:
+                self._refs.pop(config, None)
+
+    def get(self, options: Mapping[str, Any]) -> AsyncOpenAI:
+        """返回当前事件循环上该配置的共享客户端，不存在时创建"""
+        config = self.config_key(options)
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        key = (id(loop), config)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.loop is not None and entry.loop() is not loop:
+                # 事件循环id被复用了
+                entry = None
+            if entry is None:
+                entry = _ClientEntry(
+                    client=AsyncOpenAI(**options),
+                    config=config,
+                    loop=weakref.ref(loop) if loop is not None else None,
+                )
+                self._entries[key] = entry
+                self.created += 1
+            entry.last_used = now
+            client = entry.client
+        if now - self._last_sweep > min(self.idle_ttl / 4, 60):
+            self.sweep()
+        return client
+
+    def sweep(self) -> int:
+        """关闭空闲超时且没有引用的客户端，丢弃已关闭事件循环上的客户端，返回关闭的数量"""
+        now = time.monotonic()
+        try:
+            running: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        to_close: List[AsyncOpenAI] = []
+        with self._lock:
+            self._last_sweep = now
+            for key, entry in list(self._entries.items()):
+                loop = entry.loop() if entry.loop is not None else None
+                if entry.loop is not None and (loop is None or loop.is_closed()):
+                    # 连接已经随事件循环失效
+                    del self._entries[key]
+                    continue
+                if self._refs.get(entry.config) or now - entry.last_used < self.idle_ttl:
+                    continue
+                if loop is not None and loop is not running:
+                    # 只能在客户端所在的事件循环上关闭
+                    continue
+                del self._entries[key]
+                to_close.append(entry.client)
+        for client in to_close:
+            self._close_client(client, running)
+        self.closed += len(to_close)
+        return len(to_close)
+
+    @staticmethod
+    def _close_client(client: AsyncOpenAI, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        if loop is None:
+            return
+
+        def _log_error(task: "asyncio.Task[None]") -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Error closing model client: {task.exception()}")
+
+        loop.create_task(client.close()).add_done_callback(_log_error)
+
+    async def close_all(self) -> None:
+        """关闭当前事件循环上的全部客户端(用于进程退出前)，之后的请求会重新创建"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == id(loop)]
+            clients = [self._entries.pop(key).client for key in keys]
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing model client: {e}")
+        self.closed += len(clients)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._entries),
+            "referenced_configs": len(self._refs),
+            "created": self.created,
+            "closed": self.closed,
+        }
+
+
+model_client_registry = ModelClientRegistry()
+
+
+class SharedOpenAIClient:
+    """
+    替代模型客户端的_client：每次访问时按当前事件循环和请求级API key解析到注册表中的共享AsyncOpenAI，
+    属性访问(chat、beta等)直接转发给该客户端。close()只释放引用，不关闭共享的连接池。
+    """
+
+    def __init__(self, options: Mapping[str, Any], registry: ModelClientRegistry = model_client_registry) -> None:
+        self._options = dict(options)
+        self._registry = registry
+        config = registry.retain(self._options)
+        # 模型客户端没有被显式close时，在回收时释放引用
+        self._finalizer = weakref.finalize(self, registry.release, config)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        options = self._options
+        api_key = _request_api_key.get()
+        if api_key is not None and api_key != options.get("api_key"):
+            options = {**options, "api_key": api_key}
+        return self._registry.get(options)
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self.client.api_key
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    async def close(self) -> None:
+        self._finalizer()
@@ -0,0 +1,273 @@
+"""
+模型响应的精确匹配缓存：请求设置了cache_seed时，相同的(模型、消息、工具、采样参数、cache_seed)直接返回缓存的结果，
+流式调用按缓存的分块重放。存储后端可插拔：内存LRU(默认)、SQLite文件、diskcache(可选依赖)。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Literal, Mapping, Optional, Sequence, Tuple
+
+from autogen_core import CacheStore, Image
+from autogen_core.models import CreateResult, LLMMessage
+from autogen_core.tools import Tool, ToolSchema
+from loguru import logger
+from pydantic import BaseModel
+
+from drsai.configs import CONST
+
+logger = logger.bind(name="response_cache.py")
+
+_request_cache_seed: ContextVar[Optional[int]] = ContextVar("drsai_request_cache_seed", default=None)
+
+# 只缓存确定完成的结果，content_filter/unknown等可能是临时状态
+CACHEABLE_FINISH_REASONS = ("stop", "length", "function_calls")
+
+
+def set_request_cache_seed(cache_seed: Optional[int]) -> Token:
+    """
+    为当前请求(当前任务及其之后创建的子任务)设置cache_seed，None表示不使用缓存。
+    返回的Token可用于reset_request_cache_seed恢复。
+    """
+    return _request_cache_seed.set(cache_seed)
+
+
+def reset_request_cache_seed(token: Token) -> None:
+    _request_cache_seed.reset(token)
+
+
+def get_request_cache_seed() -> Optional[int]:
+    return _request_cache_seed.get()
+
+
+@contextmanager
+def request_cache_seed(cache_seed: Optional[int]) -> Iterator[None]:
+    """在with块内使用指定的cache_seed"""
+    token = set_request_cache_seed(cache_seed)
+    try:
+        yield
+    finally:
+        reset_request_cache_seed(token)
+
+
+class LRUCacheStore(CacheStore[str]):
+    """
+    进程内的LRU缓存
+    Args:
+        max_entries (int): 最多保存的条目数。默认: 1024
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteCacheStore(CacheStore[str]):
+    """
+    SQLite文件缓存，进程重启和多个进程之间共享。超出max_entries时删除最早写入的条目。
+    Args:
+        path (str): 数据库文件路径
+        max_entries (int): 最多保存的条目数，<=0表示不限制。默认: 100000
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_created_at ON llm_response_cache (created_at)"
+            )
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_response_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._writes += 1
+            # 每写入一定次数检查一次容量，避免每次写入都COUNT
+            if self.max_entries > 0 and self._writes % 100 == 0:
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key IN (SELECT key FROM llm_response_cache "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_response_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_cache_store(
+    backend: Literal["memory", "sqlite", "diskcache"] = "memory",
+    path: Optional[str] = None,
+    max_entries: Optional[int] = None,
+) -> CacheStore[str]:
+    """
+    创建缓存存储后端
+    Args:
+        backend (str): memory(进程内LRU)、sqlite或diskcache(需要pip install diskcache)
+        path (str, optional): sqlite/diskcache的存储路径。默认: ~/.drsai/cache下
+        max_entries (int, optional): memory/sqlite后端的最大条目数。默认: 各后端的默认值
+    """
+    if backend == "memory":
+        return LRUCacheStore(max_entries=max_entries or 1024)
+    if backend == "sqlite":
+        return SqliteCacheStore(
+            path or f"{CONST.FS_DIR}/cache/llm_responses.sqlite",
+            max_entries=max_entries or 100000,
+        )
+    if backend == "diskcache":
+        # diskcache为可选依赖(pip install drsai[diskcache])
+        import diskcache
+        from autogen_ext.cache_store.diskcache import DiskCacheStore
+
+        return DiskCacheStore[str](diskcache.Cache(path or f"{CONST.FS_DIR}/cache/llm_responses"))
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+def _canonical(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, type) and issubclass(obj, BaseModel):
+        return obj.model_json_schema()
+    if isinstance(obj, Image):
+        return {"image": hashlib.sha256(obj.to_base64().encode("utf-8")).hexdigest()}
+    return str(obj)
+
+
+def request_fingerprint(
+    *,
+    messages: Sequence[LLMMessage],
+    tools: Sequence[Tool | ToolSchema],
+    json_output: Optional[bool | type[BaseModel]],
+    create_args: Mapping[str, Any],
+) -> str:
+    """消息、工具、输出格式、模型和采样参数的规范化哈希，完全相同的模型请求有相同的指纹"""
+    payload = {
+        "messages": [message.model_dump(mode="json") for message in messages],
+        "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+        "json_output": json_output,
+        "create_args": dict(create_args),
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonical)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    模型响应缓存，保存CreateResult和流式调用的文本分块。
+    Args:
+        store (CacheStore[str], optional): 存储后端，默认为进程内LRU
+    Usage:
+        response_cache.set_store(create_cache_store("sqlite"))
+        with request_cache_seed(42):
+            result = await model_client.create(messages)  # 第二次相同的调用直接返回缓存
+    """
+
+    def __init__(self, store: Optional[CacheStore[str]] = None) -> None:
+        self.store: CacheStore[str] = store if store is not None else LRUCacheStore()
+        self.hits = 0
+        self.misses = 0
+
+    def set_store(self, store: CacheStore[str]) -> None:
+        self.store = store
+
+    @staticmethod
+    def make_key(fingerprint: str, cache_seed: int) -> str:
+        """由请求指纹(见request_fingerprint)和cache_seed得到缓存键"""
+        return hashlib.sha256(f"{fingerprint}:{cache_seed}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[CreateResult, Optional[List[str]]]]:
+        """返回(结果, 流式分块)，非流式调用写入的条目分块为None"""
+        try:
+            value = self.store.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            entry: Dict[str, Any] = json.loads(value)
+            result = CreateResult.model_validate(entry["result"])
+        except Exception as e:
+            logger.warning(f"Unreadable response cache entry {key}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result.model_copy(update={"cached": True}), entry.get("chunks")
+
+    def put(self, key: str, result: CreateResult, chunks: Optional[List[str]] = None) -> None:
+        if result.finish_reason not in CACHEABLE_FINISH_REASONS:
+            return
+        value = json.dumps({"result": result.model_dump(mode="json"), "chunks": chunks}, ensure_ascii=False)
+        try:
+            self.store.set(key, value)
+        except Exception as e:
+            logger.warning(f"Failed to write response cache entry {key}: {e}")
+
+    @property
+    def _blocking(self) -> bool:
+        """除内存LRU外的后端(sqlite、diskcache)都有文件I/O，需要在线程中执行"""
+        return not isinstance(self.store, LRUCacheStore)
+
+    async def aget(self, key: str) -> Optional[Tuple[CreateResult, Optional[List[str]]]]:
+        """get的异步版本，文件后端不阻塞事件循环"""
+        if self._blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aput(self, key: str, result: CreateResult, chunks: Optional[List[str]] = None) -> None:
+        """put的异步版本，文件后端不阻塞事件循环"""
+        if self._blocking:
+            await asyncio.to_thread(self.put, key, result, chunks)
+        else:
+            self.put(key, result, chunks)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "store": type(self.store).__name__}
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,147 @@
+"""
+相同模型请求的单飞(single-flight)合并：同一时刻多个参与者/线程发出完全相同的请求时，只向网关发送一次，
+结果(或流式分块)分发给所有等待者。请求完成后即移除，不做缓存(缓存见response_cache)。
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from autogen_core import CancellationToken
+
+
+@dataclass
+class _Call:
+    task: "asyncio.Task[Any]"
+    waiters: int = 0
+
+
+@dataclass
+class _StreamCall:
+    task: Optional["asyncio.Task[None]"] = None
+    items: List[Any] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    updated: asyncio.Event = field(default_factory=asyncio.Event)
+    subscribers: int = 0
+
+
+class SingleFlight:
+    """
+    按键合并进行中的相同调用。调用在独立的任务中执行，单个等待者取消时不影响其他等待者，
+    所有等待者都离开后才取消实际的调用。键中包含事件循环id(任务绑定在事件循环上)。
+    Usage:
+        result = await single_flight.do(key, lambda: client.create(messages))
+        async for chunk in single_flight.stream(key, lambda: client.create_stream(messages)):
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Tuple[int, str], _Call] = {}
+        self._streams: Dict[Tuple[int, str], _StreamCall] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    async def _wait(awaitable: Awaitable[Any], cancellation_token: Optional[CancellationToken]) -> Any:
+        future = asyncio.ensure_future(awaitable)
+        if cancellation_token is not None:
+            cancellation_token.link_future(future)
+        return await future
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> Any:
+        """执行fn()，已有相同键的调用在进行时等待其结果"""
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        call = self._calls.get(call_key)
+        if call is None:
+            call = _Call(task=loop.create_task(fn()))
+            self._calls[call_key] = call
+            self.calls += 1
+
+            def _done(_: "asyncio.Task[Any]", call: _Call = call) -> None:
+                if self._calls.get(call_key) is call:
+                    del self._calls[call_key]
+
+            call.task.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await self._wait(asyncio.shield(call.task), cancellation_token)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def _pump(self, call_key: Tuple[int, str], call: _StreamCall, stream: AsyncIterator[Any]) -> None:
+        try:
+            async for item in stream:
+                call.items.append(item)
+                updated, call.updated = call.updated, asyncio.Event()
+                updated.set()
+        except BaseException as e:
+            call.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            call.done = True
+            call.updated.set()
+            if self._streams.get(call_key) is call:
+                del self._streams[call_key]
+
+    async def stream(
+        self,
+        key: str,
+        fn: Callable[[], AsyncIterator[Any]],
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Any, None]:
+        """迭代fn()返回的流，已有相同键的流在进行时从头重放已收到的分块并跟随后续分块"""
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        call = self._streams.get(call_key)
+        if call is None:
+            call = _StreamCall()
+            call.task = loop.create_task(self._pump(call_key, call, fn()))
+            self._streams[call_key] = call
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.subscribers += 1
+        index = 0
+        try:
+            while True:
+                updated = call.updated
+                while index < len(call.items):
+                    yield call.items[index]
+                    index += 1
+                if call.done:
+                    if call.error is not None:
+                        if isinstance(call.error, asyncio.CancelledError):
+                            raise asyncio.CancelledError()
+                        raise call.error
+                    return
+                await self._wait(updated.wait(), cancellation_token)
+        finally:
+            call.subscribers -= 1
+            if call.subscribers == 0 and call.task is not None and not call.task.done():
+                call.task.cancel()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+single_flight = SingleFlight()
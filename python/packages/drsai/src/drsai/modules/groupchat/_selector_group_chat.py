@@ -36,6 +36,7 @@ from autogen_agentchat.state import SelectorManagerState
 from autogen_agentchat.teams._group_chat._events import GroupChatTermination
 
 from ._base_group_chat import DrSaiGroupChat, DrSaiGroupChatManager
+from ._speaker_selection import SelectorHistory, mentioned_agents, rule_based_select
 from drsai.modules.managers.database import DatabaseManager
 
 trace_logger = logging.getLogger(TRACE_LOGGER_NAME)
@@ -75,6 +76,10 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         model_context: ChatCompletionContext | None,
         model_client_streaming: bool = False,
         db_manager: DatabaseManager = None,
+        selector_history_window: int | None = None,
+        selector_history_max_chars: int | None = None,
+        enable_rule_based_selection: bool = False,
+        speaker_transitions: Dict[str, List[str]] | None = None,
         **kwargs: Any
     ) -> None:
         super().__init__(
@@ -107,6 +112,17 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         else:
             self._model_context = UnboundedChatCompletionContext()
         self._cancellation_token = CancellationToken()
+        # Incrementally maintained selector transcript, only valid for an unbounded model context
+        # since other contexts may drop or rewrite messages.
+        self._selector_history = SelectorHistory(
+            max_messages=selector_history_window, max_chars=selector_history_max_chars
+        )
+        self._use_selector_history = isinstance(self._model_context, UnboundedChatCompletionContext)
+        self._selector_history_synced = False
+        self._selector_history_window = selector_history_window
+        self._selector_history_max_chars = selector_history_max_chars
+        self._enable_rule_based_selection = enable_rule_based_selection
+        self._speaker_transitions = speaker_transitions
 
     async def validate_group_state(self, messages: List[BaseChatMessage] | None) -> None:
         pass
@@ -118,6 +134,8 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         if self._termination_condition is not None:
             await self._termination_condition.reset()
         self._previous_speaker = None
+        self._selector_history.clear()
+        self._selector_history_synced = False
 
     async def save_state(self) -> Mapping[str, Any]:
         state = SelectorManagerState(
@@ -135,6 +153,8 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         )
         self._current_turn = selector_state.current_turn
         self._previous_speaker = selector_state.previous_speaker
+        self._selector_history.clear()
+        self._selector_history_synced = False
 
     @staticmethod
     async def _add_messages_to_context(
@@ -154,6 +174,11 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         self._message_thread.extend(messages)
         base_chat_messages = [m for m in messages if isinstance(m, BaseChatMessage)]
         await self._add_messages_to_context(self._model_context, base_chat_messages)
+        if self._selector_history_synced:
+            for msg in base_chat_messages:
+                if isinstance(msg, HandoffMessage):
+                    self._selector_history.extend(msg.context)
+                self._selector_history.append(msg.to_model_message())
 
     async def select_speaker(self, thread: List[BaseAgentEvent | BaseChatMessage]) -> str:
         """Selects the next speaker in a group chat using a ChatCompletion client,
@@ -209,11 +234,16 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
             roles += re.sub(r"\s+", " ", f"{topic_type}: {description}").strip() + "\n"
         roles = roles.strip()
 
-        # Select the next speaker.
-        if len(participants) > 1:
-            agent_name = await self._select_speaker(roles, participants, self._max_selector_attempts)
-        else:
+        # Select the next speaker, trying the cheap rule-based pre-selection before the model.
+        agent_name: str | None = None
+        if len(participants) == 1:
             agent_name = participants[0]
+        elif self._enable_rule_based_selection:
+            agent_name = rule_based_select(thread, participants, self._speaker_transitions)
+            if agent_name is not None:
+                trace_logger.debug(f"Rule-based selection picked: {agent_name}")
+        if agent_name is None:
+            agent_name = await self._select_speaker(roles, participants, self._max_selector_attempts)
         self._previous_speaker = agent_name
         trace_logger.debug(f"Selected speaker: {agent_name}")
         return agent_name
@@ -231,9 +261,26 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         history: str = "\n".join(history_messages)
         return history
 
+    async def _get_selector_history(self) -> str:
+        """Return the transcript for the selector prompt, reusing the incremental history when possible."""
+        if not self._use_selector_history:
+            model_context_messages = await self._model_context.get_messages()
+            if self._selector_history_window is not None or self._selector_history_max_chars is not None:
+                history = SelectorHistory(
+                    max_messages=self._selector_history_window, max_chars=self._selector_history_max_chars
+                )
+                history.extend(model_context_messages)
+                return history.render()
+            return self.construct_message_history(model_context_messages)
+        if not self._selector_history_synced:
+            # Seed from the model context once (initial messages, loaded state), then update incrementally.
+            self._selector_history.clear()
+            self._selector_history.extend(await self._model_context.get_messages())
+            self._selector_history_synced = True
+        return self._selector_history.render()
+
     async def _select_speaker(self, roles: str, participants: List[str], max_attempts: int) -> str:
-        model_context_messages = await self._model_context.get_messages()
-        model_context_history = self.construct_message_history(model_context_messages)
+        model_context_history = await self._get_selector_history()
 
         select_speaker_prompt = self._selector_prompt.format(
             roles=roles, participants=str(participants), history=model_context_history
@@ -323,24 +370,7 @@ class DrSaiSelectorGroupChatManager(DrSaiGroupChatManager):
         Returns:
             Dict: a counter for mentioned agents.
         """
-        mentions: Dict[str, int] = dict()
-        for name in agent_names:
-            # Finds agent mentions, taking word boundaries into account,
-            # accommodates escaping underscores and underscores as spaces
-            regex = (
-                r"(?<=\W)("
-                + re.escape(name)
-                + r"|"
-                + re.escape(name.replace("_", " "))
-                + r"|"
-                + re.escape(name.replace("_", r"\_"))
-                + r")(?=\W)"
-            )
-            # Pad the message to help with matching
-            count = len(re.findall(regex, f" {message_content} "))
-            if count > 0:
-                mentions[name] = count
-        return mentions
+        return mentioned_agents(message_content, agent_names)
     
     async def pause(self) -> None:
         """Pause the group chat manager."""
@@ -371,6 +401,10 @@ class DrSaiSelectorGroupChatConfig(BaseModel):
     emit_team_events: bool = False
     model_client_streaming: bool = False
     model_context: ComponentModel | None = None
+    selector_history_window: int | None = None
+    selector_history_max_chars: int | None = None
+    enable_rule_based_selection: bool = False
+    speaker_transitions: Dict[str, List[str]] | None = None
 
 
 class DrSaiSelectorGroupChat(DrSaiGroupChat, Component[DrSaiSelectorGroupChatConfig]):
@@ -410,6 +444,11 @@ class DrSaiSelectorGroupChat(DrSaiGroupChat, Component[DrSaiSelectorGroupChatCon
         model_client_streaming (bool, optional): Whether to use streaming for the model client. (This is useful for reasoning models like QwQ). Defaults to False.
         model_context (ChatCompletionContext | None, optional): The model context for storing and retrieving
             :class:`~autogen_core.models.LLMMessage`. It can be preloaded with initial messages. Messages stored in model context will be used for speaker selection. The initial messages will be cleared when the team is reset.
+        selector_history_window (int, optional): Only include this many recent messages in the selector prompt. Defaults to None (all messages).
+        selector_history_max_chars (int, optional): Character budget for the history in the selector prompt, the most recent messages are kept. Defaults to None (no limit).
+        enable_rule_based_selection (bool, optional): Try a cheap rule-based selection (handoff targets, allowed transitions, a single mentioned candidate)
+            before calling the model, the model is only used when the rules are ambiguous. Defaults to False.
+        speaker_transitions (Dict[str, List[str]], optional): Allowed next speakers for each speaker, used by the rule-based selection. Defaults to None.
 
     Raises:
         ValueError: If the number of participants is less than two or if the selector prompt is invalid.
@@ -613,6 +652,10 @@ Read the above conversation. Then select the next role from {participants} to pl
         model_client_streaming: bool = False,
         model_context: ChatCompletionContext | None = None,
         db_manager: DatabaseManager = None,
+        selector_history_window: int | None = None,
+        selector_history_max_chars: int | None = None,
+        enable_rule_based_selection: bool = False,
+        speaker_transitions: Dict[str, List[str]] | None = None,
         **kwargs: Any
     ):
         super().__init__(
@@ -638,6 +681,10 @@ Read the above conversation. Then select the next role from {participants} to pl
         self._candidate_func = candidate_func
         self._model_client_streaming = model_client_streaming
         self._model_context = model_context
+        self._selector_history_window = selector_history_window
+        self._selector_history_max_chars = selector_history_max_chars
+        self._enable_rule_based_selection = enable_rule_based_selection
+        self._speaker_transitions = speaker_transitions
 
     def _create_group_chat_manager_factory(
         self,
@@ -674,6 +721,10 @@ Read the above conversation. Then select the next role from {participants} to pl
             self._model_context,
             self._model_client_streaming,
             db_manager=self._db_manager,
+            selector_history_window=self._selector_history_window,
+            selector_history_max_chars=self._selector_history_max_chars,
+            enable_rule_based_selection=self._enable_rule_based_selection,
+            speaker_transitions=self._speaker_transitions,
             **kwargs
         )
 
@@ -690,6 +741,10 @@ Read the above conversation. Then select the next role from {participants} to pl
             emit_team_events=self._emit_team_events,
             model_client_streaming=self._model_client_streaming,
             model_context=self._model_context.dump_component() if self._model_context else None,
+            selector_history_window=self._selector_history_window,
+            selector_history_max_chars=self._selector_history_max_chars,
+            enable_rule_based_selection=self._enable_rule_based_selection,
+            speaker_transitions=self._speaker_transitions,
         )
 
     @classmethod
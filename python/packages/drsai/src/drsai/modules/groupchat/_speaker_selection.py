@@ -0,0 +1,127 @@
+import re
+from typing import Dict, List, Optional, Sequence
+
+from autogen_core.models import AssistantMessage, LLMMessage, UserMessage
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, HandoffMessage
+
+
+class SelectorHistory:
+    """Incrementally maintained transcript used in the speaker selection prompt.
+
+    Each message is formatted once when it is added, instead of re-formatting the whole
+    model context on every turn. The rendered transcript can be bounded by a message
+    window and/or a character budget (a cheap proxy for a token budget); the most recent
+    messages are kept.
+
+    Args:
+        max_messages (int, optional): Keep at most this many recent messages. Defaults to None (no limit).
+        max_chars (int, optional): Keep at most this many characters of recent messages. Defaults to None (no limit).
+    """
+
+    def __init__(self, max_messages: Optional[int] = None, max_chars: Optional[int] = None) -> None:
+        self._max_messages = max_messages
+        self._max_chars = max_chars
+        self._entries: List[str] = []
+        self._rendered: Optional[str] = None
+
+    @staticmethod
+    def format_message(message: LLMMessage) -> Optional[str]:
+        """Format one message the same way as `construct_message_history`."""
+        if isinstance(message, UserMessage) or isinstance(message, AssistantMessage):
+            return f"{message.source}: {message.content}".rstrip() + "\n\n"
+        return None
+
+    def append(self, message: LLMMessage) -> None:
+        entry = self.format_message(message)
+        if entry is not None:
+            self._entries.append(entry)
+            self._rendered = None
+
+    def extend(self, messages: Sequence[LLMMessage]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._rendered = None
+
+    def render(self) -> str:
+        if self._rendered is None:
+            entries = self._entries
+            if self._max_messages is not None:
+                entries = entries[-self._max_messages :] if self._max_messages > 0 else []
+            if self._max_chars is not None:
+                kept: List[str] = []
+                total = 0
+                for entry in reversed(entries):
+                    total += len(entry) + 1
+                    if total > self._max_chars and kept:
+                        break
+                    kept.append(entry)
+                entries = list(reversed(kept))
+            self._rendered = "\n".join(entries)
+        return self._rendered
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def mentioned_agents(message_content: str, agent_names: List[str]) -> Dict[str, int]:
+    """Counts the number of times each agent is mentioned in the message content,
+    using the same matching rules as `DrSaiSelectorGroupChatManager._mentioned_agents`."""
+    mentions: Dict[str, int] = dict()
+    for name in agent_names:
+        regex = (
+            r"(?<=\W)("
+            + re.escape(name)
+            + r"|"
+            + re.escape(name.replace("_", " "))
+            + r"|"
+            + re.escape(name.replace("_", r"\_"))
+            + r")(?=\W)"
+        )
+        count = len(re.findall(regex, f" {message_content} "))
+        if count > 0:
+            mentions[name] = count
+    return mentions
+
+
+def rule_based_select(
+    thread: Sequence[BaseAgentEvent | BaseChatMessage],
+    participants: List[str],
+    speaker_transitions: Optional[Dict[str, List[str]]] = None,
+) -> Optional[str]:
+    """Cheap pre-selection of the next speaker without calling the model.
+
+    Rules, in order:
+      1. A handoff to one of the candidates selects its target.
+      2. Allowed transitions from the last speaker (`speaker_transitions`) that leave a single candidate.
+      3. The last message mentions exactly one candidate other than its own source.
+
+    Returns:
+        The selected speaker, or None if the situation is ambiguous and the model should decide.
+    """
+    last_message: Optional[BaseChatMessage] = None
+    for message in reversed(thread):
+        if isinstance(message, BaseChatMessage):
+            last_message = message
+            break
+    if last_message is None:
+        return None
+
+    if isinstance(last_message, HandoffMessage) and last_message.target in participants:
+        return last_message.target
+
+    candidates = participants
+    if speaker_transitions and last_message.source in speaker_transitions:
+        allowed = [p for p in speaker_transitions[last_message.source] if p in participants]
+        if len(allowed) == 1:
+            return allowed[0]
+        if allowed:
+            candidates = allowed
+
+    others = [p for p in candidates if p != last_message.source]
+    mentions = mentioned_agents(last_message.to_text(), others)
+    if len(mentions) == 1:
+        return next(iter(mentions))
+    return None
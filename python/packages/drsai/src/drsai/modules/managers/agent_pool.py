@@ -0,0 +1,230 @@
+"""
+有界的智能体实例池：按LRU和空闲超时淘汰智能体实例，淘汰时通过回调保存状态
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+logger = logger.bind(name="agent_pool.py")
+
+
+@dataclass
+class AgentPoolEntry:
+    agent: Any
+    user_id: Optional[str] = None
+    last_used: float = field(default_factory=time.monotonic)
+    pinned: int = 0  # 正在运行的请求数，>0时不会被淘汰
+
+
+EvictCallback = Callable[[str, AgentPoolEntry], Awaitable[None]]
+
+
+class AgentPool:
+    """
+    以thread_id为键的智能体实例池，替代原先无限增长的dict。
+    - max_size: 常驻内存的最大智能体数量，None表示不限制
+    - idle_ttl: 空闲超时(秒)，超过该时间未被使用的智能体会被淘汰，None表示不超时
+    - on_evict: 淘汰回调，用于在释放实例前save_state()并持久化到数据库
+    被淘汰的智能体在下次请求时通过DrSai.get_agent_and_thread的加载路径重新创建并load_state。
+    淘汰在后台任务中进行，不阻塞请求；加载前需要await wait_for_spill()，确保正在保存的状态已经写入。
+    on_evict失败时实例放回池中，之后再次尝试淘汰。
+    Usage:
+        pool = AgentPool(max_size=256, idle_ttl=3600, on_evict=spill_fn)
+        await pool.put(thread_id, agent, user_id=user_id)
+        await pool.wait_for_spill(thread_id)
+        agent = pool.get(thread_id)
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = 256,
+        idle_ttl: Optional[float] = 3600,
+        on_evict: Optional[EvictCallback] = None,
+    ) -> None:
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, AgentPoolEntry]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # 正在执行on_evict(保存状态)的实例
+        self._spills: Dict[str, "asyncio.Future[None]"] = {}
+        self._maintenance: Optional["asyncio.Task[None]"] = None
+        self._maintenance_requested = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- 兼容dict的接口 --- #
+    def __contains__(self, thread_id: object) -> bool:
+        return thread_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __getitem__(self, thread_id: str) -> Any:
+        entry = self._entries[thread_id]
+        self._touch(thread_id, entry)
+        return entry.agent
+
+    def __setitem__(self, thread_id: str, agent: Any) -> None:
+        """同步插入，不触发淘汰；淘汰在下一次put/evict_expired时进行"""
+        self._insert(thread_id, agent)
+
+    def get(self, thread_id: str, default: Any = None) -> Any:
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._touch(thread_id, entry)
+        return entry.agent
+
+    def pop(self, thread_id: str, default: Any = None) -> Any:
+        """直接移除实例，不保存状态（用于显式关闭会话）"""
+        entry = self._entries.pop(thread_id, None)
+        return default if entry is None else entry.agent
+
+    def keys(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def clear(self) -> None:
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            self._maintenance = None
+        self._entries.clear()
+
+    # --- 池管理接口 --- #
+    def pin(self, thread_id: str) -> None:
+        """标记智能体正在运行，运行期间不会被淘汰"""
+        entry = self._entries.get(thread_id)
+        if entry is not None:
+            entry.pinned += 1
+            self._touch(thread_id, entry)
+
+    def unpin(self, thread_id: str) -> None:
+        entry = self._entries.get(thread_id)
+        if entry is not None:
+            entry.pinned = max(0, entry.pinned - 1)
+            self._touch(thread_id, entry)
+
+    async def put(
+        self, thread_id: str, agent: Any, user_id: Optional[str] = None, pin: bool = False
+    ) -> None:
+        """插入智能体实例，并在后台按TTL和容量淘汰多余的实例；pin=True时插入后立即标记为运行中"""
+        self._insert(thread_id, agent, user_id)
+        if pin:
+            self._entries[thread_id].pinned += 1
+        self._schedule_maintenance()
+
+    async def wait_for_spill(self, thread_id: str) -> None:
+        """等待该thread_id正在进行的淘汰(保存状态)完成，之后再从检查点加载"""
+        spill = self._spills.get(thread_id)
+        if spill is not None:
+            await asyncio.shield(spill)
+
+    async def evict(self, thread_id: str) -> bool:
+        """淘汰指定的智能体实例：调用on_evict保存状态后从池中移除，保存失败时放回池中"""
+        async with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None or entry.pinned > 0:
+                return False
+            self._entries.pop(thread_id, None)
+            spill: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+            self._spills[thread_id] = spill
+        try:
+            if self.on_evict is not None:
+                await self.on_evict(thread_id, entry)
+        except Exception as e:
+            logger.error(f"Failed to spill agent state of thread `{thread_id}`, keeping it in the pool: {e}")
+            if thread_id not in self._entries:
+                self._entries[thread_id] = entry
+                self._touch(thread_id, entry)
+            return False
+        finally:
+            del self._spills[thread_id]
+            spill.set_result(None)
+        self.evictions += 1
+        return True
+
+    async def evict_expired(self) -> int:
+        """淘汰所有空闲超时的实例，返回淘汰的数量"""
+        if self.idle_ttl is None:
+            return 0
+        now = time.monotonic()
+        expired = [
+            thread_id
+            for thread_id, entry in self._entries.items()
+            if entry.pinned == 0 and now - entry.last_used > self.idle_ttl
+        ]
+        count = 0
+        for thread_id in expired:
+            if await self.evict(thread_id):
+                count += 1
+        return count
+
+    async def evict_all(self) -> None:
+        """淘汰所有未在运行的实例（用于关闭服务前持久化状态）"""
+        maintenance, self._maintenance = self._maintenance, None
+        if maintenance is not None:
+            await maintenance
+        for thread_id in list(self._entries.keys()):
+            await self.evict(thread_id)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "idle_ttl": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "spilling": len(self._spills),
+        }
+
+    # --- 内部方法 --- #
+    def _touch(self, thread_id: str, entry: AgentPoolEntry) -> None:
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(thread_id)
+
+    def _insert(self, thread_id: str, agent: Any, user_id: Optional[str] = None) -> None:
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            entry = AgentPoolEntry(agent=agent, user_id=user_id)
+            self._entries[thread_id] = entry
+        else:
+            entry.agent = agent
+            if user_id is not None:
+                entry.user_id = user_id
+        self._touch(thread_id, entry)
+
+    def _schedule_maintenance(self) -> None:
+        """在后台任务中淘汰超时和超出容量的实例，已有任务在运行时由它再检查一轮"""
+        self._maintenance_requested = True
+        if self._maintenance is not None and not self._maintenance.done():
+            return
+        self._maintenance = asyncio.get_running_loop().create_task(self._maintain())
+
+    async def _maintain(self) -> None:
+        while self._maintenance_requested:
+            self._maintenance_requested = False
+            try:
+                await self.evict_expired()
+                await self._evict_overflow()
+            except Exception as e:
+                logger.error(f"Agent pool eviction failed: {e}")
+
+    async def _evict_overflow(self) -> None:
+        if self.max_size is None:
+            return
+        # 按LRU顺序淘汰，跳过正在运行的实例
+        for thread_id in list(self._entries.keys()):
+            if len(self._entries) <= self.max_size:
+                break
+            await self.evict(thread_id)
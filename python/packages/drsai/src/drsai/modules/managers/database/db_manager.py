@@ -1,10 +1,14 @@
+import asyncio
+import functools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, List, Optional, Union, Dict
+from typing import Any, Callable, List, Optional, TypeVar, Union, Dict
 
 from loguru import logger
-from sqlalchemy import exc, inspect, text
+from pydantic_core import to_jsonable_python
+from sqlalchemy import delete as sa_delete, exc, func, inspect, text
 from sqlmodel import Session, SQLModel, and_, create_engine, select
 
 from ..datamodel import DatabaseModel, Response, AgentJson
@@ -12,10 +16,19 @@ from .schema_manager import SchemaManager
 
 from drsai.configs import CONST
 
+T = TypeVar("T")
+
 class DatabaseManager:
     _init_lock = threading.Lock()
 
-    def __init__(self, engine_uri: str, base_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        engine_uri: str,
+        base_dir: Optional[Path] = None,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        max_workers: int = 8,
+    ):
         """
         Initialize DatabaseManager with database connection settings.
         Does not perform any database operations.
@@ -23,8 +36,15 @@ class DatabaseManager:
         Args:
             engine_uri (str): Database connection URI (e.g. sqlite:///db.sqlite3)
             base_dir (Path, optional): Base directory for migration files. If None, uses current directory. Default: None.
+            pool_size (int, optional): Number of pooled connections kept open (ignored for SQLite). Default: 10.
+            max_overflow (int, optional): Connections allowed beyond pool_size under load (ignored for SQLite). Default: 20.
+            max_workers (int, optional): Size of the executor running the async `a_*` methods. Default: 8.
         """
-        connection_args = {"check_same_thread": True} if "sqlite" in engine_uri else {}
+        # Pooled connections are shared by the executor threads, so SQLite must allow cross-thread use
+        connection_args = {"check_same_thread": False} if "sqlite" in engine_uri else {}
+        engine_args: Dict[str, Any] = {"pool_pre_ping": True}
+        if "sqlite" not in engine_uri:
+            engine_args.update(pool_size=pool_size, max_overflow=max_overflow)
 
         # check if base_dir is valid
         if base_dir is None:
@@ -38,7 +58,11 @@ class DatabaseManager:
             print(f"Created database directory at: {base_dir.absolute()}")
 
 
-        self.engine = create_engine(engine_uri, connect_args=connection_args)
+        self.engine = create_engine(engine_uri, connect_args=connection_args, **engine_args)
+        # Bounded executor so that async callers never block the event loop on a DB round-trip
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="drsai-db"
+        )
         self.schema_manager = SchemaManager(
             engine=self.engine,
             base_dir=base_dir,
@@ -257,6 +281,128 @@ class DatabaseManager:
 
             return Response(message=status_message, status=status, data=result)
 
+    @staticmethod
+    def _conditions(
+        model_class: type[SQLModel], filters: dict[str, Any] | None
+    ) -> List[Any]:
+        """Equality conditions for the filters; list/tuple/set values match any of their items"""
+        conditions: List[Any] = []
+        for col, value in (filters or {}).items():
+            column = getattr(model_class, col)
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(column.in_(list(value)))
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    def query(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        columns: Optional[List[str]] = None,
+        return_json: bool = False,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Response:
+        """List entities with column projection and pagination
+
+        Rows are ordered by id (insertion order) rather than created_at, so that keyset
+        pagination with `after_id` is stable.
+
+        Args:
+            model_class (type[DatabaseModel]): The table to query
+            filters (dict[str, Any], optional): Column filters like `get`; a list/tuple/set value matches any of its items. Default: None.
+            columns (List[str], optional): Only load these columns (`id` is always included) and return each row as a dict. Default: None loads whole rows.
+            return_json (bool, optional): Return JSON-serializable dicts instead of SQLModel instances/raw values. Default: False.
+            order (str, optional): "asc" or "desc" by id. Default: "desc".
+            limit (int, optional): Maximum number of rows. Default: None.
+            offset (int, optional): Number of rows to skip. Default: 0.
+            after_id (int, optional): Keyset cursor, the id of the last row of the previous page. Default: None.
+
+        Returns:
+            Response: Contains status, message and the list of rows as data
+        """
+        with Session(self.engine) as session:
+            result: List[Any] = []
+            status = True
+            status_message = ""
+
+            try:
+                id_column = getattr(model_class, "id")
+                names: List[str] = []
+                if columns:
+                    names = ["id"] + [name for name in columns if name != "id"]
+                    statement = select(*[getattr(model_class, name) for name in names])
+                else:
+                    statement = select(model_class)
+                conditions = self._conditions(model_class, filters)
+                if after_id is not None:
+                    conditions.append(
+                        id_column < after_id if order == "desc" else id_column > after_id
+                    )
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                statement = statement.order_by(getattr(id_column, order)())
+                if offset:
+                    statement = statement.offset(offset)
+                if limit is not None:
+                    statement = statement.limit(limit)
+
+                rows = session.exec(statement).all()
+                if columns:
+                    # A single selected column comes back as scalars
+                    result = [
+                        dict(zip(names, (row,) if len(names) == 1 else row))
+                        for row in rows
+                    ]
+                    if return_json:
+                        result = to_jsonable_python(result)
+                else:
+                    result = [
+                        row.model_dump(mode="json") if return_json else row
+                        for row in rows
+                    ]
+                status_message = f"{model_class.__name__} Retrieved Successfully"
+            except Exception as e:
+                session.rollback()
+                status = False
+                status_message = f"Error while fetching {model_class.__name__}"
+                logger.error(
+                    "Error while querying items: "
+                    + str(model_class.__name__)
+                    + " "
+                    + str(e)
+                )
+
+            return Response(message=status_message, status=status, data=result)
+
+    def count(
+        self, model_class: type[DatabaseModel], filters: dict[str, Any] | None = None
+    ) -> Response:
+        """Count entities matching the filters (same filter syntax as `query`)"""
+        with Session(self.engine) as session:
+            try:
+                statement = select(func.count()).select_from(model_class)
+                conditions = self._conditions(model_class, filters)
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                total = session.exec(statement).one()
+                return Response(
+                    message=f"{model_class.__name__} Counted Successfully",
+                    status=True,
+                    data=total,
+                )
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error while counting {model_class.__name__}: {e}")
+                return Response(
+                    message=f"Error while counting {model_class.__name__}",
+                    status=False,
+                    data=0,
+                )
+
     def delete(
         self, model_class: type[SQLModel], filters: dict[str, Any] | None = None
     ) -> Response:
@@ -300,7 +446,117 @@ class DatabaseManager:
                 logger.error(status_message)
 
         return Response(message=status_message, status=status, data=None)
+
+    def bulk_delete(
+        self,
+        model_class: type[SQLModel],
+        filters: dict[str, Any] | None = None,
+        before_id: Optional[int] = None,
+    ) -> Response:
+        """Delete all rows matching the filters with a single DELETE statement
+
+        Unlike `delete`, rows are not loaded and ORM cascades do not run, so this is meant
+        for append-only tables such as the checkpoint logs.
+
+        Args:
+            model_class (type[SQLModel]): The table to delete from
+            filters (dict[str, Any], optional): Column filters like `query`. Default: None.
+            before_id (int, optional): Only delete rows whose id is smaller. Default: None.
+
+        Returns:
+            Response: Contains status, message and the number of deleted rows as data
+        """
+        with Session(self.engine) as session:
+            try:
+                conditions = self._conditions(model_class, filters)
+                if before_id is not None:
+                    conditions.append(getattr(model_class, "id") < before_id)
+                statement = sa_delete(model_class)
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                deleted = session.execute(statement).rowcount
+                session.commit()
+                return Response(
+                    message=f"{model_class.__name__} Deleted Successfully",
+                    status=True,
+                    data=deleted,
+                )
+            except Exception as e:
+                session.rollback()
+                status_message = f"Error while deleting: {e}"
+                logger.error(status_message)
+                return Response(message=status_message, status=False, data=0)
     
+    async def _run_in_executor(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking database call in the bounded executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def a_upsert(self, model: DatabaseModel, return_json: bool = True) -> Response:
+        """Async variant of `upsert`, executed off the event loop"""
+        return await self._run_in_executor(self.upsert, model, return_json=return_json)
+
+    async def a_get(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        return_json: bool = False,
+        order: str = "desc",
+    ) -> Response:
+        """Async variant of `get`, executed off the event loop"""
+        return await self._run_in_executor(
+            self.get, model_class, filters=filters, return_json=return_json, order=order
+        )
+
+    async def a_query(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        columns: Optional[List[str]] = None,
+        return_json: bool = False,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Response:
+        """Async variant of `query`, executed off the event loop"""
+        return await self._run_in_executor(
+            self.query,
+            model_class,
+            filters=filters,
+            columns=columns,
+            return_json=return_json,
+            order=order,
+            limit=limit,
+            offset=offset,
+            after_id=after_id,
+        )
+
+    async def a_count(
+        self, model_class: type[DatabaseModel], filters: dict[str, Any] | None = None
+    ) -> Response:
+        """Async variant of `count`, executed off the event loop"""
+        return await self._run_in_executor(self.count, model_class, filters=filters)
+
+    async def a_delete(
+        self, model_class: type[SQLModel], filters: dict[str, Any] | None = None
+    ) -> Response:
+        """Async variant of `delete`, executed off the event loop"""
+        return await self._run_in_executor(self.delete, model_class, filters=filters)
+
+    async def a_bulk_delete(
+        self,
+        model_class: type[SQLModel],
+        filters: dict[str, Any] | None = None,
+        before_id: Optional[int] = None,
+    ) -> Response:
+        """Async variant of `bulk_delete`, executed off the event loop"""
+        return await self._run_in_executor(
+            self.bulk_delete, model_class, filters=filters, before_id=before_id
+        )
+
     # TODO: 重启后端的智能体和多智能体系统应用
 
     # async def import_team(
@@ -404,7 +660,8 @@ class DatabaseManager:
         """Close database connections and cleanup resources"""
         logger.info("Closing database connections...")
         try:
-            # Dispose of the SQLAlchemy engine
+            # Wait for in-flight async calls off the event loop, then dispose of the SQLAlchemy engine
+            await asyncio.to_thread(self._executor.shutdown, True)
             self.engine.dispose()
             logger.info("Database connections closed successfully")
         except Exception as e:
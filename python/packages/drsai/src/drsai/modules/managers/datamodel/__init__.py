@@ -5,6 +5,7 @@ from .db import (
     Tasks,
     PlanCheck,
     Thread,
+    ThreadCheckpoint,
     AgentJson,
     DatabaseModel,
 )
@@ -21,6 +22,7 @@ __all__ = [
     "Tasks",
     "PlanCheck",
     "Thread",
+    "ThreadCheckpoint",
     "AgentJson",
     "DatabaseModel",
     "Response",
@@ -6,7 +6,7 @@ from typing import Any, List, Optional, Union, Dict
 
 from autogen_core import ComponentModel
 from pydantic import field_serializer
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlmodel import JSON, Column, DateTime, Field, SQLModel, func
 
 from .types import (
@@ -57,7 +57,10 @@ class AutoGenMessage(SQLModel, table=True):
             return value.isoformat()
 
 class UserInput(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_userinput_user_id_thread_id", "user_id", "thread_id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -188,7 +191,10 @@ class PlanCheck(SQLModel, table=True):
             return value.isoformat()
         
 class Thread(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_thread_user_id_thread_id", "user_id", "thread_id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -242,6 +248,29 @@ class Thread(SQLModel, table=True):
         if isinstance(value, datetime):
             return value.isoformat()
 
+class ThreadCheckpoint(SQLModel, table=True):
+    """Thread状态的增量检查点日志，见drsai.utils.state_checkpoint.CheckpointLog"""
+    __table_args__ = {"sqlite_autoincrement": True}
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )  # pylint: disable=not-callable
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column=Column(DateTime(timezone=True), onupdate=func.now()),
+    )  # pylint: disable=not-callable
+    user_id: Optional[str] = Field(default=None, index=True)
+    thread_id: Optional[str] = Field(default=None, index=True)
+    # True: data是完整状态；False: data是相对上一个检查点的增量
+    is_snapshot: bool = False
+    # compress_state()格式
+    data: str = ""
+
+    @field_serializer("created_at", "updated_at")
+    def serialize_datetime(cls, value: datetime) -> str:
+        if isinstance(value, datetime):
+            return value.isoformat()
+
 class AgentJson(SQLModel, table=True):
     __table_args__ = {"sqlite_autoincrement": True}
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -346,4 +375,4 @@ class InputType(str, Enum):
 
 ##
 
-DatabaseModel = AutoGenMessage | UserInput | SingleTask | Tasks | PlanCheck | Thread | AgentJson
+DatabaseModel = AutoGenMessage | UserInput | SingleTask | Tasks | PlanCheck | Thread | ThreadCheckpoint | AgentJson
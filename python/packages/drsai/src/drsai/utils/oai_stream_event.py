@@ -1,3 +1,10 @@
+import asyncio
+import copy
+import json
+import time
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from autogen_agentchat.messages import ModelClientStreamingChunkEvent
 from openai.types.chat.chat_completion import ChatCompletion, Choice
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk, ChoiceDelta
 from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
@@ -62,3 +69,269 @@ chatcompletions = {
 def split_string(s, n):
     return [s[i:i+n] for i in range(0, len(s), n)]
 
+
+# orjson为可选依赖(pip install drsai[speedups])，未安装时回退到标准库json
+try:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(data: str | bytes) -> Any:
+        return orjson.loads(data)
+except ImportError:
+    orjson = None
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj)
+
+    def loads(data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+class SSEChunkEncoder:
+    """
+    预编译的chat.completion.chunk编码器。
+    模板只在初始化时序列化一次，并在id/created/content/role处切分，
+    每个token只需序列化content字符串并拼接，避免对整个模板deepcopy和json.dumps。
+    Usage:
+        encoder = SSEChunkEncoder()
+        yield encoder.encode_content("hello")
+        yield encoder.encode_delta(tool_calls=[...], role="assistant")
+        yield encoder.encode_end()
+    """
+
+    _SPLICE_FIELDS = ("id", "created", "content", "role")
+
+    def __init__(
+        self,
+        template: Dict[str, Any] = chatcompletionchunk,
+        end_template: Dict[str, Any] = chatcompletionchunkend,
+        chunk_id: Optional[str] = None,
+    ) -> None:
+        self.template = template
+        self.end_template = end_template
+        self.chunk_id = chunk_id or template["id"]
+
+        # 用占位符序列化一次模板，按占位符出现的顺序切分
+        markers = {name: f"__drsai_splice_{name}__" for name in self._SPLICE_FIELDS}
+        compiled = copy.deepcopy(template)
+        compiled["id"] = markers["id"]
+        compiled["created"] = markers["created"]
+        compiled["choices"][0]["delta"]["content"] = markers["content"]
+        compiled["choices"][0]["delta"]["role"] = markers["role"]
+        text = dumps(compiled)
+        positions = sorted((text.index(f'"{marker}"'), name) for name, marker in markers.items())
+        self._parts: List[str] = []
+        self._order: List[str] = []
+        cursor = 0
+        for index, name in positions:
+            self._parts.append(text[cursor:index])
+            self._order.append(name)
+            cursor = index + len(markers[name]) + 2
+        self._parts.append(text[cursor:])
+        self._encoded_id = dumps(self.chunk_id)
+
+    def encode_content(self, content: str, role: Optional[str] = "assistant", created: Optional[int] = None) -> str:
+        """编码只包含content/role的增量chunk，返回完整的SSE帧"""
+        values = {
+            "id": self._encoded_id,
+            "created": str(int(time.time()) if created is None else created),
+            "content": dumps(content),
+            "role": dumps(role),
+        }
+        parts = self._parts
+        frame = ["data: "]
+        for i, name in enumerate(self._order):
+            frame.append(parts[i])
+            frame.append(values[name])
+        frame.append(parts[-1])
+        frame.append("\n\n")
+        return "".join(frame)
+
+    def encode_delta(self, created: Optional[int] = None, **delta: Any) -> str:
+        """编码任意delta字段(如tool_calls)的chunk，走通用序列化路径"""
+        chunk = dict(self.template)
+        chunk["id"] = self.chunk_id
+        chunk["created"] = int(time.time()) if created is None else created
+        choice = dict(self.template["choices"][0])
+        choice["delta"] = {**self.template["choices"][0]["delta"], **delta}
+        chunk["choices"] = [choice]
+        return f"data: {dumps(chunk)}\n\n"
+
+    def encode_end(self, created: Optional[int] = None) -> str:
+        """编码最后一个finish_reason为stop的chunk"""
+        chunk = dict(self.end_template)
+        chunk["id"] = self.chunk_id
+        chunk["created"] = int(time.time()) if created is None else created
+        return f"data: {dumps(chunk)}\n\n"
+
+
+async def coalesce_streaming_chunks(
+    stream: AsyncIterator[Any],
+    window: float,
+) -> AsyncGenerator[Any, None]:
+    """
+    合并window秒内到达的、来自同一source的连续ModelClientStreamingChunkEvent，
+    减少SSE帧数量(系统调用和代理开销)。其他消息原样透传，且会先输出已合并的chunk以保持顺序。
+    window<=0时不做合并。消费方提前停止或被取消时会aclose()被包装的流。
+    """
+    if window <= 0:
+        try:
+            async for message in stream:
+                yield message
+        finally:
+            await _aclose(stream)
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = stream.__aiter__()
+    next_task: Optional[asyncio.Future] = None
+    pending: Optional[ModelClientStreamingChunkEvent] = None
+    pending_parts: List[str] = []
+    deadline = 0.0
+
+    def take_pending() -> ModelClientStreamingChunkEvent:
+        nonlocal pending
+        merged = pending
+        if len(pending_parts) > 1:
+            merged = pending.model_copy(update={"content": "".join(pending_parts)})
+        pending = None
+        pending_parts.clear()
+        return merged
+
+    try:
+        while True:
+            if next_task is None:
+                next_task = asyncio.ensure_future(iterator.__anext__())
+            if pending is not None:
+                # 等待下一条消息，但不超过合并窗口
+                done, _ = await asyncio.wait({next_task}, timeout=max(deadline - loop.time(), 0))
+                if not done:
+                    yield take_pending()
+                    continue
+            try:
+                message = await next_task
+            except StopAsyncIteration:
+                break
+            finally:
+                next_task = None
+
+            if isinstance(message, ModelClientStreamingChunkEvent):
+                if pending is not None and pending.source == message.source:
+                    pending_parts.append(message.content)
+                    if loop.time() >= deadline:
+                        yield take_pending()
+                    continue
+                if pending is not None:
+                    yield take_pending()
+                pending = message
+                pending_parts.append(message.content)
+                deadline = loop.time() + window
+                continue
+
+            if pending is not None:
+                yield take_pending()
+            yield message
+
+        if pending is not None:
+            yield take_pending()
+    finally:
+        if next_task is not None and not next_task.done():
+            next_task.cancel()
+            # 流在__anext__返回之前不能aclose
+            try:
+                await next_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await _aclose(stream)
+
+
+async def _aclose(stream: AsyncIterator[Any]) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class SSEDecoder:
+    """
+    增量的SSE(text/event-stream)解码器，供RemoteAgent等HTTP流式智能体共用。
+    数据追加到bytearray中，只从上次扫描的位置继续查找换行，每次feed只压缩一次缓冲区，
+    总开销与响应长度成线性关系。多行data:按规范用\n拼接，遇到空行时产出一个事件。
+    Usage:
+        decoder = SSEDecoder()
+        async for chunk in response.content.iter_any():
+            for data in decoder.feed(chunk):
+                if data == SSEDecoder.DONE:
+                    break
+                oai_json = loads(data)
+    """
+
+    DONE = "[DONE]"
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan_from = 0
+        self._data_lines: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """追加一段字节流，返回已完整接收的事件的data内容"""
+        self._buffer += chunk
+        events: List[str] = []
+        buffer = self._buffer
+        view = memoryview(buffer)
+        start = 0
+        try:
+            while True:
+                end = buffer.find(b"\n", self._scan_from)
+                if end < 0:
+                    break
+                line_end = end - 1 if end > start and buffer[end - 1] == 0x0D else end  # 兼容\r\n
+                self._process_line(view[start:line_end], events)
+                start = end + 1
+                self._scan_from = start
+        finally:
+            view.release()
+        if start:
+            del buffer[:start]
+        self._scan_from = len(buffer)
+        return events
+
+    def flush(self) -> List[str]:
+        """流结束时处理剩余的不完整行和未以空行结束的事件"""
+        events: List[str] = []
+        if self._buffer:
+            self._process_line(memoryview(bytes(self._buffer)), events)
+            self._buffer.clear()
+            self._scan_from = 0
+        self._dispatch(events)
+        return events
+
+    def _process_line(self, line: memoryview, events: List[str]) -> None:
+        if not line:
+            self._dispatch(events)
+            return
+        if line[:5] != b"data:":
+            # 注释(:开头)以及event/id/retry等字段在这里不需要
+            return
+        payload = line[6:] if line[5:6] == b" " else line[5:]
+        self._data_lines.append(bytes(payload).decode("utf-8"))
+
+    def _dispatch(self, events: List[str]) -> None:
+        if self._data_lines:
+            events.append("\n".join(self._data_lines))
+            self._data_lines = []
+
+
+async def iter_sse_data(chunks: AsyncIterable[bytes]) -> AsyncGenerator[str, None]:
+    """将字节流解码为SSE事件的data内容，收到[DONE]时结束"""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for data in decoder.feed(chunk):
+            if data == SSEDecoder.DONE:
+                return
+            yield data
+    for data in decoder.flush():
+        if data == SSEDecoder.DONE:
+            return
+        yield data
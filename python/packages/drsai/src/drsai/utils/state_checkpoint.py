@@ -0,0 +1,244 @@
+"""
+增量(delta)状态检查点：以追加日志的方式保存智能体/团队的save_state()结果。
+
+每个检查点只记录相对于上一个检查点变化的子状态(字典键)和新增的消息(列表追加)，
+每隔若干个增量写一次完整快照，写快照后删除更早的记录(压缩)。每条记录的data都是
+compress_state()格式，可以直接用decompress_state()解开；恢复时只需读取最近的快照和其后的增量。
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .utils import compress_state, decompress_state
+
+# 增量操作的键
+_REPLACE = "="   # {"=": value}                  整体替换
+_PATCH = "{"     # {"{": {key: op}, "-": [keys]}  字典：逐键修改/删除
+_DELETE = "-"
+_APPEND = "+"    # {"+": [items], "n": prefix}    列表：保留前n个元素后追加
+
+
+def diff_state(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """
+    计算从old到new的增量，没有变化时返回None。
+    字典按键递归比较，列表按公共前缀 + 追加处理，其余情况整体替换。
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed: Dict[str, Any] = {}
+        for key, value in new.items():
+            if key not in old:
+                changed[key] = {_REPLACE: value}
+                continue
+            op = diff_state(old[key], value)
+            if op is not None:
+                changed[key] = op
+        removed = [key for key in old if key not in new]
+        if not changed and not removed:
+            return None
+        delta: Dict[str, Any] = {_PATCH: changed}
+        if removed:
+            delta[_DELETE] = removed
+        return delta
+    if isinstance(old, list) and isinstance(new, list):
+        prefix = 0
+        for old_item, new_item in zip(old, new):
+            if old_item != new_item:
+                break
+            prefix += 1
+        if prefix == len(old) == len(new):
+            return None
+        if prefix == 0:
+            return {_REPLACE: new}
+        return {_APPEND: new[prefix:], "n": prefix}
+    if type(old) is type(new) and old == new:
+        return None
+    return {_REPLACE: new}
+
+
+def apply_delta(base: Any, delta: Dict[str, Any]) -> Any:
+    """把diff_state()得到的增量应用到base上，返回新状态(只复制被修改的容器，base不会被修改)"""
+    if _REPLACE in delta:
+        return delta[_REPLACE]
+    if _APPEND in delta:
+        return list(base[: delta["n"]]) + list(delta[_APPEND])
+    result = dict(base)
+    for key in delta.get(_DELETE, []):
+        result.pop(key, None)
+    for key, op in delta[_PATCH].items():
+        result[key] = apply_delta(result[key], op) if key in result else op.get(_REPLACE)
+    return result
+
+
+def reconstruct_state(entries: Sequence[Tuple[bool, str]]) -> Optional[Dict[str, Any]]:
+    """
+    从按写入顺序排列的(is_snapshot, data)记录恢复状态：从最后一个快照开始依次应用其后的增量。
+    没有快照时返回None。
+    """
+    start = None
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index][0]:
+            start = index
+            break
+    if start is None:
+        return None
+    state = decompress_state(entries[start][1])
+    for _, data in entries[start + 1 :]:
+        state = apply_delta(state, decompress_state(data))
+    return state
+
+
+class _LogHead:
+    """某个日志键最近一次写入的状态，用于计算下一个增量"""
+
+    def __init__(self, state: Dict[str, Any], snapshot_size: int, last_id: int) -> None:
+        self.state = state
+        # 最后一条记录的id，与数据库不一致说明有其他进程写入过该日志键
+        self.last_id = last_id
+        self.snapshot_size = snapshot_size
+        self.deltas = 0
+        self.delta_size = 0
+
+
+class CheckpointLog:
+    """
+    基于数据库表的追加式检查点日志，DrSai的Thread状态和UI后端的Run状态共用。
+
+    表模型需要有自增主键id、布尔字段is_snapshot、字符串字段data，以及作为日志键的字段(如thread_id/run_id)，
+    日志键以filters字典传入。方法都是同步的数据库调用，在异步代码中请用asyncio.to_thread调用。
+    多个进程可以写同一个日志键：写增量前会确认日志的最后一条记录仍是本进程写入的，否则改写完整快照。
+    Args:
+        db_manager: 提供get/query/upsert/bulk_delete/delete的DatabaseManager
+        model_class: 检查点表模型，如ThreadCheckpoint/RunCheckpoint
+        snapshot_interval (int): 每隔多少个增量写一次完整快照。默认: 20
+        snapshot_ratio (float): 累计增量大小超过快照大小的该比例时提前写快照，保证恢复代价有界。默认: 0.5
+        max_cached (int): 内存中缓存最近状态的日志键数量，未缓存的键下一次写入完整快照。默认: 256
+    """
+
+    def __init__(
+        self,
+        db_manager: Any,
+        model_class: type,
+        snapshot_interval: int = 20,
+        snapshot_ratio: float = 0.5,
+        max_cached: int = 256,
+    ) -> None:
+        self.db_manager = db_manager
+        self.model_class = model_class
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_ratio = snapshot_ratio
+        self.max_cached = max_cached
+        self._heads: "OrderedDict[Tuple[Tuple[str, Any], ...], _LogHead]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(filters: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+        return tuple(sorted(filters.items()))
+
+    def _cache(self, key: Tuple[Tuple[str, Any], ...], head: _LogHead) -> None:
+        self._heads[key] = head
+        self._heads.move_to_end(key)
+        while len(self._heads) > self.max_cached:
+            self._heads.popitem(last=False)
+
+    def _entries(self, filters: Dict[str, Any]) -> List[Any]:
+        response = self.db_manager.get(self.model_class, filters=filters, return_json=False)
+        if not response.status:
+            raise RuntimeError(f"Failed to read checkpoints: {response.message}")
+        return sorted(response.data or [], key=lambda entry: entry.id)
+
+    def _append(self, filters: Dict[str, Any], is_snapshot: bool, data: str) -> Any:
+        response = self.db_manager.upsert(
+            self.model_class(**filters, is_snapshot=is_snapshot, data=data),
+            return_json=False,
+        )
+        if not response.status:
+            raise RuntimeError(f"Failed to write checkpoint: {response.message}")
+        return response.data
+
+    def _delete_before(self, filters: Dict[str, Any], entry_id: int) -> None:
+        response = self.db_manager.bulk_delete(self.model_class, filters=filters, before_id=entry_id)
+        if not response.status:
+            raise RuntimeError(f"Failed to compact checkpoints: {response.message}")
+
+    def _last_id(self, filters: Dict[str, Any], before_id: Optional[int] = None) -> Optional[int]:
+        """日志最后一条记录的id，给出before_id时为该记录之前一条的id"""
+        response = self.db_manager.query(
+            self.model_class, filters=filters, columns=["id"], order="desc", limit=1, after_id=before_id
+        )
+        if not response.status:
+            raise RuntimeError(f"Failed to read checkpoints: {response.message}")
+        return response.data[0]["id"] if response.data else None
+
+    def save(self, filters: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        """
+        追加一个检查点。调用方之后不能再修改传入的state。
+
+        Returns:
+            bool: 是否写入了完整快照(没有变化时不写入任何记录，返回False)
+        """
+        key = self._key(filters)
+        with self._lock:
+            head = self._heads.get(key)
+            if head is not None and self._last_id(filters) != head.last_id:
+                # 其他进程在本进程的缓存之后写入过，缓存的状态不能再作为增量的基准
+                head = None
+            if head is not None:
+                delta = diff_state(head.state, state)
+                if delta is None:
+                    head.state = state
+                    return False
+                data = compress_state(delta)
+                if (
+                    head.deltas + 1 < self.snapshot_interval
+                    and head.delta_size + len(data) < head.snapshot_size * self.snapshot_ratio
+                ):
+                    entry = self._append(filters, False, data)
+                    if self._last_id(filters, before_id=entry.id) == head.last_id:
+                        head.last_id = entry.id
+                        head.state = state
+                        head.deltas += 1
+                        head.delta_size += len(data)
+                        self._heads.move_to_end(key)
+                        return False
+                    # 检查之后仍有其他进程并发写入，该增量的基准不对，紧接着写快照覆盖它
+            # 写快照并压缩日志
+            data = compress_state(state)
+            entry = self._append(filters, True, data)
+            self._delete_before(filters, entry.id)
+            self._cache(key, _LogHead(state, len(data), entry.id))
+            return True
+
+    def load(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取最近的快照和其后的增量恢复状态，没有检查点时返回None"""
+        entries = self._entries(filters)
+        state = reconstruct_state([(entry.is_snapshot, entry.data) for entry in entries])
+        if state is not None:
+            key = self._key(filters)
+            with self._lock:
+                if key not in self._heads:
+                    # 日志中已有的增量也要计入快照间隔
+                    start = max(i for i, entry in enumerate(entries) if entry.is_snapshot)
+                    tail = entries[start:]
+                    head = _LogHead(state, len(tail[0].data), entries[-1].id)
+                    head.deltas = len(tail) - 1
+                    head.delta_size = sum(len(entry.data) for entry in tail[1:])
+                    self._cache(key, head)
+        return state
+
+    def compact(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """把日志重写为一个完整快照，返回当前状态"""
+        state = self.load(filters)
+        if state is None:
+            return None
+        with self._lock:
+            data = compress_state(state)
+            entry = self._append(filters, True, data)
+            self._delete_before(filters, entry.id)
+            self._cache(self._key(filters), _LogHead(state, len(data), entry.id))
+        return state
+
+    def clear(self, filters: Dict[str, Any]) -> None:
+        """删除日志键的全部检查点"""
+        with self._lock:
+            self._heads.pop(self._key(filters), None)
+            self.db_manager.delete(self.model_class, filters=filters)
@@ -8,6 +8,7 @@ from loguru import logger
 import shutil
 from typing import Optional
 import zlib
+import hashlib
 
 
 def construct_task(
@@ -321,3 +322,9 @@ def decompress_state(compressed_state: str) -> Dict[Any, Any]:
     compressed = base64.b64decode(compressed_state.encode("utf-8"))
     decompressed = zlib.decompress(compressed)
     return json.loads(decompressed.decode("utf-8"))
+
+
+def hash_messages(messages: List[Dict[str, Any]]) -> str:
+    """Stable sha256 of an OpenAI-format message list, used to verify a shared history prefix"""
+    canonical = json.dumps(messages, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
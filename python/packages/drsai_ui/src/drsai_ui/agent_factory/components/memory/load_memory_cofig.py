@@ -1,19 +1,59 @@
+import asyncio
 from typing import List, Dict, Callable
 from autogen_core.models import ChatCompletionClient, LLMMessage
 from autogen_core import CancellationToken
+from loguru import logger
 from drsai.modules.components.memory.ragflow_memory import RAGFlowMemory
+from .retrieval_cache import RetrievalCache, normalize_query
+
+
+def _retrieval_options(memory_functions_config: dict) -> tuple[RetrievalCache, float | None, bool]:
+    '''
+    检索的通用选项：
+        cache_ttl: 检索结果缓存时间(秒)，0表示不缓存，默认300
+        cache_size: 缓存的结果数量，默认256
+        timeout: 每次检索的超时时间(秒)，默认30，超时按未检索到内容处理
+        normalize_query: 是否规范化检索语句(合并空白、统一大小写)，默认False
+    '''
+    cache = RetrievalCache(
+        max_entries=memory_functions_config.get("cache_size", 256),
+        ttl=memory_functions_config.get("cache_ttl", 300),
+    )
+    return (
+        cache,
+        memory_functions_config.get("timeout", 30),
+        memory_functions_config.get("normalize_query", False),
+    )
+
 
 def load_hai_rag_memory(memory_functions_config: dict) -> Callable:
     '''
     加载memory_functions
+    HRModel是同步客户端：只在第一次检索时连接一次，检索在线程中执行，不阻塞事件循环
     '''
     worker_name = memory_functions_config.get("worker_name", None)
     api_key = memory_functions_config.get("api_key", None)
     base_url = memory_functions_config.get("base_url", "https://aiapi.ihep.ac.cn/apiv2")
-    rag_config = memory_functions_config.get("rag_config", {})
+    rag_config: dict = memory_functions_config.get("rag_config", {})
+    cache, timeout, normalize = _retrieval_options(memory_functions_config)
     # TODO: 目前只支持last_message
     try:
         from hepai import HRModel
+        model = None
+        connect_lock = asyncio.Lock()
+
+        async def get_model():
+            nonlocal model
+            async with connect_lock:
+                if model is None:
+                    model = await asyncio.to_thread(
+                        HRModel.connect,
+                        name=worker_name,
+                        base_url=base_url,
+                        api_key=api_key
+                        )
+            return model
+
         async def memory_functions(
             memory_messages: List[Dict[str, str]], 
             llm_messages: List[LLMMessage],
@@ -22,17 +62,24 @@ def load_hai_rag_memory(memory_functions_config: dict) -> Callable:
             agent_name: str,
             **kwargs,
             ) -> List[Dict[str, str]]|List[LLMMessage]:
-            model = HRModel.connect(
-                name=worker_name,
-                base_url=base_url,
-                api_key=api_key
-                )
             query = memory_messages[-1]["content"]  # Select the last message of the chat history as the RAG query statement.
-            rag_config.update({"content": query})
-            # 检索结果格式：[{"text": "xxx", "score": 0.5}, {"text": "yyy", "score": 0.3}] 
-            results: List[dict] = model.interface(
-                **rag_config,
-                )
+            if normalize:
+                query = normalize_query(query)
+            key = cache.make_key(query, worker_name, rag_config)
+            results = cache.get(key)
+            if results is None:
+                try:
+                    rag_model = await asyncio.wait_for(get_model(), timeout)
+                    # 检索结果格式：[{"text": "xxx", "score": 0.5}, {"text": "yyy", "score": 0.3}] 
+                    results: List[dict] = await asyncio.wait_for(
+                        asyncio.to_thread(rag_model.interface, **{**rag_config, "content": query}),
+                        timeout,
+                        )
+                except asyncio.TimeoutError:
+                    logger.warning(f"RAG retrieval of `{worker_name}` timed out after {timeout}s")
+                    results = []
+                if results:
+                    cache.put(key, results)
             retrieve_txt = ""
             for index, result in enumerate(results):
                 retrieve_txt += f"Ref {index+1}: \n{result['text']}\n"
@@ -50,9 +97,17 @@ def load_hai_rag_memory(memory_functions_config: dict) -> Callable:
 def load_RAGFlow_memory(memory_functions_config: dict) -> Callable:
     '''
     加载RAGFlow的memory_functions
+    同一个加载结果的所有调用共用一个RAGFlowMemory及其HTTP连接
     '''
-    config: dict = memory_functions_config.get("config", {})
+    config: dict = dict(memory_functions_config.get("config", {}))
+    api_key = config.pop("api_key", None)
+    base_url = config.pop("base_url", "https://aiapi.ihep.ac.cn/apiv2")
+    # 检索语句取自最后一条消息
+    config.pop("question", None)
+    cache, timeout, normalize = _retrieval_options(memory_functions_config)
     try:
+        ragflow_memory = RAGFlowMemory(base_url, api_key)
+
         async def memory_functions(
             memory_messages: List[Dict[str, str]], 
             llm_messages: List[LLMMessage],
@@ -62,10 +117,17 @@ def load_RAGFlow_memory(memory_functions_config: dict) -> Callable:
             **kwargs,
             ) -> List[Dict[str, str]]|List[LLMMessage]:
             
-            api_key = config.pop("api_key", None)
-            base_url = config.pop("base_url", "https://aiapi.ihep.ac.cn/apiv2")
-            ragflow_memory = RAGFlowMemory(base_url, api_key)
-            results = ragflow_memory.retrieve_chunks_by_content(**config)
+            query = memory_messages[-1]["content"]
+            if normalize:
+                query = normalize_query(query)
+            key = cache.make_key(query, config.get("dataset_ids"), config)
+            results = cache.get(key)
+            if results is None:
+                results = await ragflow_memory.a_retrieve_chunks_by_content(
+                    question=query, timeout=timeout, **config
+                    )
+                if results:
+                    cache.put(key, results)
             chunks = results.get("chunks", [])
             retrieve_txt = ""
             for index, result in enumerate(chunks):
@@ -74,6 +136,8 @@ def load_RAGFlow_memory(memory_functions_config: dict) -> Callable:
             last_txt = f"\n\nPlease provide closely related answers based on the reference materials provided below. Ensure that your response is closely integrated with the content of the reference materials to provide appropriate and well-supported answers.\nThe reference materials are: {retrieve_txt}."
             memory_messages[-1]["content"] += last_txt
             return memory_messages
+        # 智能体关闭时(DrSaiAgent.close)释放RAGFlow的HTTP连接
+        memory_functions.close = ragflow_memory.close
         return memory_functions
     except Exception as e:
         raise e
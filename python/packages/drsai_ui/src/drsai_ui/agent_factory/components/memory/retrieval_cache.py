@@ -0,0 +1,60 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    '''
+    检索语句规范化：去掉首尾空白、合并连续空白并统一大小写，使只有格式差异的问题命中同一缓存
+    '''
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+class RetrievalCache:
+    '''
+    RAG检索结果的TTL + LRU缓存，键为(检索语句, 知识库id, 检索参数)
+    Args:
+        max_entries (int): 最多缓存的结果数量，默认256
+        ttl (float): 结果的有效时间(秒)，<=0表示不缓存，默认300
+    '''
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def make_key(query: str, dataset_ids: Any = None, params: Optional[dict] = None) -> str:
+        return json.dumps(
+            [query, dataset_ids, params or {}], sort_keys=True, ensure_ascii=False, default=str
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,277 @@
+"""
+进程内共享的MCP服务会话管理：相同配置的MCP服务(stdio进程或SSE连接)只启动一次，
+工具列表(schema)按服务配置缓存，智能体拿到的工具适配器直接使用共享会话，不再为每个线程/每次调用启动服务。
+"""
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from autogen_core import CancellationToken
+from autogen_ext.tools.mcp import (
+    SseMcpToolAdapter,
+    SseServerParams,
+    StdioMcpToolAdapter,
+    StdioServerParams,
+    create_mcp_server_session,
+)
+from loguru import logger
+from mcp import ClientSession, Tool
+from pydantic import BaseModel
+
+McpServerParams = StdioServerParams | SseServerParams
+
+
+class McpServer:
+    """
+    一个长期运行的MCP服务会话。
+    会话在独立的后台任务中打开并保持(stdio的子进程和SSE连接都绑定在打开它的任务上)，
+    服务退出或健康检查(ping)失败时，下一次使用会自动重启。
+    Args:
+        params (StdioServerParams | SseServerParams): 服务参数
+        max_concurrency (int): 同时进行的工具调用上限
+        health_check_interval (float): 距上次成功调用超过该时间(秒)时先ping一次，<=0表示不检查
+        start_timeout (float): 启动和握手的超时时间(秒)
+    """
+
+    def __init__(
+        self,
+        params: McpServerParams,
+        max_concurrency: int = 8,
+        health_check_interval: float = 60,
+        start_timeout: float = 30,
+    ) -> None:
+        self.params = params
+        self.health_check_interval = health_check_interval
+        self.start_timeout = start_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._start_lock = asyncio.Lock()
+        self._session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._last_ok = 0.0
+        self.restarts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._session is not None and self._task is not None and not self._task.done()
+
+    async def _serve(self, ready: asyncio.Future[ClientSession], stop: asyncio.Event) -> None:
+        try:
+            async with create_mcp_server_session(self.params) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await stop.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+            raise
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP server exited: {e}")
+
+    async def _start(self) -> ClientSession:
+        if self._task is not None:
+            await self._shutdown()
+            self.restarts += 1
+        loop = asyncio.get_running_loop()
+        ready: asyncio.Future[ClientSession] = loop.create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._serve(ready, self._stop))
+        try:
+            self._session = await asyncio.wait_for(ready, self.start_timeout)
+        except BaseException:
+            await self._shutdown()
+            raise
+        self._last_ok = time.monotonic()
+        return self._session
+
+    async def _healthy(self) -> bool:
+        if not self.running:
+            return False
+        if self.health_check_interval <= 0 or time.monotonic() - self._last_ok < self.health_check_interval:
+            return True
+        try:
+            await asyncio.wait_for(self._session.send_ping(), self.start_timeout)  # type: ignore[union-attr]
+        except Exception as e:
+            logger.warning(f"MCP server health check failed, restarting it: {e}")
+            return False
+        self._last_ok = time.monotonic()
+        return True
+
+    async def get_session(self) -> ClientSession:
+        """返回可用的会话，必要时(首次使用、服务已退出、健康检查失败)启动或重启服务"""
+        async with self._start_lock:
+            if await self._healthy():
+                return self._session  # type: ignore[return-value]
+            return await self._start()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        """在并发上限内使用会话"""
+        async with self._semaphore:
+            session = await self.get_session()
+            try:
+                yield session
+            except Exception:
+                # 调用失败时下一次使用前先做健康检查
+                self._last_ok = 0.0
+                raise
+            self._last_ok = time.monotonic()
+
+    async def list_tools(self) -> List[Tool]:
+        async with self.session() as session:
+            return list((await session.list_tools()).tools)
+
+    async def _shutdown(self) -> None:
+        task, self._task, self._session = self._task, None, None
+        if task is None:
+            return
+        if self._stop is not None:
+            self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), 5)
+        except BaseException:
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            await self._shutdown()
+
+
+class _PooledMcpToolMixin:
+    """
+    工具调用走McpServer的共享会话，而不是为每次调用启动服务。
+    会话可能被重启，因此不把固定的session传给McpToolAdapter，而是每次调用时取当前会话交给上游的_run
+    (结果规范化、错误序列化和取消的处理与上游一致)。
+    """
+
+    _server: McpServer
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        kwargs = args.model_dump(exclude_unset=True)
+        async with self._server.session() as session:
+            return await self._run(args=kwargs, cancellation_token=cancellation_token, session=session)  # type: ignore[attr-defined]
+
+
+class PooledStdioMcpToolAdapter(_PooledMcpToolMixin, StdioMcpToolAdapter):
+    def __init__(self, server: McpServer, tool: Tool) -> None:
+        super().__init__(server_params=server.params, tool=tool)
+        self._server = server
+
+
+class PooledSseMcpToolAdapter(_PooledMcpToolMixin, SseMcpToolAdapter):
+    def __init__(self, server: McpServer, tool: Tool) -> None:
+        super().__init__(server_params=server.params, tool=tool)
+        self._server = server
+
+
+class McpSessionManager:
+    """
+    按服务配置共享McpServer并缓存工具schema。
+    会话绑定在事件循环上，因此键中包含事件循环id。
+    Usage:
+        tools = await mcp_session_manager.get_tools(StdioServerParams(command="python3", args=["server.py"]))
+        ...
+        await mcp_session_manager.close_all()
+    """
+
+    def __init__(self) -> None:
+        self._servers: Dict[Tuple[int, str], McpServer] = {}
+        self._tools: Dict[Tuple[int, str], List[Tool]] = {}
+        self._tool_locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        # 多个事件循环(线程)共用这些字典，asyncio.Lock只能在一个循环内使用；临界区内没有await，用线程锁保护
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(params: McpServerParams) -> Tuple[int, str]:
+        config = json.dumps(params.model_dump(mode="json"), sort_keys=True, default=str)
+        return (id(asyncio.get_running_loop()), f"{type(params).__name__}:{config}")
+
+    async def get_server(
+        self,
+        params: McpServerParams,
+        max_concurrency: int = 8,
+        health_check_interval: float = 60,
+    ) -> McpServer:
+        """返回该配置的共享服务(首次调用时创建，实际进程在第一次使用时启动)"""
+        key = self._key(params)
+        with self._lock:
+            server = self._servers.get(key)
+            if server is None:
+                server = McpServer(
+                    params,
+                    max_concurrency=max_concurrency,
+                    health_check_interval=health_check_interval,
+                )
+                self._servers[key] = server
+            return server
+
+    async def get_tools(
+        self,
+        params: McpServerParams,
+        max_concurrency: int = 8,
+        health_check_interval: float = 60,
+    ) -> List[PooledStdioMcpToolAdapter | PooledSseMcpToolAdapter]:
+        """返回使用共享会话的工具适配器，工具列表只在第一次时向服务查询"""
+        server = await self.get_server(params, max_concurrency, health_check_interval)
+        key = self._key(params)
+        # 在该服务的锁内查询和填充，同时到达的首次调用只向服务查询一次，不阻塞其他服务；
+        # 键中包含事件循环id，因此该锁只在一个事件循环内使用
+        with self._lock:
+            tool_lock = self._tool_locks.setdefault(key, asyncio.Lock())
+        async with tool_lock:
+            with self._lock:
+                tools = self._tools.get(key)
+            if tools is None:
+                tools = await server.list_tools()
+                with self._lock:
+                    self._tools[key] = tools
+        adapter_cls = (
+            PooledStdioMcpToolAdapter if isinstance(params, StdioServerParams) else PooledSseMcpToolAdapter
+        )
+        return [adapter_cls(server, tool) for tool in tools]
+
+    def invalidate_tools(self, params: Optional[McpServerParams] = None) -> None:
+        """清除工具schema缓存(服务更新了工具列表时使用)，不传参数时清除全部"""
+        key = None if params is None else self._key(params)
+        with self._lock:
+            if key is None:
+                self._tools.clear()
+            else:
+                self._tools.pop(key, None)
+
+    @property
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            servers = list(self._servers.items())
+        return [
+            {"server": key[1], "running": server.running, "restarts": server.restarts}
+            for key, server in servers
+        ]
+
+    async def close_all(self) -> None:
+        """关闭当前事件循环上的所有服务(用于进程退出前)"""
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            keys = [key for key in self._servers if key[0] == loop_id]
+            servers = [self._servers.pop(key) for key in keys]
+            for key in keys:
+                self._tools.pop(key, None)
+                self._tool_locks.pop(key, None)
+        for server in servers:
+            try:
+                await server.close()
+            except Exception as e:
+                logger.warning(f"Error closing MCP server: {e}")
+
+
+mcp_session_manager = McpSessionManager()
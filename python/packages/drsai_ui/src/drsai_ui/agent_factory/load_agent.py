@@ -31,6 +31,7 @@ from drsai import (
 from .magentic_one.agents.drsai_agents import MagenticAgent
 from .magentic_one.teams.orchestrator import GroupChat as MagenticGroupChat
 from .components.memory.load_memory_cofig import load_memory_function
+from .components.tools.mcp_session_manager import mcp_session_manager
 
 def get_model_client(
         model_client_config: Union[ComponentModel, Dict[str, Any], None],
@@ -56,9 +57,18 @@ async def a_load_mcp_tools(mcp_tools_config: list[dict]) -> list[StdioMcpToolAda
                 event_name: mcp_tools_event
             timeout: 20
             sse_read_timeout: 300
+
+    默认(shared: true)同一配置的MCP服务在进程内只启动一次并共享，工具列表只查询一次；
+    max_concurrency限制对该服务的并发调用数(默认8)，health_check_interval为健康检查间隔(秒，默认60)。
+    shared: false时每次调用工具都单独启动服务。
     '''
     mcp_tools = []
     for mcp_tool_config in mcp_tools_config:
+        shared = mcp_tool_config.get("shared", True)
+        pool_options = {
+            "max_concurrency": mcp_tool_config.get("max_concurrency", 8),
+            "health_check_interval": mcp_tool_config.get("health_check_interval", 60),
+        }
 
         if mcp_tool_config["type"] == "std":
             command = mcp_tool_config.get("command", None)
@@ -66,12 +76,15 @@ async def a_load_mcp_tools(mcp_tools_config: list[dict]) -> list[StdioMcpToolAda
             args = mcp_tool_config.get("args", [])
             env = mcp_tool_config.get("env", None)
             cwd = mcp_tool_config.get("cwd", None)
-            std_tool: list[StdioMcpToolAdapter] = await mcp_server_tools(StdioServerParams(
+            server_params = StdioServerParams(
                                 command=command,
                                 args=args,
                                 env=env,
                                 cwd=cwd)
-                        ) 
+            if shared:
+                std_tool = await mcp_session_manager.get_tools(server_params, **pool_options)
+            else:
+                std_tool: list[StdioMcpToolAdapter] = await mcp_server_tools(server_params)
             mcp_tools.extend(std_tool)
         elif mcp_tool_config["type"] == "sse":
             url = mcp_tool_config.get("url", None)
@@ -79,12 +92,15 @@ async def a_load_mcp_tools(mcp_tools_config: list[dict]) -> list[StdioMcpToolAda
             headers = mcp_tool_config.get("headers", None)
             timeout = mcp_tool_config.get("timeout", 20)
             sse_read_timeout = mcp_tool_config.get("sse_read_timeout", 60 * 5)
-            sse_tool: list[SseMcpToolAdapter] = await mcp_server_tools(SseServerParams(
+            server_params = SseServerParams(
                                 url=url,
                                 headers=headers,
                                 timeout=timeout,
                                 sse_read_timeout=sse_read_timeout)
-                        ) 
+            if shared:
+                sse_tool = await mcp_session_manager.get_tools(server_params, **pool_options)
+            else:
+                sse_tool: list[SseMcpToolAdapter] = await mcp_server_tools(server_params)
             mcp_tools.extend(sse_tool)
         else:
             raise ValueError(f"mcp_tools的type只能是std或sse")
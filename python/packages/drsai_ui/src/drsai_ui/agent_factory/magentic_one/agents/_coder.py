@@ -29,6 +29,7 @@ from autogen_agentchat.state import BaseState
 from autogen_agentchat.messages import (
     BaseAgentEvent,
     BaseChatMessage,
+    ModelClientStreamingChunkEvent,
     TextMessage,
     MessageFactory,
 )
@@ -38,6 +39,7 @@ from autogen_ext.code_executors.docker import DockerCommandLineCodeExecutor
 
 from ....ui_backend.utils import thread_to_context
 from ._utils import exec_command_umask_patched
+from ._kernel_executor import PythonKernelExecutor
 
 from ..approval_guard import BaseApprovalGuard
 from ..guarded_action import ApprovalDeniedError, TrivialGuardedAction
@@ -99,7 +101,7 @@ async def _coding_and_debug(
     cancellation_token: CancellationToken,
     model_context: ChatCompletionContext,
     approval_guard: BaseApprovalGuard | None,
-) -> AsyncGenerator[TextMessage | bool, None]:
+) -> AsyncGenerator[TextMessage | ModelClientStreamingChunkEvent | bool, None]:
     """Write and debug code using the model and executor.
 
     It generates code based on the system prompt and the thread of messages,
@@ -121,6 +123,7 @@ async def _coding_and_debug(
 
     Yields:
         TextMessage: The intermediate messages generated by the model and executor.
+        ModelClientStreamingChunkEvent: Output of a running code block, if the executor can stream it.
         bool: A flag indicating whether any code execution was performed.
 
     Raises:
@@ -196,9 +199,21 @@ async def _coding_and_debug(
                 code_output: str = ""
                 result: CodeResult | None = None
                 try:
-                    result = await code_executor.execute_code_blocks(
-                        [cb], cancellation_token
-                    )
+                    if isinstance(code_executor, PythonKernelExecutor):
+                        async for item in code_executor.execute_code_blocks_stream(
+                            [cb], cancellation_token
+                        ):
+                            if isinstance(item, CodeResult):
+                                result = item
+                            else:
+                                yield ModelClientStreamingChunkEvent(
+                                    source=agent_name + "-executor", content=item
+                                )
+                    else:
+                        result = await code_executor.execute_code_blocks(
+                            [cb], cancellation_token
+                        )
+                    assert result is not None
                     exit_code = result.exit_code or 0
                     code_output = result.output
                 except Exception as e:
@@ -305,6 +320,7 @@ class CoderAgentConfig(BaseModel):
     """
     max_debug_rounds: int = 3
     summarize_output: bool = False
+    use_persistent_kernel: bool = False
     # Optionally add code_executor config if needed
 
 
@@ -367,6 +383,7 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
         bind_dir: Path | str | None = None,
         use_local_executor: bool = False,
         approval_guard: BaseApprovalGuard | None = None,
+        use_persistent_kernel: bool = False,
     ) -> None:
         """Initialize the CoderAgent.
 
@@ -380,6 +397,7 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
             work_dir (Path | str | None, optional): Working directory for code execution. Default: None.
             bind_dir (Path | str | None, optional): Directory to bind for Docker executor. Default: None.
             use_local_executor (bool, optional): Whether to use local instead of Docker executor. Default: False.
+            use_persistent_kernel (bool, optional): Run Python blocks in a persistent kernel (variables and imports survive between blocks and debug rounds, output is streamed) on top of the local/Docker executor. Ignored when a custom code_executor is given. Default: False.
         """
         super().__init__(name, description)
         self._model_client = model_client
@@ -392,6 +410,7 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
         self.is_paused = False
         self._paused = asyncio.Event()
         self._approval_guard = approval_guard
+        self._use_persistent_kernel = use_persistent_kernel
 
         if work_dir is None:
             self._work_dir = Path(tempfile.mkdtemp())
@@ -403,6 +422,10 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
             self._code_executor = code_executor
         elif use_local_executor:
             self._code_executor = LocalCommandLineCodeExecutor(work_dir=self._work_dir)
+            if use_persistent_kernel:
+                self._code_executor = PythonKernelExecutor(
+                    work_dir=self._work_dir, fallback_executor=self._code_executor
+                )
         else:
             name = f"{name}-{uuid.uuid4()}"
             self._code_executor = DockerCommandLineCodeExecutor(
@@ -412,6 +435,13 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
                 bind_dir=bind_dir,
                 delete_tmp_files=True,
             )
+            if use_persistent_kernel:
+                # The kernel runs in the executor's container through `docker exec`
+                self._code_executor = PythonKernelExecutor(
+                    work_dir=self._work_dir,
+                    fallback_executor=self._code_executor,
+                    container_name=name,
+                )
 
     async def lazy_init(self) -> None:
         """Initialize the code executor if it has a start method.
@@ -518,6 +548,10 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
                 if isinstance(msg, bool):
                     executed_code = msg
                     break
+                if isinstance(msg, ModelClientStreamingChunkEvent):
+                    # Streamed execution output, the complete result follows as a message
+                    yield msg
+                    continue
                 inner_messages.append(msg)
                 self._chat_history.append(msg)
                 yield msg
@@ -605,6 +639,7 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
             description=self.description,
             max_debug_rounds=self._max_debug_rounds,
             summarize_output=self._summarize_output,
+            use_persistent_kernel=self._use_persistent_kernel,
             # TODO: Optionally add code_executor configuration if supported
         )
 
@@ -617,6 +652,7 @@ class CoderAgent(BaseChatAgent, Component[CoderAgentConfig]):
             description=config.description,
             max_debug_rounds=config.max_debug_rounds,
             summarize_output=config.summarize_output,
+            use_persistent_kernel=config.use_persistent_kernel,
             # TODO: Optionally load code_executor from config if provided
         )
 
@@ -0,0 +1,486 @@
+import asyncio
+import functools
+import json
+import os
+import shlex
+import signal
+import sys
+import uuid
+import weakref
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from autogen_core import CancellationToken
+from autogen_core.code_executor import CodeBlock, CodeExecutor, CodeResult
+from loguru import logger
+
+PYTHON_LANGUAGES = ("python", "py", "python3")
+
+# Upper bound of a single line read from the kernel
+_STREAM_LIMIT = 2**20
+
+# The kernel: executes cells in one namespace and reports output/completion as framed lines
+# (`<sentinel>{json}`) on stdout. The frames have stdout to themselves: fd 1, which child processes
+# and C extensions write to, is redirected into a pipe that a thread relays as framed stdout messages.
+# Anything on stderr comes from child processes.
+_KERNEL_DRIVER = r"""
+import codecs, json, os, signal, sys, threading, traceback
+
+_sentinel = sys.argv[1]
+_proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+_relay_read, _relay_write = os.pipe()
+os.dup2(_relay_write, 1)
+os.close(_relay_write)
+_requests = sys.stdin
+sys.stdin = open(os.devnull)
+_send_lock = threading.Lock()
+# Written to fd 1 at the end of a cell: everything before it has been relayed once the relay sees it
+_marker = ("\0" + _sentinel + "\0").encode()
+_drained = threading.Event()
+
+
+def _send(message):
+    with _send_lock:
+        _proto.write(_sentinel + json.dumps(message) + "\n")
+        _proto.flush()
+
+
+def _partial_marker(data):
+    # Length of the longest suffix of data that may be the start of a marker split across reads
+    for size in range(min(len(data), len(_marker) - 1), 0, -1):
+        if _marker.startswith(data[-size:]):
+            return size
+    return 0
+
+
+def _relay():
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    pending = b""
+    while True:
+        chunk = os.read(_relay_read, 65536)
+        if not chunk:
+            break
+        pending += chunk
+        while True:
+            index = pending.find(_marker)
+            if index < 0:
+                break
+            text = decoder.decode(pending[:index])
+            if text:
+                _send({"type": "stdout", "text": text})
+            pending = pending[index + len(_marker):]
+            _drained.set()
+        keep = _partial_marker(pending)
+        text = decoder.decode(pending[: len(pending) - keep])
+        if text:
+            _send({"type": "stdout", "text": text})
+        pending = pending[len(pending) - keep:]
+
+
+def _drain_relay():
+    try:
+        sys.__stdout__.flush()
+    except Exception:
+        pass
+    _drained.clear()
+    os.write(1, _marker)
+    _drained.wait(5)
+
+
+class _Stream:
+    encoding = "utf-8"
+
+    def __init__(self, name):
+        self.name = name
+
+    def write(self, text):
+        if text:
+            _send({"type": self.name, "text": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+_running = False
+
+
+def _on_sigint(signum, frame):
+    # Only interrupt user code, never the request loop
+    if _running:
+        raise KeyboardInterrupt
+
+
+signal.signal(signal.SIGINT, _on_sigint)
+threading.Thread(target=_relay, daemon=True).start()
+sys.stdout = _Stream("stdout")
+sys.stderr = _Stream("stderr")
+_namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+_send({"type": "ready", "pid": os.getpid()})
+for _line in _requests:
+    _request = json.loads(_line)
+    _exit_code = 0
+    try:
+        _running = True
+        exec(compile(_request["code"], "<cell-%d>" % _request["id"], "exec"), _namespace)
+    except SystemExit as e:
+        _exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        _type, _value, _tb = sys.exc_info()
+        # Hide the kernel's own frame from the traceback
+        traceback.print_exception(_type, _value, _tb.tb_next)
+        _exit_code = 1
+    finally:
+        _running = False
+    _drain_relay()
+    _send({"type": "done", "id": _request["id"], "exit_code": _exit_code})
+"""
+
+
+class PythonKernelExecutor(CodeExecutor):
+    """A code executor that runs Python blocks in a persistent kernel process.
+
+    Variables, imports and loaded data survive between code blocks and debug rounds, and
+    output is available while a block is still running through `execute_code_blocks_stream`.
+    Cancelling the token interrupts the running block (KeyboardInterrupt) without losing
+    the kernel state; if the block does not stop within the grace period the kernel is
+    killed and restarted on the next block. Other languages (e.g. sh) are delegated to the
+    fallback executor, which also runs Python blocks if the kernel cannot be started.
+
+    Args:
+        work_dir (Path | str): Working directory of the kernel (local kernels only).
+        fallback_executor (CodeExecutor): Executor for non-Python blocks, e.g. `LocalCommandLineCodeExecutor`.
+        timeout (int, optional): Seconds a single block may run before it is interrupted. Default: 60.
+        container_name (str, optional): Run the kernel inside this (running) docker container with
+            `docker exec`, typically the container of a `DockerCommandLineCodeExecutor` fallback. Default: None.
+        python_executable (str, optional): Python used for the kernel. Default: the current interpreter
+            locally, `python3` in a container.
+        interrupt_grace_period (float, optional): Seconds to wait for an interrupted block before killing the kernel. Default: 5.0.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path | str,
+        fallback_executor: CodeExecutor,
+        timeout: int = 60,
+        container_name: Optional[str] = None,
+        python_executable: Optional[str] = None,
+        interrupt_grace_period: float = 5.0,
+    ) -> None:
+        self._work_dir = Path(work_dir)
+        self._fallback = fallback_executor
+        self._timeout = timeout
+        self._container_name = container_name
+        self._python = python_executable or ("python3" if container_name else sys.executable)
+        self._interrupt_grace_period = interrupt_grace_period
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._events: Optional[asyncio.Queue[Dict[str, Any]]] = None
+        self._readers: List[asyncio.Task[None]] = []
+        self._sentinel = ""
+        self._kernel_pid: Optional[int] = None
+        self._cell_id = 0
+        self._lock = asyncio.Lock()
+        self._kernel_failed = False
+        # Interrupt event of the running block per cancellation token; the token callback is added once per token
+        self._interrupt_events: "weakref.WeakKeyDictionary[CancellationToken, asyncio.Event]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def work_dir(self) -> Path:
+        return self._work_dir
+
+    @property
+    def fallback_executor(self) -> CodeExecutor:
+        return self._fallback
+
+    async def start(self) -> None:
+        if hasattr(self._fallback, "start"):
+            await self._fallback.start()  # type: ignore
+
+    async def stop(self) -> None:
+        await self._stop_kernel()
+        await self._fallback.stop()
+
+    async def restart(self) -> None:
+        """Restart the kernel, dropping all variables."""
+        await self._stop_kernel()
+        self._kernel_failed = False
+
+    async def _start_kernel(self) -> None:
+        self._sentinel = f"@@kernel-{uuid.uuid4().hex}@@"
+        kernel = [self._python, "-u", "-c", _KERNEL_DRIVER, self._sentinel]
+        if self._container_name:
+            # umask 000 keeps files written by the kernel usable from the host, like the docker executor
+            command = [
+                "docker", "exec", "-i", self._container_name,
+                "sh", "-c", f"umask 000 && exec {shlex.join(kernel)}",
+            ]
+            cwd = None
+        else:
+            command = kernel
+            cwd = self._work_dir
+        self._process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            limit=_STREAM_LIMIT,
+        )
+        self._events = asyncio.Queue()
+        self._readers = [
+            asyncio.create_task(self._read_stdout(self._process, self._events, self._sentinel)),
+            asyncio.create_task(self._read_stderr(self._process, self._events)),
+        ]
+        # Site hooks or the container may print before the driver is ready; keep it for the error message
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 30
+        startup_output: List[str] = []
+        while True:
+            event = await asyncio.wait_for(self._events.get(), max(0.0, deadline - loop.time()))
+            kind = event.get("type")
+            if kind == "ready":
+                break
+            if kind in ("stdout", "stderr"):
+                startup_output.append(event["text"])
+                logger.debug(f"Python kernel startup {kind}: {event['text'].rstrip()}")
+            elif kind == "exit":
+                raise RuntimeError(
+                    f"Python kernel exited with code {event.get('returncode')} before it was ready: "
+                    + "".join(startup_output)
+                )
+            else:
+                logger.warning(f"Unexpected event from the Python kernel before it was ready: {event}")
+        self._kernel_pid = event["pid"]
+
+    async def _stop_kernel(self) -> None:
+        process, self._process = self._process, None
+        if self._container_name and self._kernel_pid is not None:
+            # Killing the `docker exec` client does not stop the kernel inside the container
+            try:
+                kill = await asyncio.create_subprocess_exec(
+                    "docker", "exec", self._container_name,
+                    "sh", "-c", f"kill -KILL {self._kernel_pid}",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                await kill.wait()
+            except Exception as e:
+                logger.warning(f"Failed to stop the Python kernel: {e}")
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        for reader in self._readers:
+            reader.cancel()
+        self._readers = []
+        self._events = None
+        self._kernel_pid = None
+
+    @staticmethod
+    async def _read_stdout(
+        process: asyncio.subprocess.Process, events: asyncio.Queue[Dict[str, Any]], sentinel: str
+    ) -> None:
+        assert process.stdout is not None
+        while True:
+            try:
+                line = await process.stdout.readline()
+            except ValueError:
+                line = await process.stdout.read(_STREAM_LIMIT)
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace")
+            # Frames normally start a line; anything in front of one is plain output
+            index = text.find(sentinel)
+            if index < 0:
+                await events.put({"type": "stdout", "text": text})
+                continue
+            if index > 0:
+                await events.put({"type": "stdout", "text": text[:index]})
+            await events.put(json.loads(text[index + len(sentinel) :]))
+        await process.wait()
+        await events.put({"type": "exit", "returncode": process.returncode})
+
+    @staticmethod
+    async def _read_stderr(
+        process: asyncio.subprocess.Process, events: asyncio.Queue[Dict[str, Any]]
+    ) -> None:
+        assert process.stderr is not None
+        while True:
+            chunk = await process.stderr.read(4096)
+            if not chunk:
+                break
+            await events.put({"type": "stderr", "text": chunk.decode("utf-8", errors="replace")})
+
+    async def _interrupt(self) -> None:
+        if self._kernel_pid is None:
+            return
+        try:
+            if self._container_name:
+                interrupt = await asyncio.create_subprocess_exec(
+                    "docker", "exec", self._container_name,
+                    "sh", "-c", f"kill -INT {self._kernel_pid}",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                await interrupt.wait()
+            elif os.name == "posix":
+                os.kill(self._kernel_pid, signal.SIGINT)
+            else:
+                await self._stop_kernel()
+        except Exception as e:
+            logger.warning(f"Failed to interrupt the Python kernel: {e}")
+
+    def _on_cancel(self, token_ref: "weakref.ref[CancellationToken]") -> None:
+        token = token_ref()
+        if token is None:
+            return
+        interrupted = self._interrupt_events.get(token)
+        if interrupted is not None:
+            interrupted.set()
+
+    async def _run_python(
+        self, code: str, cancellation_token: CancellationToken
+    ) -> AsyncGenerator[str | CodeResult, None]:
+        if self._process is None or self._process.returncode is not None:
+            await self._stop_kernel()
+            await self._start_kernel()
+        assert self._process is not None and self._process.stdin is not None
+        events = self._events
+        assert events is not None
+
+        self._cell_id += 1
+        cell_id = self._cell_id
+        self._process.stdin.write((json.dumps({"id": cell_id, "code": code}) + "\n").encode("utf-8"))
+        await self._process.stdin.drain()
+
+        loop = asyncio.get_running_loop()
+        interrupted = asyncio.Event()
+        registered = cancellation_token in self._interrupt_events
+        self._interrupt_events[cancellation_token] = interrupted
+        if not registered:
+            cancellation_token.add_callback(functools.partial(self._on_cancel, weakref.ref(cancellation_token)))
+        elif cancellation_token.is_cancelled():
+            interrupted.set()
+        deadline = loop.time() + self._timeout
+        output: List[str] = []
+        timed_out = False
+        interrupt_sent_at: Optional[float] = None
+
+        while True:
+            if interrupted.is_set() and interrupt_sent_at is None:
+                interrupt_sent_at = loop.time()
+                await self._interrupt()
+            if interrupt_sent_at is not None:
+                wait_until = interrupt_sent_at + self._interrupt_grace_period
+            else:
+                wait_until = deadline
+            get_event = asyncio.ensure_future(events.get())
+            waiters = {get_event}
+            if interrupt_sent_at is None:
+                wait_interrupt = asyncio.ensure_future(interrupted.wait())
+                waiters.add(wait_interrupt)
+            done, pending = await asyncio.wait(
+                waiters,
+                timeout=max(0.0, wait_until - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for waiter in pending:
+                if waiter is not get_event:
+                    waiter.cancel()
+            if get_event not in done:
+                get_event.cancel()
+                if interrupted.is_set() and interrupt_sent_at is None:
+                    continue
+                if interrupt_sent_at is None:
+                    # Block timed out: interrupt it and give it the grace period to stop
+                    timed_out = True
+                    interrupted.set()
+                    continue
+                # The block ignored the interrupt, the kernel state is lost
+                await self._stop_kernel()
+                output.append("\nThe Python kernel did not respond to the interrupt and was restarted; previously defined variables are lost.")
+                yield CodeResult(exit_code=124 if timed_out else 1, output="".join(output) + ("\nTimeout" if timed_out else ""))
+                return
+
+            # Batch everything that is already available into one chunk
+            batch = [get_event.result()]
+            while not events.empty():
+                batch.append(events.get_nowait())
+            text = ""
+            for event in batch:
+                kind = event.get("type")
+                if kind in ("stdout", "stderr"):
+                    text += event["text"]
+                elif kind == "done" and event.get("id") == cell_id:
+                    if text:
+                        output.append(text)
+                        yield text
+                    exit_code = int(event.get("exit_code", 1))
+                    if timed_out:
+                        yield CodeResult(exit_code=124, output="".join(output) + "\nTimeout")
+                    else:
+                        yield CodeResult(exit_code=exit_code, output="".join(output))
+                    return
+                elif kind == "exit":
+                    if text:
+                        output.append(text)
+                        yield text
+                    await self._stop_kernel()
+                    output.append(
+                        f"\nThe Python kernel exited unexpectedly (exit code {event.get('returncode')}); previously defined variables are lost."
+                    )
+                    yield CodeResult(exit_code=1, output="".join(output))
+                    return
+            if text:
+                output.append(text)
+                yield text
+
+    async def execute_code_blocks_stream(
+        self, code_blocks: List[CodeBlock], cancellation_token: CancellationToken
+    ) -> AsyncGenerator[str | CodeResult, None]:
+        """Execute code blocks, yielding output chunks as they arrive and finally one `CodeResult`."""
+        async with self._lock:
+            outputs: List[str] = []
+            exit_code = 0
+            for code_block in code_blocks:
+                if cancellation_token.is_cancelled():
+                    break
+                result: Optional[CodeResult] = None
+                if code_block.language.lower() in PYTHON_LANGUAGES and not self._kernel_failed:
+                    try:
+                        async for item in self._run_python(code_block.code, cancellation_token):
+                            if isinstance(item, CodeResult):
+                                result = item
+                            else:
+                                yield item
+                    except (OSError, RuntimeError, asyncio.TimeoutError) as e:
+                        # The kernel cannot run here, use the fallback executor from now on
+                        logger.warning(f"Python kernel unavailable, falling back to {type(self._fallback).__name__}: {e}")
+                        self._kernel_failed = True
+                        await self._stop_kernel()
+                if result is None:
+                    result = await self._fallback.execute_code_blocks([code_block], cancellation_token)
+                    if result.output:
+                        yield result.output
+                outputs.append(result.output)
+                exit_code = result.exit_code
+                if exit_code != 0:
+                    break
+            yield CodeResult(exit_code=exit_code, output="".join(outputs))
+
+    async def execute_code_blocks(
+        self, code_blocks: List[CodeBlock], cancellation_token: CancellationToken
+    ) -> CodeResult:
+        result: Optional[CodeResult] = None
+        async for item in self.execute_code_blocks_stream(code_blocks, cancellation_token):
+            if isinstance(item, CodeResult):
+                result = item
+        assert result is not None
+        return result
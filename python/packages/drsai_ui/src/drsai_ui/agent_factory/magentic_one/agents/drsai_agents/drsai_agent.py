@@ -98,6 +98,7 @@ class MagenticAgent(AssistantAgent):
         
         # Close the model client.
         await self._model_client.close()
+        await self._close_memory_function()
 
     async def pause(self) -> None:
         """Pause the agent by setting the paused state."""
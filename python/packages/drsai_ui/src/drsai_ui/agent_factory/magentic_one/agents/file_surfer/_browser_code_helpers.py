@@ -1,53 +1,56 @@
-import inspect
-from typing import Callable, List, Tuple
-
-
-def _validate_path_impl() -> Callable[[str], None]:
-    """The actual implementation of path validation"""
-    import os
-
-    def validate(path: str) -> None:
-        if path == ".":
-            print("true")
-        else:
-            print(os.path.exists(path))
-
-    return validate
-
-
-def _check_is_dir_impl() -> Callable[[str], None]:
-    """The actual implementation of directory checking"""
-    import os
-
-    def check(path: str) -> None:
-        if path == ".":
-            print("true")
-            return
-        else:
-            print(os.path.isdir(path))
-
-    return check
-
-
-def _convert_file_impl() -> Callable[[str], None]:
-    """The actual implementation of file conversion"""
-    from markitdown import MarkItDown
-
-    def convert(path: str) -> None:
-        converter = MarkItDown()
-        result = converter.convert_local(path)
-        print("TITLE:" + (result.title or ""))
-        print("CONTENT:" + result.text_content)
-
-    return convert
-
+import json
+from typing import Any
+
+# Results are printed as `<marker><json>` so that warnings or other output of the
+# file operations (e.g. from markitdown) cannot be mistaken for the result.
+RESULT_MARKER = "@@file-ops-result@@"
+
+# The file operations run in the code executor's environment. They are defined once per
+# Python process as `_drsai_file_ops`: with a persistent kernel (see `PythonKernelExecutor`)
+# the MarkItDown converter and the filename index survive between operations, with a
+# plain executor every operation just redefines them.
+_FILE_OPS_SOURCE = r'''
+import datetime
+import json
+import os
+import stat
+import sys
+from difflib import SequenceMatcher
 
-def _directory_listing_impl() -> Callable[[str], None]:
-    """The actual implementation of directory listing"""
-    import os
-    import datetime
 
-    def list_directory(path: str) -> None:
+class _DrsaiFileOps:
+    SKIP_DIRS = ("node_modules", ".git", "__pycache__")
+
+    def __init__(self):
+        self._converter = None
+        # directory -> (mtime_ns, file names, subdirectories to descend into)
+        self._index = {}
+
+    def stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {"exists": False}
+        return {
+            "exists": True,
+            "is_dir": stat.S_ISDIR(st.st_mode),
+            "path": os.path.abspath(path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+
+    def convert(self, path):
+        if self._converter is None:
+            from markitdown import MarkItDown
+
+            self._converter = MarkItDown()
+        try:
+            result = self._converter.convert_local(path)
+        except Exception as e:
+            return {"error": type(e).__name__, "message": str(e)}
+        return {"title": result.title or "", "content": result.text_content}
+
+    def list_directory(self, path):
         listing = """
 | Name | Size | Date Modified |
 | ---- | ---- | ------------- |
@@ -74,106 +77,96 @@ def _directory_listing_impl() -> Callable[[str], None]:
                     size = f"N/A: {type(e).__name__}"
 
             listing += f"| {entry} | {size} | {mtime} |\n"
-        print(listing)
-
-    return list_directory
-
-
-def _find_files_impl() -> Callable[[str], None]:
-    """The actual implementation of file finding"""
-    import os
-    from difflib import SequenceMatcher
-
-    def find_files(query: str) -> None:
-        import json
-
-        ROOT_DIR = "."
-        THRESHOLD = 0.2
-        MAX_RESULTS = 20
-        INCLUDE_DIRECTORIES = False
-
-        matches: List[Tuple[str, float]] = []
+        return listing
+
+    def _indexed_files(self, root):
+        """
+        Yield (directory, file name) for every file below root. A directory is only listed
+        again when its mtime changed (an entry was added, removed or renamed); for the rest
+        a stat() is enough.
+        """
+        seen = set()
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(directory)
+            entry = self._index.get(directory)
+            if entry is None or entry[0] != mtime:
+                files, subdirs = [], []
+                try:
+                    with os.scandir(directory) as it:
+                        for item in it:
+                            try:
+                                is_dir = item.is_dir()
+                            except OSError:
+                                is_dir = False
+                            if not is_dir:
+                                files.append(item.name)
+                            elif item.name not in self.SKIP_DIRS and not item.is_symlink():
+                                subdirs.append(item.name)
+                except OSError:
+                    continue
+                entry = (mtime, files, subdirs)
+                self._index[directory] = entry
+            for name in entry[1]:
+                yield directory, name
+            stack.extend(os.path.join(directory, name) for name in entry[2])
+        for directory in [d for d in self._index if d not in seen]:
+            del self._index[directory]
+
+    def find_files(self, query, root=".", threshold=0.2, max_results=20):
+        matches = []
         perfect_match = None
-
-        for root, dirs, files in os.walk(ROOT_DIR):
-            # Add both files and directories
-            dirs[:] = [
-                d for d in dirs if d not in ["node_modules", ".git", "__pycache__"]
-            ]
-            if INCLUDE_DIRECTORIES:
-                items = files + dirs
+        query = query.lower()
+        for directory, name in self._indexed_files(root):
+            path = os.path.join(directory, name)[2:]  # Remove ./ prefix
+
+            # Check for exact matches first (case insensitive)
+            if name.lower() == query:
+                score = 1.0
+                perfect_match = path
             else:
-                items = files
-            for name in items:
-                path = os.path.join(root, name)[2:]  # Remove ./ prefix
-
-                # Check for exact matches first (case insensitive)
-                if name.lower() == query.lower():
-                    score = 1.0
-                    perfect_match = path
-                else:
-                    # Calculate similarity score
-                    score = SequenceMatcher(None, query.lower(), name.lower()).ratio()
+                # Calculate similarity score
+                score = SequenceMatcher(None, query, name.lower()).ratio()
 
-                if score > THRESHOLD:  # Minimum similarity threshold
-                    matches.append((path, score))
+            if score > threshold:  # Minimum similarity threshold
+                matches.append((path, score))
 
         # Sort by score and take top results
         matches.sort(key=lambda x: x[1], reverse=True)
-        matches = matches[:MAX_RESULTS]
+        return {"matches": matches[:max_results], "perfect_match": perfect_match}
 
-        result = {"matches": matches, "perfect_match": perfect_match}
+    def emit(self, result):
+        # Write in slices: a single huge write would become a single huge protocol line
+        text = "__RESULT_MARKER__" + json.dumps(result) + "\n"
+        for start in range(0, len(text), 1 << 16):
+            sys.stdout.write(text[start : start + (1 << 16)])
+        sys.stdout.flush()
 
-        print(json.dumps(result))
 
-    return find_files
-
-
-# The template functions that generate the code to be executed
-def get_path_validation_code(path: str) -> str:
-    inner_func = inspect.getsource(_validate_path_impl()).split("def validate", 1)[1]
-    return f"""
-import os
-def validate{inner_func}
-validate('{path}')
-"""
+_drsai_file_ops = _DrsaiFileOps()
+'''.replace("__RESULT_MARKER__", RESULT_MARKER)
 
 
-def get_is_dir_check_code(path: str) -> str:
-    inner_func = inspect.getsource(_check_is_dir_impl()).split("def check", 1)[1]
+def get_file_op_code(op: str, *args: Any) -> str:
+    """
+    Generate the code that runs one file operation (a method of `_DrsaiFileOps`) and prints
+    its result. Arguments are passed as JSON, so paths and queries need no quoting.
+    """
     return f"""
-import os
-def check{inner_func}
-check('{path}')
+if "_drsai_file_ops" not in globals():
+    exec({_FILE_OPS_SOURCE!r}, globals())
+_drsai_file_ops.emit(_drsai_file_ops.{op}(*__import__("json").loads({json.dumps(list(args))!r})))
 """
 
 
-def get_file_conversion_code(path: str) -> str:
-    inner_func = inspect.getsource(_convert_file_impl()).split("def convert", 1)[1]
-    return f"""
-from markitdown import MarkItDown
-def convert{inner_func}
-convert('{path}')
-"""
-
-
-def get_directory_listing_code(local_path: str) -> str:
-    inner_func = inspect.getsource(_directory_listing_impl()).split(
-        "def list_directory", 1
-    )[1]
-    return f"""
-import os
-import datetime
-def list_directory{inner_func}
-list_directory('{local_path}')
-"""
-
-
-def get_find_files_code(query: str) -> str:
-    inner_func = inspect.getsource(_find_files_impl()).split("def find_files", 1)[1]
-    return f"""
-import os
-from difflib import SequenceMatcher
-def find_files{inner_func}
-find_files('{query}')
-"""
+def parse_file_op_output(output: str) -> Any:
+    """Return the result printed by the code of `get_file_op_code`."""
+    for line in reversed(output.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER) :])
+    raise RuntimeError(f"File operation failed:\n{output.strip()}")
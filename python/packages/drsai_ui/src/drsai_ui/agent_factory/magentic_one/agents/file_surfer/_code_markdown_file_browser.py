@@ -1,20 +1,17 @@
+import asyncio
 import io
+import json
 import re
 import time
 from pathlib import Path
 from mimetypes import guess_type
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from autogen_core.code_executor import CodeExecutor, CodeBlock
 from autogen_core import CancellationToken
 
 from markitdown import FileConversionException, MarkItDown, UnsupportedFormatException
-from ._browser_code_helpers import (
-    get_path_validation_code,
-    get_is_dir_check_code,
-    get_file_conversion_code,
-    get_directory_listing_code,
-    get_find_files_code,
-)
+from ._browser_code_helpers import get_file_op_code, parse_file_op_output
+from ._conversion_cache import FileConversionCache
 
 
 class CodeExecutorMarkdownFileBrowser:
@@ -24,6 +21,11 @@ class CodeExecutorMarkdownFileBrowser:
     This class provides functionality to browse files and directories, converting their contents
     to Markdown for display. It supports pagination, file searching, and navigation through
     directory structures.
+
+    Each file operation is a single code execution. With a persistent kernel as the code
+    executor (see `PythonKernelExecutor`) the helper functions, the MarkItDown converter and
+    the filename index used by `find_files` stay loaded between operations. Conversions are
+    cached by (path, size, mtime).
     """
 
     def __init__(
@@ -31,6 +33,7 @@ class CodeExecutorMarkdownFileBrowser:
         code_executor: CodeExecutor,
         viewport_size: int = 1024 * 8,
         save_converted_files: bool = False,
+        conversion_cache_dir: Path | str | None = None,
     ):
         """
         Initialize a new CodeExecutorMarkdownFileBrowser.
@@ -39,6 +42,7 @@ class CodeExecutorMarkdownFileBrowser:
             code_executor (CodeExecutor): The CodeExecutor instance to use for file operations
             viewport_size (int, optional): Maximum number of characters to display per page. Pages are adjusted dynamically to avoid cutting off words. Default: 8192.
             save_converted_files (bool, optional): If True, converted files are saved in a subdirectory named "converted_files" in the code executor's working directory. Default: False.
+            conversion_cache_dir (Path | str, optional): Directory where conversions are persisted across restarts. Default: "converted_files/.cache" in the working directory if save_converted_files is True, otherwise conversions are only cached in memory.
         """
         self.viewport_size = viewport_size  # Applies only to the standard uri types
         self.history: List[Tuple[str, float]] = list()
@@ -54,8 +58,15 @@ class CodeExecutorMarkdownFileBrowser:
             None  # Location of the last result
         )
         self._code_executor = code_executor
+        if conversion_cache_dir is None and save_converted_files:
+            conversion_cache_dir = self._work_dir / "converted_files" / ".cache"
+        self._conversion_cache = FileConversionCache(conversion_cache_dir)
         self.did_lazy_init = False
 
+    @property
+    def _work_dir(self) -> Path:
+        return Path(getattr(self._code_executor, "work_dir", "."))
+
     async def lazy_init(self) -> None:
         """
         Perform lazy initialization for the file browser.
@@ -251,6 +262,28 @@ class CodeExecutorMarkdownFileBrowser:
             self.viewport_pages.append((start_idx, end_idx))
             start_idx = end_idx
 
+    async def _run_file_op(self, op: str, *args: Any) -> Any:
+        """
+        Run a file operation in the code executor and return its result.
+        Args:
+            op (str): The operation, see `_browser_code_helpers`.
+        """
+        result = await self._code_executor.execute_code_blocks(
+            [CodeBlock(code=get_file_op_code(op, *args), language="python")],
+            cancellation_token=CancellationToken(),
+        )
+        return parse_file_op_output(result.output)
+
+    async def _stat(self, path: str) -> Dict[str, Any]:
+        """
+        Stat a path using the code executor.
+        Args:
+            path (str): The path to check.
+        Returns:
+            Dict[str, Any]: `exists`, and for existing paths `is_dir`, the absolute `path`, `size` and `mtime_ns`.
+        """
+        return await self._run_file_op("stat", path)
+
     async def _validate_path(self, path: str) -> bool:
         """
         Validate that a path exists using the code executor.
@@ -259,12 +292,33 @@ class CodeExecutorMarkdownFileBrowser:
         Returns:
             bool: True if the path exists, False otherwise.
         """
-        code = get_path_validation_code(path)
-        result = await self._code_executor.execute_code_blocks(
-            [CodeBlock(code=code, language="python")],
-            cancellation_token=CancellationToken(),
-        )
-        return result.output.strip().lower() == "true"
+        return bool((await self._stat(path))["exists"])
+
+    async def _convert_file(self, path: str, info: Dict[str, Any]) -> Tuple[str | None, str]:
+        """
+        Convert a file to Markdown, reusing the cached conversion if the file did not change.
+        Args:
+            path (str): The path of the file.
+            info (Dict[str, Any]): The result of `_stat` for the path.
+        Returns:
+            Tuple[str | None, str]: The title and the Markdown content.
+        """
+        key = (info["path"], info["size"], info["mtime_ns"])
+        cached = await asyncio.to_thread(self._conversion_cache.get, key)
+        if cached is not None:
+            return cached
+
+        result = await self._run_file_op("convert", path)
+        error = result.get("error")
+        if error == "UnsupportedFormatException":
+            raise UnsupportedFormatException(result.get("message", ""))
+        if error == "FileNotFoundError":
+            raise FileNotFoundError(path)
+        if error is not None:
+            raise FileConversionException(result.get("message", ""))
+        title, content = result["title"] or None, result["content"]
+        await asyncio.to_thread(self._conversion_cache.put, key, title, content)
+        return title, content
 
     async def _open_path(
         self,
@@ -275,17 +329,13 @@ class CodeExecutorMarkdownFileBrowser:
         Args:
             path (str): The path to the file to open.
         """
-        if not await self._validate_path(path):
+        info = await self._stat(path)
+        if not info["exists"]:
             self.page_title = "FileNotFoundError"
             self._set_page_content(f"# FileNotFoundError\n\nFile not found: {path}")
         else:
             try:
-                code = get_is_dir_check_code(path)
-                result = await self._code_executor.execute_code_blocks(
-                    [CodeBlock(code=code, language="python")],
-                    cancellation_token=CancellationToken(),
-                )
-                is_dir = result.output.strip().lower() == "true"
+                is_dir = info["is_dir"]
                 mime_type, _ = guess_type(path)
 
                 if is_dir:
@@ -299,40 +349,20 @@ class CodeExecutorMarkdownFileBrowser:
                 elif mime_type and mime_type.startswith("image/"):
                     self.page_title = Path(path).name
                     self._set_page_content("")
-                    work_dir = getattr(self._code_executor, "work_dir", ".")
-                    self.image_path = str((Path(work_dir) / path).resolve())
+                    self.image_path = str((self._work_dir / path).resolve())
                 else:
                     # Read and convert file content using code executor
-                    convert_code = get_file_conversion_code(path)
-                    result = await self._code_executor.execute_code_blocks(
-                        [CodeBlock(code=convert_code, language="python")],
-                        cancellation_token=CancellationToken(),
-                    )
-
-                    # Parse the output to get title and content
-                    output_lines = result.output.split("\n")
-                    title_line = next(
-                        line for line in output_lines if line.startswith("TITLE:")
-                    )
-                    content_start = next(
-                        i
-                        for i, line in enumerate(output_lines)
-                        if line.startswith("CONTENT:")
-                    )
-
-                    self.page_title = title_line[6:] or None
-                    markdown_content = "\n".join(output_lines[content_start:])[8:]
+                    self.page_title, markdown_content = await self._convert_file(path, info)
                     self._set_page_content(markdown_content)
 
                     # Save as .converted.md regardless of original extension
                     if self.save_converted_files:
                         try:
-                            work_dir = getattr(self._code_executor, "work_dir", ".")
-                            converted_dir = Path(work_dir) / "converted_files"
+                            converted_dir = self._work_dir / "converted_files"
                             converted_dir.mkdir(
                                 parents=True, exist_ok=True
                             )  # Create if it doesn't exist
-                            original_path = (Path(work_dir) / path).resolve()
+                            original_path = (self._work_dir / path).resolve()
                             md_filename = original_path.stem + ".converted.md"
                             md_path = converted_dir / md_filename
                             md_path.write_text(markdown_content)
@@ -364,27 +394,18 @@ class CodeExecutorMarkdownFileBrowser:
         Returns:
             str: A string containing a Markdown-formatted table with columns for name, size, and modification date of directory entries.
         """
-        code = get_directory_listing_code(local_path)
-        result = await self._code_executor.execute_code_blocks(
-            [CodeBlock(code=code, language="python")],
-            cancellation_token=CancellationToken(),
-        )
-        return result.output
+        return await self._run_file_op("list_directory", local_path)
 
     async def find_files(self, query: str) -> str:
         """
         Search for files matching the query in current directory and subdirectories.
-        Returns up to 10 closest matches sorted by similarity score.
+        Returns up to 20 closest matches sorted by similarity score. The filenames come from an
+        index kept by the code executor, which only re-lists directories that changed.
 
         Args:
             query (str): File name or pattern to search for. Supports wildcards.
 
         Returns:
-            str: Markdown formatted string with search results
+            str: JSON with the `matches` ([path, score] pairs) and the `perfect_match` path, if any
         """
-        code = get_find_files_code(query)
-        result = await self._code_executor.execute_code_blocks(
-            [CodeBlock(code=code, language="python")],
-            cancellation_token=CancellationToken(),
-        )
-        return result.output
+        return json.dumps(await self._run_file_op("find_files", query))
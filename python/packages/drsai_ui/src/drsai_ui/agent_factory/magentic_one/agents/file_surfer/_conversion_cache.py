@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from loguru import logger
+
+# (path in the code executor, size, mtime_ns)
+FileKey = Tuple[str, int, int]
+
+
+class FileConversionCache:
+    """
+    Cache of Markdown conversions keyed by (path, size, mtime), so re-opening an unchanged
+    file does not convert it again.
+
+    Recent conversions are kept in memory. If a cache directory is given, every conversion
+    is also persisted there as `<sha256(path)>.json` (key, title and Markdown), so it survives
+    restarts of the agent; an entry whose size or mtime no longer matches is overwritten by
+    the next conversion of the file.
+
+    Args:
+        cache_dir (Path | str, optional): Directory of the persistent entries, None keeps the cache in memory only. Default: None
+        max_entries (int, optional): Maximum number of conversions kept in memory. Default: 32
+    """
+
+    def __init__(self, cache_dir: Path | str | None = None, max_entries: int = 32) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[FileKey, Tuple[str | None, str]]" = OrderedDict()
+        # get/put run in worker threads
+        self._lock = threading.Lock()
+
+    def _entry_path(self, path: str) -> Path:
+        assert self.cache_dir is not None
+        return self.cache_dir / f"{hashlib.sha256(path.encode('utf-8')).hexdigest()}.json"
+
+    def _remember(self, key: FileKey, value: Tuple[str | None, str]) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: FileKey) -> Optional[Tuple[str | None, str]]:
+        """Return (title, markdown) of a cached conversion, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if self.cache_dir is None:
+            return None
+        try:
+            entry = json.loads(self._entry_path(key[0]).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable conversion cache entry for {key[0]}: {e}")
+            return None
+        if (entry.get("path"), entry.get("size"), entry.get("mtime_ns")) != key:
+            return None
+        value = (entry.get("title"), entry["content"])
+        self._remember(key, value)
+        return value
+
+    def put(self, key: FileKey, title: str | None, content: str) -> None:
+        self._remember(key, (title, content))
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(key[0])
+            tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(
+                json.dumps(
+                    {"path": key[0], "size": key[1], "mtime_ns": key[2], "title": title, "content": content}
+                ),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Failed to persist the conversion of {key[0]}: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -40,6 +40,7 @@ from ._tool_definitions import (
     TOOL_FIND_FILE,
 )
 from ._code_markdown_file_browser import CodeExecutorMarkdownFileBrowser
+from .._kernel_executor import PythonKernelExecutor
 from ...approval_guard import BaseApprovalGuard
 from ...guarded_action import GuardedAction, ApprovalDeniedError
 from .....ui_backend.utils import thread_to_context
@@ -82,6 +83,8 @@ class FileSurfer(BaseChatAgent, Component[FileSurferConfig]):
         bind_dir (str, optional): The directory to bind to the code executor Default: None
         code_executor (CodeExecutor, optional): Optional custom code executor to use
         use_local_executor (bool, optional): Whether to use local code execution instead of Docker Default: False
+        save_converted_files (bool, optional): Save the Markdown of opened files in "converted_files" in the working directory (and persist the conversion cache there) Default: False
+        conversion_cache_dir (str, optional): Directory where file conversions are persisted across restarts Default: None
 
     """
 
@@ -121,6 +124,7 @@ class FileSurfer(BaseChatAgent, Component[FileSurferConfig]):
         use_local_executor: bool = False,
         approval_guard: BaseApprovalGuard | None = None,
         save_converted_files: bool = False,
+        conversion_cache_dir: Path | str | None = None,
     ) -> None:
         super().__init__(name, description)
         self._model_client = model_client
@@ -146,8 +150,13 @@ class FileSurfer(BaseChatAgent, Component[FileSurferConfig]):
         self._save_converted_files = save_converted_files
         if code_executor:
             self._code_executor = code_executor
+            self._file_ops_executor: CodeExecutor = code_executor
         elif use_local_executor:
             self._code_executor = LocalCommandLineCodeExecutor(work_dir=work_dir)
+            # File operations run in one long-lived helper process instead of a new process each
+            self._file_ops_executor = PythonKernelExecutor(
+                work_dir=work_dir, fallback_executor=self._code_executor
+            )
         else:
             name = f"{name}-{uuid.uuid4()}"
             self._code_executor = DockerCommandLineCodeExecutor(
@@ -157,10 +166,16 @@ class FileSurfer(BaseChatAgent, Component[FileSurferConfig]):
                 bind_dir=bind_dir,
                 delete_tmp_files=True,
             )
+            self._file_ops_executor = PythonKernelExecutor(
+                work_dir=work_dir,
+                fallback_executor=self._code_executor,
+                container_name=name,
+            )
         self._browser = CodeExecutorMarkdownFileBrowser(
-            self._code_executor,
+            self._file_ops_executor,
             viewport_size=1024 * 5,
             save_converted_files=save_converted_files,
+            conversion_cache_dir=conversion_cache_dir,
         )
         self.did_lazy_init = False
         self.is_paused = False
@@ -594,8 +609,9 @@ class FileSurfer(BaseChatAgent, Component[FileSurferConfig]):
     async def close(self) -> None:
         """Close the FileSurfer agent."""
         logger.info("Closing FileSurfer...")
-        if hasattr(self, "_code_executor"):
-            await self._code_executor.stop()
+        if hasattr(self, "_file_ops_executor"):
+            # Also stops the wrapped code executor
+            await self._file_ops_executor.stop()
         await self._model_client.close()
 
     def _to_config(self) -> FileSurferConfig:
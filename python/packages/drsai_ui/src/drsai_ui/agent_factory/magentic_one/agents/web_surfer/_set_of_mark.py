@@ -1,5 +1,6 @@
 import io
-from typing import BinaryIO, Dict, List, Tuple, cast
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Set, Tuple, cast
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -69,35 +70,51 @@ def _add_set_of_mark(
     rects_below: List[str] = []  # Scroll down to see
     id_mapping: Dict[str, str] = {}  # Maps new IDs to original IDs
 
+    # Sets mirror the lists above for O(1) dedup on pages with thousands of elements
+    seen_visible: Set[str] = set()
+    seen_above: Set[str] = set()
+    seen_below: Set[str] = set()
+    # Rects inside the viewport, collected here so drawing does not walk all ROIs again
+    to_draw: List[Tuple[str, DOMRectangle]] = []
+
     base = screenshot.convert("RGBA")
+    width, height = base.size
 
-    # First pass to identify all rectangles
+    # Single pass to classify all rectangles
     for original_id, roi in ROIs.items():
+        tag_name = roi.get("tag_name")
         # Handle options separately and add to visible only
-        if roi.get("tag_name") == "option" or roi.get("tag_name") == "input, type=file":
-            if original_id not in visible_rects:
+        if tag_name == "option" or tag_name == "input, type=file":
+            if original_id not in seen_visible:
+                seen_visible.add(original_id)
                 visible_rects.append(original_id)
-            continue
+            if tag_name == "option":
+                continue
 
         # Check each rectangle for the element
         for rect in roi["rects"]:
             if not rect or rect["width"] * rect["height"] == 0:
                 continue
 
-            mid = (
-                (rect["right"] + rect["left"]) / 2.0,
-                (rect["top"] + rect["bottom"]) / 2.0,
-            )
+            mid_x = (rect["right"] + rect["left"]) / 2.0
+            mid_y = (rect["top"] + rect["bottom"]) / 2.0
 
             # Only process if x coordinate is valid
-            if 0 <= mid[0] < base.size[0]:
-                # Add to exactly one list based on y coordinate
-                if mid[1] < 0 and original_id not in rects_above:
+            if not 0 <= mid_x < width:
+                continue
+            if mid_y < 0:
+                if tag_name != "input, type=file" and original_id not in seen_above:
+                    seen_above.add(original_id)
                     rects_above.append(original_id)
-                elif mid[1] >= base.size[1] and original_id not in rects_below:
+            elif mid_y >= height:
+                if tag_name != "input, type=file" and original_id not in seen_below:
+                    seen_below.add(original_id)
                     rects_below.append(original_id)
-                elif 0 <= mid[1] < base.size[1] and original_id not in visible_rects:
+            else:
+                if original_id not in seen_visible:
+                    seen_visible.add(original_id)
                     visible_rects.append(original_id)
+                to_draw.append((original_id, rect))
 
     # Create new sequential IDs for all rectangles
     next_id = 1
@@ -131,31 +148,16 @@ def _add_set_of_mark(
                 id_mapping[original_id] = original_id
                 original_to_new[original_id] = original_id
 
-    # Drawing code remains the same
-    fnt = ImageFont.load_default(14)
+    # Draw every marker on one overlay and composite it once
+    fnt = _default_font()
     overlay = Image.new("RGBA", base.size)
     draw = ImageDraw.Draw(overlay)
 
-    # Much simpler and faster lookup using the reverse mapping
-    for original_id, roi in ROIs.items():
-        if roi.get("tag_name") == "option":
-            continue
-
+    for original_id, rect in to_draw:
         new_id = original_to_new.get(original_id)
         if new_id is None:
             continue  # Skip if no mapping found
-
-        for rect in roi["rects"]:
-            if not rect or rect["width"] * rect["height"] == 0:
-                continue
-
-            mid = (
-                (rect["right"] + rect["left"]) / 2.0,
-                (rect["top"] + rect["bottom"]) / 2.0,
-            )
-
-            if 0 <= mid[0] < base.size[0] and 0 <= mid[1] < base.size[1]:
-                _draw_roi(draw, new_id, fnt, rect)
+        _draw_roi(draw, new_id, fnt, rect)
 
     comp = Image.alpha_composite(base, overlay)
     overlay.close()
@@ -163,6 +165,11 @@ def _add_set_of_mark(
     return comp, new_visible_rects, new_rects_above, new_rects_below, id_mapping
 
 
+@lru_cache(maxsize=1)
+def _default_font() -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    return ImageFont.load_default(14)
+
+
 def _draw_roi(
     draw: ImageDraw.ImageDraw,
     idx: str | int,  # Fix type hint to allow both string and int indices
@@ -26,7 +26,6 @@ from loguru import logger
 from urllib.parse import quote_plus
 from pydantic import Field
 import PIL.Image
-import tiktoken
 from autogen_agentchat.agents import BaseChatAgent
 from autogen_agentchat.base import Response
 from autogen_agentchat.messages import (
@@ -101,6 +100,7 @@ from ._tool_definitions import (
 from ...tools.tool_metadata import get_tool_metadata, ToolMetadata
 from ...tools.playwright.types import InteractiveRegion
 from ...tools.playwright.playwright_controller import PlaywrightController
+from ...tools.playwright.utils.content_conversion import get_tokenizer
 from ...tools.playwright.playwright_state import (
     BrowserState,
     save_browser_state,
@@ -787,20 +787,21 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                         new_screenshot = (
                             await self._playwright_controller.get_screenshot(self._page)
                         )
+                        # Decode once, the image is shared by the emitted message and the chat history
+                        new_screenshot_image = PIL.Image.open(io.BytesIO(new_screenshot))
+                        new_screenshot_image.load()
                         if self.to_save_screenshots and self.debug_dir is not None:
                             current_timestamp = "_" + int(time.time()).__str__()
                             screenshot_png_name = (
                                 "screenshot_raw" + current_timestamp + ".png"
                             )
-                            PIL.Image.open(io.BytesIO(new_screenshot)).save(
+                            new_screenshot_image.save(
                                 os.path.join(self.debug_dir, screenshot_png_name)
                             )
                         all_screenshots.append(new_screenshot)
                         content: list[str | AGImage] = [
                             action_result,
-                            AGImage.from_pil(
-                                PIL.Image.open(io.BytesIO(new_screenshot))
-                            ),
+                            AGImage.from_pil(new_screenshot_image),
                         ]
                         emited_responses.append(action_result)
                         # 4) Emit the observation
@@ -831,9 +832,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                             UserMessage(
                                 content=[
                                     f"Observation: {action_result}\n\n{message_content}",
-                                    AGImage.from_pil(
-                                        PIL.Image.open(io.BytesIO(new_screenshot))
-                                    ),
+                                    AGImage.from_pil(new_screenshot_image),
                                 ],
                                 source=self.name,
                             )
@@ -988,8 +987,11 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         rects = await self._playwright_controller.get_interactive_rects(self._page)
         viewport = await self._playwright_controller.get_visual_viewport(self._page)
         screenshot = await self._playwright_controller.get_screenshot(self._page)
+        # Decode the PNG once, both the set-of-mark and the scaled screenshot are derived from it
+        screenshot_image = PIL.Image.open(io.BytesIO(screenshot))
+        screenshot_image.load()
         som_screenshot, visible_rects, rects_above, rects_below, element_id_mapping = (
-            add_set_of_mark(screenshot, rects, use_sequential_ids=True)
+            add_set_of_mark(screenshot_image, rects, use_sequential_ids=True)
         )
         # element_id_mapping is a mapping of new ids to original ids in the page
         # we need to reverse it to get the original ids from the new ids
@@ -1130,12 +1132,11 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             scaled_som_screenshot = som_screenshot.resize(
                 (self.MLM_WIDTH, self.MLM_HEIGHT)
             )
-            screenshot_file = PIL.Image.open(io.BytesIO(screenshot))
-            scaled_screenshot = screenshot_file.resize(
+            scaled_screenshot = screenshot_image.resize(
                 (self.MLM_WIDTH, self.MLM_HEIGHT)
             )
             som_screenshot.close()
-            screenshot_file.close()
+            screenshot_image.close()
 
             # Add the multimodal message and make the request
             history.append(
@@ -1861,7 +1862,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         prompt = WEB_SURFER_QA_PROMPT(title, question)
 
         # Truncate the page content if needed to fit within token limits
-        tokenizer = tiktoken.encoding_for_model("gpt-4o")
+        tokenizer = get_tokenizer("gpt-4o")
         prompt_tokens = len(tokenizer.encode(prompt))
         # Reserve tokens for the image (SCREENSHOT_TOKENS) and some buffer for the response
         max_content_tokens = 128000 - self.SCREENSHOT_TOKENS - prompt_tokens - 1000
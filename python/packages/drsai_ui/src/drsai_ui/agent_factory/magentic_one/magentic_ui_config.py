@@ -75,6 +75,9 @@ class MagenticUIConfig(BaseModel):
         hints (str, optional): Helpful hints for the task. Default: None.
         answer (str, optional): Answer to the task. Default: None.
         inside_docker (bool, optional): Whether to run inside a docker container. Default: True.
+        browser_pool_size (int, optional): Number of warm local headless browsers shared by WebSurfer runs. When > 0 each run gets a fresh context from the pool instead of starting its own VNC docker browser. Default: 0 (disabled).
+        browser_pool_max_runs (int, optional): Recycle a pooled browser after this many runs. Default: 20.
+        coder_persistent_kernel (bool, optional): Run the coder's Python blocks in a persistent kernel inside its executor container, keeping variables between blocks and streaming their output. Default: False.
     """
 
     model_client_configs: ModelClientConfigs = Field(default_factory=ModelClientConfigs)
@@ -103,3 +106,6 @@ class MagenticUIConfig(BaseModel):
     hints: Optional[str] = None
     answer: Optional[str] = None
     inside_docker: bool = True
+    browser_pool_size: int = 0
+    browser_pool_max_runs: int = 20
+    coder_persistent_kernel: bool = False
@@ -5,7 +5,10 @@ from autogen_agentchat.base import ChatAgent, TaskResult, Team
 from autogen_agentchat.agents import UserProxyAgent, BaseChatAgent, AssistantAgent
 from autogen_agentchat.teams import BaseGroupChat
 
-from .tools.playwright.browser import get_browser_resource_config
+from .tools.playwright.browser import (
+    PooledPlaywrightBrowser,
+    get_browser_resource_config,
+)
 from .teams import GroupChat, RoundRobinGroupChat
 from .teams.orchestrator.orchestrator_config import OrchestratorConfig
 from .agents import WebSurfer, CoderAgent, USER_PROXY_DESCRIPTION, FileSurfer
@@ -105,14 +108,24 @@ async def get_task_team(
     model_client_file_surfer = get_model_client(
         magentic_ui_config.model_client_configs.file_surfer
     )
-    browser_resource_config, _novnc_port, _playwright_port = (
-        get_browser_resource_config(
-            paths.external_run_dir,
-            magentic_ui_config.novnc_port,
-            magentic_ui_config.playwright_port,
-            magentic_ui_config.inside_docker,
+    if magentic_ui_config.browser_pool_size > 0:
+        # 从预热的浏览器池中为本次运行分配独立的context，浏览器在规划阶段后台启动
+        pooled_browser = PooledPlaywrightBrowser(
+            pool_size=magentic_ui_config.browser_pool_size,
+            max_runs_per_browser=magentic_ui_config.browser_pool_max_runs,
+            headless=True,
+        )
+        pooled_browser.pool.warm_up()
+        browser_resource_config = pooled_browser.dump_component()
+    else:
+        browser_resource_config, _novnc_port, _playwright_port = (
+            get_browser_resource_config(
+                paths.external_run_dir,
+                magentic_ui_config.novnc_port,
+                magentic_ui_config.playwright_port,
+                magentic_ui_config.inside_docker,
+            )
         )
-    )
 
     orchestrator_config = OrchestratorConfig(
         cooperative_planning=magentic_ui_config.cooperative_planning,
@@ -226,6 +239,7 @@ async def get_task_team(
         bind_dir=paths.external_run_dir,
         model_context_token_limit=magentic_ui_config.model_context_token_limit,
         approval_guard=approval_guard,
+        use_persistent_kernel=magentic_ui_config.coder_persistent_kernel,
     )
 
     file_surfer = FileSurfer(
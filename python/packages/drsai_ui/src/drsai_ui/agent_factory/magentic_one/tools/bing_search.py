@@ -2,10 +2,10 @@ from urllib.parse import quote_plus
 from playwright.async_api import async_playwright
 from urllib.parse import urlparse
 import asyncio
-import tiktoken
 from dataclasses import dataclass
 from loguru import logger
 from ..tools import PlaywrightController
+from .playwright.utils.content_conversion import truncate_to_tokens
 
 
 @dataclass
@@ -163,13 +163,7 @@ async def get_bing_search_results(
         if page_contents:
             combined_content = "Search Results for " + query + "\n\n"
             for url, content in page_contents.items():
-                if max_tokens_per_page == -1:
-                    token_limited_content = content
-                else:
-                    tokenizer = tiktoken.encoding_for_model("gpt-4o")
-                    tokens = tokenizer.encode(content)
-                    limited_content = tokenizer.decode(tokens[:max_tokens_per_page])
-                    token_limited_content = limited_content
+                token_limited_content = truncate_to_tokens(content, max_tokens_per_page)
                 combined_content += f"Page: {url}\n{token_limited_content}\n\n"
 
     except asyncio.TimeoutError as e:
@@ -181,13 +175,7 @@ async def get_bing_search_results(
                 "Search Results for " + query + " (Partial results due to timeout)\n\n"
             )
             for url, content in page_contents.items():
-                if max_tokens_per_page == -1:
-                    token_limited_content = content
-                else:
-                    tokenizer = tiktoken.encoding_for_model("gpt-4o")
-                    tokens = tokenizer.encode(content)
-                    limited_content = tokenizer.decode(tokens[:max_tokens_per_page])
-                    token_limited_content = limited_content
+                token_limited_content = truncate_to_tokens(content, max_tokens_per_page)
                 combined_content += f"Page: {url}\n{token_limited_content}\n\n"
         elif not search_results:
             # If we got absolutely nothing, return empty results
@@ -11,6 +11,8 @@ from .browser import (
     LocalPlaywrightBrowser,
     VncDockerPlaywrightBrowser,
     HeadlessDockerPlaywrightBrowser,
+    BrowserPool,
+    PooledPlaywrightBrowser,
 )
 
 __all__ = [
@@ -24,4 +26,6 @@ __all__ = [
     "LocalPlaywrightBrowser",
     "VncDockerPlaywrightBrowser",
     "HeadlessDockerPlaywrightBrowser",
+    "BrowserPool",
+    "PooledPlaywrightBrowser",
 ]
@@ -2,6 +2,7 @@ from .base_playwright_browser import PlaywrightBrowser, DockerPlaywrightBrowser
 from .local_playwright_browser import LocalPlaywrightBrowser
 from .vnc_docker_playwright_browser import VncDockerPlaywrightBrowser
 from .headless_docker_playwright_browser import HeadlessDockerPlaywrightBrowser
+from .browser_pool import BrowserPool, PooledPlaywrightBrowser, close_browser_pools, get_browser_pool
 from .utils import get_browser_resource_config
 
 __all__ = [
@@ -10,5 +11,9 @@ __all__ = [
     "LocalPlaywrightBrowser",
     "VncDockerPlaywrightBrowser",
     "HeadlessDockerPlaywrightBrowser",
+    "BrowserPool",
+    "PooledPlaywrightBrowser",
+    "get_browser_pool",
+    "close_browser_pools",
     "get_browser_resource_config",
 ]
@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from autogen_core import Component
+from loguru import logger
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+from pydantic import BaseModel
+
+from ..playwright_state import BrowserState, load_browser_state
+from .base_playwright_browser import PlaywrightBrowser
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0"
+
+
+@dataclass
+class _PooledBrowser:
+    browser: Browser
+    runs: int = 0
+    active_contexts: int = 0
+    crashed: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class BrowserLease:
+    """A browser context handed out by the pool for a single run."""
+
+    context: BrowserContext
+    _owner: _PooledBrowser
+
+
+class BrowserPool:
+    """
+    A pool of pre-launched local Chromium browsers shared by WebSurfer runs.
+
+    Every run gets its own fresh `BrowserContext` (isolated cookies, storage and pages)
+    from one of the warm browsers, so new sessions skip the Chromium launch. A browser is
+    recycled once it has served `max_runs_per_browser` runs and has no active contexts,
+    or immediately when it crashes/disconnects.
+
+    Args:
+        size (int, optional): Number of warm browsers to keep. Default: 2
+        max_runs_per_browser (int, optional): Recycle a browser after this many runs. Default: 20
+        headless (bool, optional): Whether to run the browsers in headless mode. Default: True
+        browser_channel (str, optional): The browser channel to use (e.g., 'chrome', 'msedge'). Default: None
+        enable_downloads (bool, optional): Whether contexts accept downloads. Default: False
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_runs_per_browser: int = 20,
+        headless: bool = True,
+        browser_channel: Optional[str] = None,
+        enable_downloads: bool = False,
+    ) -> None:
+        assert size > 0
+        assert max_runs_per_browser > 0
+        self.size = size
+        self.max_runs_per_browser = max_runs_per_browser
+        self.headless = headless
+        self.browser_channel = browser_channel
+        self.enable_downloads = enable_downloads
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._lock = asyncio.Lock()
+        self._started = False
+        self._warm_up_task: Optional[asyncio.Task[None]] = None
+        self._total_runs = 0
+        self._recycled = 0
+        self._crashes = 0
+
+    async def start(self) -> None:
+        """Start Playwright and warm up `size` browsers."""
+        async with self._lock:
+            if self._started:
+                return
+            self._playwright = await async_playwright().start()
+            self._started = True
+            await self._fill()
+
+    def warm_up(self) -> None:
+        """Start the pool in the background, e.g. while a team is still planning."""
+        if self._started or (self._warm_up_task is not None and not self._warm_up_task.done()):
+            return
+        self._warm_up_task = asyncio.create_task(self.start())
+
+    async def close(self) -> None:
+        """Close all browsers and stop Playwright."""
+        # A pending warm-up would otherwise start the browsers again after closing
+        warm_up, self._warm_up_task = self._warm_up_task, None
+        if warm_up is not None and not warm_up.done():
+            try:
+                await warm_up
+            except Exception as e:
+                logger.warning(f"Browser pool warm-up failed: {e}")
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+            for pooled in browsers:
+                await self._close_browser(pooled)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            self._started = False
+
+    async def acquire(self, browser_state: Optional[BrowserState] = None) -> BrowserLease:
+        """
+        Create a fresh context on the least loaded warm browser.
+
+        Args:
+            browser_state (BrowserState, optional): A snapshot from `save_browser_state` to restore
+                (storage state and open tabs) into the new context. Default: None
+        """
+        if not self._started:
+            await self.start()
+        async with self._lock:
+            await self._fill()
+            alive = [b for b in self._browsers if not b.crashed]
+            candidates = [
+                b for b in alive if b.runs < self.max_runs_per_browser
+            ] or alive
+            pooled = min(candidates, key=lambda b: (b.active_contexts, b.runs))
+            pooled.active_contexts += 1
+            pooled.runs += 1
+            self._total_runs += 1
+
+        context_options: Dict[str, Any] = {
+            "user_agent": DEFAULT_USER_AGENT,
+            "accept_downloads": self.enable_downloads,
+        }
+        if browser_state is not None and browser_state.state:
+            context_options["storage_state"] = browser_state.state
+        try:
+            context = await pooled.browser.new_context(**context_options)
+        except Exception:
+            await self._release_browser(pooled)
+            raise
+        if browser_state is not None and browser_state.tabs:
+            try:
+                await load_browser_state(context, browser_state)
+            except Exception:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing pooled browser context: {e}")
+                await self._release_browser(pooled)
+                raise
+        return BrowserLease(context=context, _owner=pooled)
+
+    async def release(self, lease: BrowserLease) -> None:
+        """Close the run's context and recycle its browser if needed."""
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser context: {e}")
+        await self._release_browser(lease._owner)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy metrics."""
+        return {
+            "size": self.size,
+            "browsers": len(self._browsers),
+            "active_contexts": sum(b.active_contexts for b in self._browsers),
+            "idle_browsers": sum(
+                1 for b in self._browsers if b.active_contexts == 0 and not b.crashed
+            ),
+            "total_runs": self._total_runs,
+            "recycled": self._recycled,
+            "crashes": self._crashes,
+        }
+
+    async def _release_browser(self, pooled: _PooledBrowser) -> None:
+        async with self._lock:
+            pooled.active_contexts = max(0, pooled.active_contexts - 1)
+            if pooled.active_contexts > 0:
+                return
+            if pooled.crashed or pooled.runs >= self.max_runs_per_browser:
+                if pooled in self._browsers:
+                    self._browsers.remove(pooled)
+                self._recycled += 1
+                await self._close_browser(pooled)
+                if self._started:
+                    await self._fill()
+
+    async def _fill(self) -> None:
+        """Launch browsers until the pool has `size` healthy ones (the lock must be held)."""
+        assert self._playwright is not None
+        # Drop crashed browsers that no run is using anymore
+        for pooled in [b for b in self._browsers if b.crashed and b.active_contexts == 0]:
+            self._browsers.remove(pooled)
+        healthy = [
+            b
+            for b in self._browsers
+            if not b.crashed and b.runs < self.max_runs_per_browser
+        ]
+        missing = self.size - len(healthy)
+        if missing <= 0:
+            return
+        launched = await asyncio.gather(
+            *(self._launch() for _ in range(missing)), return_exceptions=True
+        )
+        for result in launched:
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to launch pooled browser: {result}")
+            else:
+                self._browsers.append(result)
+        if not any(not b.crashed for b in self._browsers):
+            raise RuntimeError("No browser available in the browser pool")
+
+    async def _launch(self) -> _PooledBrowser:
+        assert self._playwright is not None
+        launch_options: Dict[str, Any] = {"headless": self.headless}
+        if self.browser_channel:
+            launch_options["channel"] = self.browser_channel
+        browser = await self._playwright.chromium.launch(
+            **launch_options,
+            args=["--disable-extensions", "--disable-file-system"],
+            chromium_sandbox=True,
+            env={} if self.headless else {"DISPLAY": ":0"},
+        )
+        pooled = _PooledBrowser(browser=browser)
+
+        def _on_disconnected(_: Browser) -> None:
+            if not pooled.crashed:
+                pooled.crashed = True
+                self._crashes += 1
+                logger.warning("Pooled browser disconnected, it will be replaced")
+
+        browser.on("disconnected", _on_disconnected)
+        return pooled
+
+    async def _close_browser(self, pooled: _PooledBrowser) -> None:
+        pooled.crashed = True  # closing is not a crash, but the browser must not be reused
+        try:
+            if pooled.browser.is_connected():
+                await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+
+_browser_pools: Dict[tuple, BrowserPool] = {}
+
+
+def get_browser_pool(
+    size: int = 2,
+    max_runs_per_browser: int = 20,
+    headless: bool = True,
+    browser_channel: Optional[str] = None,
+    enable_downloads: bool = False,
+) -> BrowserPool:
+    """Return the process-wide pool for these browser settings, creating it if needed."""
+    key = (size, max_runs_per_browser, headless, browser_channel, enable_downloads)
+    pool = _browser_pools.get(key)
+    if pool is None:
+        pool = BrowserPool(
+            size=size,
+            max_runs_per_browser=max_runs_per_browser,
+            headless=headless,
+            browser_channel=browser_channel,
+            enable_downloads=enable_downloads,
+        )
+        _browser_pools[key] = pool
+    return pool
+
+
+async def close_browser_pools() -> None:
+    """Close every pool created by `get_browser_pool` (on application shutdown)."""
+    pools = list(_browser_pools.values())
+    _browser_pools.clear()
+    for pool in pools:
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.error(f"Error closing browser pool: {e}")
+
+
+class PooledPlaywrightBrowserConfig(BaseModel):
+    """
+    Configuration for the Pooled Playwright Browser.
+    """
+
+    pool_size: int = 2
+    max_runs_per_browser: int = 20
+    headless: bool = True
+    browser_channel: Optional[str] = None
+    enable_downloads: bool = False
+    browser_state: Optional[Dict[str, Any]] = None
+
+
+class PooledPlaywrightBrowser(
+    PlaywrightBrowser, Component[PooledPlaywrightBrowserConfig]
+):
+    """
+    A Playwright browser resource backed by the process-wide `BrowserPool`.
+    Starting it hands out a fresh, isolated context on an already running browser instead of
+    launching Chromium; closing it only closes that context.
+
+    Args:
+        pool_size (int, optional): Number of warm browsers kept by the pool. Default: 2
+        max_runs_per_browser (int, optional): Recycle a browser after this many runs. Default: 20
+        headless (bool, optional): Whether to run the browsers in headless mode. Default: True
+        browser_channel (str, optional): The browser channel to use (e.g., 'chrome', 'msedge'). Default: None
+        enable_downloads (bool, optional): Whether to enable file downloads. Default: False
+        browser_state (BrowserState, optional): A `save_browser_state` snapshot to restore in the new context. Default: None
+    """
+
+    component_config_schema = PooledPlaywrightBrowserConfig
+    component_type = "other"
+
+    def __init__(
+        self,
+        pool_size: int = 2,
+        max_runs_per_browser: int = 20,
+        headless: bool = True,
+        browser_channel: Optional[str] = None,
+        enable_downloads: bool = False,
+        browser_state: Optional[BrowserState] = None,
+    ):
+        super().__init__()
+        self._pool_size = pool_size
+        self._max_runs_per_browser = max_runs_per_browser
+        self._headless = headless
+        self._browser_channel = browser_channel
+        self._enable_downloads = enable_downloads
+        self._browser_state = browser_state
+        self._lease: Optional[BrowserLease] = None
+
+    @property
+    def pool(self) -> BrowserPool:
+        return get_browser_pool(
+            size=self._pool_size,
+            max_runs_per_browser=self._max_runs_per_browser,
+            headless=self._headless,
+            browser_channel=self._browser_channel,
+            enable_downloads=self._enable_downloads,
+        )
+
+    async def _start(self) -> None:
+        """
+        Acquire a fresh context from the pool.
+        """
+        self._lease = await self.pool.acquire(self._browser_state)
+
+    async def _close(self) -> None:
+        """
+        Return the context to the pool.
+        """
+        if self._lease is not None:
+            lease, self._lease = self._lease, None
+            await self.pool.release(lease)
+
+    @property
+    def browser_context(self) -> BrowserContext:
+        """
+        Return the Playwright browser context.
+        """
+        if self._lease is None:
+            raise RuntimeError(
+                "Browser context is not initialized. Start the browser first."
+            )
+        return self._lease.context
+
+    def _to_config(self) -> PooledPlaywrightBrowserConfig:
+        """
+        Convert the resource to its configuration.
+        """
+        return PooledPlaywrightBrowserConfig(
+            pool_size=self._pool_size,
+            max_runs_per_browser=self._max_runs_per_browser,
+            headless=self._headless,
+            browser_channel=self._browser_channel,
+            enable_downloads=self._enable_downloads,
+            browser_state=self._browser_state.model_dump()
+            if self._browser_state
+            else None,
+        )
+
+    @classmethod
+    def from_config(
+        cls, config: PooledPlaywrightBrowserConfig
+    ) -> PooledPlaywrightBrowser:
+        return cls(
+            pool_size=config.pool_size,
+            max_runs_per_browser=config.max_runs_per_browser,
+            headless=config.headless,
+            browser_channel=config.browser_channel,
+            enable_downloads=config.enable_downloads,
+            browser_state=BrowserState.model_validate(config.browser_state)
+            if config.browser_state
+            else None,
+        )
@@ -5,6 +5,7 @@ import random
 import json
 import logging
 import hashlib
+import weakref
 from typing import (
     Any,
     Awaitable,
@@ -24,6 +25,7 @@ from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import Download, Page, BrowserContext
 from .utils.animation_utils import AnimationUtilsPlaywright
 from .utils.webpage_text_utils import WebpageTextUtilsPlaywright
+from .utils.page_script_utils import PAGE_SCRIPT_PATH, ensure_page_script, load_page_script
 from ..url_status_manager import UrlStatusManager
 
 from .types import (
@@ -133,24 +135,50 @@ class PlaywrightController:
         self.last_cursor_position = self._animation.last_cursor_position
 
         # Read page_script
-        with open(
-            os.path.join(os.path.abspath(os.path.dirname(__file__)), "page_script.js"),
-            "rt",
-            encoding="utf-8",
-        ) as fh:
-            self._page_script = fh.read()
+        self._page_script = load_page_script()
+
+        # Pages with persistent handlers (download, init script, navigation tracking) installed
+        self._instrumented_pages: "weakref.WeakSet[Page]" = weakref.WeakSet()
+        # Pages that are ready for the current navigation; invalidated on main frame navigation
+        self._ready_pages: "weakref.WeakSet[Page]" = weakref.WeakSet()
 
         # Initialize WebpageTextUtils
         self._text_utils = WebpageTextUtilsPlaywright()
 
+    async def _instrument_page(self, page: Page) -> None:
+        """
+        Install the per-page handlers once: the download handler, the page script as an
+        init script, and the navigation listener that invalidates the page readiness.
+
+        Args:
+            page (Page): The Playwright page object.
+        """
+        if page in self._instrumented_pages:
+            return
+        self._instrumented_pages.add(page)
+
+        page_ref = weakref.ref(page)
+
+        def _on_frame_navigated(frame: Any) -> None:
+            navigated_page = page_ref()
+            if navigated_page is not None and frame == navigated_page.main_frame:
+                self._ready_pages.discard(navigated_page)
+
+        page.on("framenavigated", _on_frame_navigated)
+        page.on("close", lambda closed_page: self._ready_pages.discard(closed_page))
+        page.on("download", self._download_handler)  # type: ignore
+        await page.add_init_script(path=PAGE_SCRIPT_PATH)
+
     async def on_new_page(self, page: Page) -> None:
         """
-        Handle actions to perform on a new page.
+        Handle actions to perform on a new page or after a navigation. The page is then
+        marked as ready until its main frame navigates again.
 
         Args:
             page (Page): The Playwright page object.
         """
         assert page is not None
+        self._ready_pages.discard(page)
 
         awaiting_approval = False
         tentative_url = page.url
@@ -187,7 +215,7 @@ class PlaywrightController:
             # Visit the page if permission has been given
             await self.visit_page(page, tentative_url)
 
-        page.on("download", self._download_handler)  # type: ignore
+        await self._instrument_page(page)
 
         # check if there is a need to resize the viewport
         page_viewport_size = page.viewport_size
@@ -200,20 +228,19 @@ class PlaywrightController:
                 await page.set_viewport_size(
                     {"width": self.viewport_width, "height": self.viewport_height}
                 )
-        await page.add_init_script(
-            path=os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "page_script.js"
-            )
-        )
+        self._ready_pages.add(page)
 
     async def _ensure_page_ready(self, page: Page) -> None:
         """
         Ensure the page is properly configured before performing any action.
+        The full setup in `on_new_page` only runs once per page and navigation.
 
         Args:
             page (Page): The Playwright page object.
         """
         assert page is not None
+        if page in self._ready_pages:
+            return
         await self.on_new_page(page)
 
     async def get_current_url_title(self, page: Page) -> Tuple[str, str]:
@@ -281,10 +308,7 @@ class PlaywrightController:
         """
         await self._ensure_page_ready(page)
         # Read the regions from the DOM
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = cast(
             Dict[str, Dict[str, Any]],
             await page.evaluate("WebSurfer.getInteractiveRects();"),
@@ -310,10 +334,7 @@ class PlaywrightController:
             VisualViewport: The visual viewport of the page.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         return visualviewport_from_dict(
             await page.evaluate("WebSurfer.getVisualViewport();")
         )
@@ -329,10 +350,7 @@ class PlaywrightController:
             str: The ID of the focused element.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getFocusedElementId();")
         return str(result)
 
@@ -347,10 +365,7 @@ class PlaywrightController:
             Dict[str, Any]: A dictionary of page metadata.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getPageMetadata();")
         assert isinstance(result, dict)
         return cast(Dict[str, Any], result)
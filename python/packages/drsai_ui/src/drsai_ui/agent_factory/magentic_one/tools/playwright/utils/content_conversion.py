@@ -0,0 +1,164 @@
+"""
+HTML/PDF to markdown conversion off the event loop.
+
+MarkItDown conversion of a large page or PDF takes seconds of pure CPU, so it runs in a
+process pool; results are cached by (URL, content hash) so revisiting an unchanged page is
+free. Token truncation uses a cached tokenizer and a character-budget pre-cut so only a
+bounded prefix of the text is tokenized.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of characters per token used for the pre-cut, generous enough for long tokens
+_MAX_CHARS_PER_TOKEN = 8
+
+_executor: Optional[Executor] = None
+_markdown_converter: Optional[Any] = None
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(model: str = "gpt-4o") -> tiktoken.Encoding:
+    """Return the (cached) tokenizer for a model."""
+    return tiktoken.encoding_for_model(model)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Limit the text to max_tokens tokens.
+
+    Args:
+        text (str): The text to truncate.
+        max_tokens (int): The maximum number of tokens to keep. -1 means no limit.
+        model (str, optional): The model whose tokenizer is used. Default: "gpt-4o"
+
+    Returns:
+        str: The truncated text.
+    """
+    if max_tokens == -1:
+        return text
+    tokenizer = get_tokenizer(model)
+    char_budget = max_tokens * _MAX_CHARS_PER_TOKEN
+    candidate = text[:char_budget] if len(text) > char_budget else text
+    tokens = tokenizer.encode(candidate)
+    if len(tokens) > max_tokens:
+        return tokenizer.decode(tokens[:max_tokens])
+    if candidate is text:
+        return text
+    # The pre-cut was too short (unusually long tokens), fall back to the full text
+    tokens = tokenizer.encode(text)
+    return tokenizer.decode(tokens[:max_tokens])
+
+
+def _get_worker_converter() -> Any:
+    # One MarkItDown instance per worker process
+    global _markdown_converter
+    if _markdown_converter is None:
+        from markitdown import MarkItDown  # type: ignore
+
+        _markdown_converter = MarkItDown()
+    return _markdown_converter
+
+
+def convert_html_to_markdown(html: str, url: str, max_tokens: int = -1) -> str:
+    """Convert HTML to markdown and truncate it (runs in a worker process)."""
+    res = _get_worker_converter().convert_stream(
+        io.BytesIO(html.encode("utf-8")), file_extension=".html", url=url
+    )  # type: ignore
+    return truncate_to_tokens(res.text_content, max_tokens)  # type: ignore
+
+
+def convert_pdf_to_markdown(pdf_data: bytes) -> str:
+    """Convert PDF bytes to markdown (runs in a worker process)."""
+    res = _get_worker_converter().convert_stream(
+        io.BytesIO(pdf_data), file_extension=".pdf"
+    )  # type: ignore
+    return res.text_content  # type: ignore
+
+
+def get_conversion_executor() -> Executor:
+    """
+    Return the process pool used for conversions. The number of workers can be set with
+    the DRSAI_CONVERSION_WORKERS environment variable. Default: 2
+    """
+    global _executor
+    if _executor is None:
+        # Never fork: the server process runs an event loop plus Playwright and DB threads,
+        # and a forked child can inherit locks held by them and deadlock.
+        start_method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        _executor = ProcessPoolExecutor(
+            max_workers=int(os.getenv("DRSAI_CONVERSION_WORKERS", 2)),
+            mp_context=multiprocessing.get_context(start_method),
+        )
+    return _executor
+
+
+def shutdown_conversion_executor() -> None:
+    """Stop the conversion worker processes (on application shutdown); the next conversion starts a new pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class ConversionCache:
+    """
+    A small LRU cache of conversion results keyed by (URL, content hash, extra key).
+
+    Args:
+        max_entries (int, optional): Maximum number of cached results. Default: 128
+    """
+
+    def __init__(self, max_entries: int = 128) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, Any], str]" = OrderedDict()
+
+    @staticmethod
+    def make_key(url: str, content: str | bytes, extra: Any = None) -> Tuple[str, str, Any]:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return (url, hashlib.sha256(content).hexdigest(), extra)
+
+    def get(self, key: Tuple[str, str, Any]) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple[str, str, Any], value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+conversion_cache = ConversionCache()
+
+
+async def run_conversion(func: Callable[..., str], *args: Any) -> str:
+    """Run a conversion function in the process pool, recreating the pool if a worker died."""
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_conversion_executor(), func, *args)
+    except BrokenProcessPool:
+        logger.warning("Conversion worker pool broke, restarting it")
+        _executor = None
+        return await loop.run_in_executor(get_conversion_executor(), func, *args)
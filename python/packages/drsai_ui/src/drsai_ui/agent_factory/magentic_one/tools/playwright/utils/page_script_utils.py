@@ -0,0 +1,34 @@
+import os
+from functools import lru_cache
+
+from playwright.async_api import Page
+
+PAGE_SCRIPT_PATH = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "..", "page_script.js"
+)
+
+
+@lru_cache(maxsize=1)
+def load_page_script() -> str:
+    """Read page_script.js once per process."""
+    with open(PAGE_SCRIPT_PATH, "rt", encoding="utf-8") as fh:
+        return fh.read()
+
+
+async def ensure_page_script(page: Page) -> None:
+    """
+    Make sure the WebSurfer helpers from page_script.js are available on the page.
+
+    The script is registered as an init script when the page is instrumented, so it is
+    normally already present; this only pays for a cheap presence check and evaluates the
+    full script when it is missing (e.g. pages that were opened before instrumentation).
+
+    Args:
+        page (Page): The Playwright page object.
+    """
+    try:
+        if await page.evaluate("typeof WebSurfer !== 'undefined'"):
+            return
+        await page.evaluate(load_page_script())
+    except Exception:
+        pass
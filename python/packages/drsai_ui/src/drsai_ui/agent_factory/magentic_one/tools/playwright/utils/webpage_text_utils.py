@@ -1,30 +1,25 @@
-import io
-from typing import Any, Optional
 import logging
-import os
-import tempfile
 
-import tiktoken
-from markitdown import MarkItDown  # type: ignore
 from playwright.async_api import Page
 
+from .page_script_utils import ensure_page_script, load_page_script
+from .content_conversion import (
+    conversion_cache,
+    convert_html_to_markdown,
+    convert_pdf_to_markdown,
+    run_conversion,
+    truncate_to_tokens,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class WebpageTextUtilsPlaywright:
     def __init__(self):
-        self._markdown_converter: Optional[Any] | None = None
         self._page_script: str = ""
 
         # Read page_script
-        with open(
-            os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "page_script.js"
-            ),
-            "rt",
-            encoding="utf-8",
-        ) as fh:
-            self._page_script = fh.read()
+        self._page_script = load_page_script()
 
     async def get_all_webpage_text(self, page: Page, n_lines: int = 50) -> str:
         """
@@ -59,10 +54,7 @@ class WebpageTextUtilsPlaywright:
         Returns:
             str: The text content of the page.
         """
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getVisibleText();")
         assert isinstance(result, str)
         return result
@@ -88,31 +80,19 @@ class WebpageTextUtilsPlaywright:
             pdf_content = await self._extract_pdf_content(page)
 
             # Tokenize the PDF content and limit to max_tokens if needed
-            if max_tokens == -1:
-                return pdf_content
-
-            tokenizer = tiktoken.encoding_for_model("gpt-4o")
-            tokens = tokenizer.encode(pdf_content)
-            limited_content = tokenizer.decode(tokens[:max_tokens])
+            return truncate_to_tokens(pdf_content, max_tokens)
 
-            return limited_content
-
-        # Regular webpage processing
-        if self._markdown_converter is None:
-            self._markdown_converter = MarkItDown()
+        # Regular webpage processing, converted in the worker pool and cached by content
+        url = page.url
         html = await page.evaluate("document.documentElement.outerHTML;")
-        res = self._markdown_converter.convert_stream(
-            io.BytesIO(html.encode("utf-8")), file_extension=".html", url=page.url
-        )  # type: ignore
-        text_content = res.text_content  # type: ignore
-
-        # Tokenize the text content and limit to max_tokens
-        if max_tokens == -1:
-            return text_content
-        tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        tokens = tokenizer.encode(text_content)
-        limited_text_content = tokenizer.decode(tokens[:max_tokens])
-
+        cache_key = conversion_cache.make_key(url, html, max_tokens)
+        cached = conversion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        limited_text_content = await run_conversion(
+            convert_html_to_markdown, html, url, max_tokens
+        )
+        conversion_cache.put(cache_key, limited_text_content)
         return limited_text_content
 
     async def _is_pdf_page(self, page: Page) -> bool:
@@ -169,20 +149,14 @@ class WebpageTextUtilsPlaywright:
             pdf_buffer = await page.context.request.get(url)
             pdf_data = await pdf_buffer.body()
 
-            # Save to a temporary file
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-                temp_file_path = temp_file.name
-                temp_file.write(pdf_data)
-
-            # Use MarkItDown to extract content
-            if self._markdown_converter is None:
-                self._markdown_converter = MarkItDown()
-            result = self._markdown_converter.convert(temp_file_path)
-
-            # Clean up the temporary file
-            os.unlink(temp_file_path)
-
-            return result.text_content
+            # Use MarkItDown to extract content in the worker pool
+            cache_key = conversion_cache.make_key(url, pdf_data)
+            cached = conversion_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            text_content = await run_conversion(convert_pdf_to_markdown, pdf_data)
+            conversion_cache.put(cache_key, text_content)
+            return text_content
 
         except Exception as e:
             logger.error(f"Error extracting PDF content: {str(e)}")
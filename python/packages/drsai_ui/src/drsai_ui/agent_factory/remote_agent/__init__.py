@@ -1,6 +1,9 @@
 from .drsai_remote_agent import RemoteAgent
 from .status_agent import StatusAgent
+from .http_session import HTTPSessionRegistry, http_session_registry
 __all__ = [
     "RemoteAgent", 
     "StatusAgent",
+    "HTTPSessionRegistry",
+    "http_session_registry",
     ]
@@ -52,6 +52,9 @@ from autogen_core.tools import (
 
 from ..magentic_one.guarded_action import ApprovalDeniedError
 import aiohttp
+from drsai.utils.oai_stream_event import SSEDecoder, loads
+from drsai.utils.utils import hash_messages
+from .http_session import http_session_registry
 from aiohttp import ClientConnectionError
 
 class RemoteAgent(AssistantAgent):
@@ -74,6 +77,7 @@ class RemoteAgent(AssistantAgent):
             model_remote_configs: Dict[str, Any] = {},
             chat_id: str|None = None,
             run_info: Dict[str, Any] = {},
+            delta_context: bool = False,
             **kwargs):
         
         super().__init__(
@@ -103,16 +107,19 @@ class RemoteAgent(AssistantAgent):
         self.new_headers["Authorization"] = f"Bearer {self.api_key}"
         self.new_headers["Content-Type"] = "application/json"
         self._session = None
+        self._session_key = None
         self._connection_timeout = 60
 
+        # 增量上下文：远端DrSai按chat_id保存了历史，只发送上次确认之后新增的消息和历史的hash
+        self._delta_context = delta_context and chat_id is not None
+        self._acked_messages: List[Dict[str, Any]] | None = None
+        self._acked_hash: str | None = None
+
     async def lazy_init(self, **kwargs: Any) -> None:
         """Initialize the tools and models needed by the agent."""
         if self._session is None:
-            self._session = aiohttp.ClientSession(
-                # base_url=self.url, 如"http://localhost:42807/apiv2"，这里直接在on_messages_stream中使用完整的url
-                headers=self.new_headers,
-                timeout=aiohttp.ClientTimeout(total=self._connection_timeout)
-            )
+            # 同一主机的RemoteAgent共享连接池，headers和timeout在每个请求中传入
+            self._session_key, self._session = await http_session_registry.acquire(self.url)
 
     async def close(self) -> None:
         """Clean up resources used by the agent.
@@ -134,10 +141,10 @@ class RemoteAgent(AssistantAgent):
         if self._model_client:
             await self._model_client.close()
         
-        # 关闭HTTP session
-        if self._session and not self._session.closed:
-            # await asyncio.sleep(0.5)
-            await self._session.close()
+        # 释放共享的HTTP session，最后一个使用者释放时才真正关闭
+        if self._session_key is not None:
+            key, self._session_key, self._session = self._session_key, None, None
+            await http_session_registry.release(key)
         
         logger.info(f"Closed {self.name} successfully.")
 
@@ -223,53 +230,42 @@ class RemoteAgent(AssistantAgent):
             all_messages = await model_context.get_messages()
             llm_messages: List[LLMMessage] = self._get_compatible_context(model_client=model_client, messages=system_messages + all_messages)
             oai_massages = await self.llm_messages2oai_messages(llm_messages)
-            body = {
-                "chat_id": self._chat_id, 
-                "user": self._run_info,
-                "model":agent_name, 
-                "messages": oai_massages
-                }
             
             # try:
 
-            full_response = ""
-            async with self._session.post(
-                self.url,
-                headers=self.new_headers,
-                json=body
-            ) as response:
+            response_parts: List[str] = []
+            async with await self._post_chat_completions(agent_name, oai_massages) as response:
                  
                 self._current_streaming_response = response
 
                 response.raise_for_status()
                 
-                buffer = b''
-                async for chunk in response.content.iter_chunked(1024):
+                decoder = SSEDecoder()
+                async for chunk in response.content.iter_any():
                     
                     # 检查取消和暂停状态
                     if code_execution_token.is_cancelled() or self.is_paused:
                         raise asyncio.CancelledError()
 
-                    buffer += chunk
-                    while b'\n' in buffer:
-                        line_bytes, buffer = buffer.split(b'\n', 1)
-                        line = line_bytes.decode().strip()
-                        
-                        if line.startswith("data: "):
-                            try:
-                                json_str = line[6:]  # 去掉"data: "前缀
-                                oai_json = json.loads(json_str)
-                                # 安全访问嵌套字段
-                                if "choices" in oai_json and len(oai_json["choices"]) > 0:
-                                    delta = oai_json["choices"][0].get("delta", {})
-                                    textchunck = delta.get("content", "")
-                                    if textchunck:
-                                        yield ModelClientStreamingChunkEvent(content=textchunck, source=agent_name)
-                                        full_response += textchunck
-                            except (json.JSONDecodeError, KeyError) as parse_error:
-                                logger.warning(f"Failed to parse SSE data: {str(parse_error)}")
+                    for data in decoder.feed(chunk):
+                        textchunck = self._parse_sse_delta(data)
+                        if textchunck:
+                            yield ModelClientStreamingChunkEvent(content=textchunck, source=agent_name)
+                            response_parts.append(textchunck)
+
+                # 处理未以空行结束的最后一个事件
+                for data in decoder.flush():
+                    textchunck = self._parse_sse_delta(data)
+                    if textchunck:
+                        yield ModelClientStreamingChunkEvent(content=textchunck, source=agent_name)
+                        response_parts.append(textchunck)
 
             self._current_streaming_response = None
+            if self._delta_context:
+                # 远端已保存本轮的完整消息列表，作为下一轮增量请求的基准
+                self._acked_messages = oai_massages
+                self._acked_hash = hash_messages(oai_massages)
+            full_response = "".join(response_parts)
             model_result = CreateResult(
                 content=full_response, 
                 finish_reason="stop",
@@ -385,6 +381,61 @@ class RemoteAgent(AssistantAgent):
             except asyncio.CancelledError:
                 pass
     
+    async def _post_chat_completions(
+        self, agent_name: str, oai_messages: List[Dict[str, Any]]
+    ) -> aiohttp.ClientResponse:
+        """发送chat/completions请求，开启delta_context时优先只发送新增消息，远端历史不一致(409)时回退为完整历史"""
+        body = {
+            "chat_id": self._chat_id, 
+            "user": self._run_info,
+            "model":agent_name, 
+            "messages": oai_messages
+            }
+        timeout = aiohttp.ClientTimeout(total=self._connection_timeout)
+
+        acked = self._acked_messages
+        if (
+            self._delta_context
+            and acked is not None
+            and len(oai_messages) > len(acked)
+            and oai_messages[:len(acked)] == acked
+        ):
+            delta_body = {
+                **body,
+                "messages": oai_messages[len(acked):],
+                "context_mode": "delta",
+                "history_length": len(acked),
+                "history_hash": self._acked_hash,
+            }
+            response = await self._session.post(
+                self.url, headers=self.new_headers, json=delta_body, timeout=timeout
+            )
+            if response.status != 409:
+                return response
+            response.release()
+            logger.debug(f"{self.name}: remote history mismatch, resending the full context")
+
+        self._acked_messages = None
+        self._acked_hash = None
+        return await self._session.post(
+            self.url, headers=self.new_headers, json=body, timeout=timeout
+        )
+
+    @staticmethod
+    def _parse_sse_delta(data: str) -> str | None:
+        """从一个SSE事件的data中提取delta.content"""
+        if data == SSEDecoder.DONE:
+            return None
+        try:
+            oai_json = loads(data)
+            # 安全访问嵌套字段
+            if "choices" in oai_json and len(oai_json["choices"]) > 0:
+                delta = oai_json["choices"][0].get("delta", {})
+                return delta.get("content", "")
+        except (ValueError, KeyError) as parse_error:
+            logger.warning(f"Failed to parse SSE data: {str(parse_error)}")
+        return None
+
     @classmethod
     async def _process_model_result(
         cls,
@@ -0,0 +1,137 @@
+"""
+进程内共享的aiohttp会话注册表：同一主机的RemoteAgent共用一个连接池(keep-alive、DNS缓存)，
+通过引用计数在最后一个使用者close时关闭会话。
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from loguru import logger
+
+
+@dataclass
+class _SessionEntry:
+    session: aiohttp.ClientSession
+    loop: asyncio.AbstractEventLoop
+    refs: int = 0
+
+
+# (事件循环id, scheme, host, port)，aiohttp会话绑定在创建它的事件循环上
+SessionKey = Tuple[int, str, str, Optional[int]]
+
+
+class HTTPSessionRegistry:
+    """
+    按主机共享aiohttp.ClientSession。
+    会话上不设置默认headers和timeout，鉴权头等由每个请求自行传入，因此不同api_key的智能体可以共用连接。
+    Args:
+        limit (int): 每个会话的最大连接数，0表示不限制
+        limit_per_host (int): 每个主机的最大连接数，0表示不限制
+        ttl_dns_cache (int): DNS缓存时间(秒)
+        keepalive_timeout (float): 空闲连接的保持时间(秒)
+    释放时使用acquire返回的键，而不是按url重新计算：释放可能发生在另一个事件循环上。
+    Usage:
+        key, session = await http_session_registry.acquire(url)
+        async with session.post(url, headers=headers, json=body) as response:
+            ...
+        await http_session_registry.release(key)
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        ttl_dns_cache: int = 300,
+        keepalive_timeout: float = 30,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self._entries: Dict[SessionKey, _SessionEntry] = {}
+        # 注册表被多个事件循环(线程)共用，asyncio.Lock只能在一个循环内使用；临界区内没有await，用线程锁保护字典
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        ttl_dns_cache: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+    ) -> None:
+        """修改连接器参数，只对之后新建的会话生效"""
+        if limit is not None:
+            self.limit = limit
+        if limit_per_host is not None:
+            self.limit_per_host = limit_per_host
+        if ttl_dns_cache is not None:
+            self.ttl_dns_cache = ttl_dns_cache
+        if keepalive_timeout is not None:
+            self.keepalive_timeout = keepalive_timeout
+
+    @staticmethod
+    def _key(url: str) -> SessionKey:
+        parts = urlsplit(url)
+        return (id(asyncio.get_running_loop()), parts.scheme, parts.hostname or "", parts.port)
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.ttl_dns_cache,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def acquire(self, url: str) -> Tuple[SessionKey, aiohttp.ClientSession]:
+        """获取url所在主机的共享会话并增加引用计数，返回(释放用的键, 会话)"""
+        loop = asyncio.get_running_loop()
+        key = self._key(url)
+        with self._lock:
+            # 已关闭的事件循环上的会话不能再使用，其id也可能被新的事件循环复用
+            for dead_key in [k for k, e in self._entries.items() if e.loop.is_closed()]:
+                # 无法在已关闭的循环上close，连接随循环释放；detach避免会话回收时报未关闭
+                self._entries.pop(dead_key).session.detach()
+            entry = self._entries.get(key)
+            if entry is None or entry.session.closed:
+                entry = _SessionEntry(session=self._create_session(), loop=loop)
+                self._entries[key] = entry
+            entry.refs += 1
+            return key, entry.session
+
+    async def release(self, key: SessionKey) -> None:
+        """按acquire返回的键减少引用计数，最后一个使用者释放时关闭会话"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            self._entries.pop(key, None)
+        await self._close_session(entry)
+        logger.debug(f"Closed shared HTTP session for {key[1]}://{key[2]}")
+
+    @staticmethod
+    async def _close_session(entry: _SessionEntry) -> None:
+        """在会话所属的事件循环上关闭会话"""
+        if entry.session.closed or entry.loop.is_closed():
+            return
+        if entry.loop is asyncio.get_running_loop():
+            await entry.session.close()
+        elif entry.loop.is_running():
+            asyncio.run_coroutine_threadsafe(entry.session.close(), entry.loop)
+
+    async def close_all(self) -> None:
+        """关闭所有会话(用于进程退出前)，每个会话在其所属的事件循环上关闭"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            await self._close_session(entry)
+
+
+http_session_registry = HTTPSessionRegistry()
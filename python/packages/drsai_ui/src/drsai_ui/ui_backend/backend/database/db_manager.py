@@ -4,7 +4,8 @@ from pathlib import Path
 from typing import Any, List, Optional, Union, Dict
 
 from loguru import logger
-from sqlalchemy import exc, inspect, text
+from pydantic_core import to_jsonable_python
+from sqlalchemy import delete as sa_delete, exc, func, inspect, text
 from sqlmodel import Session, SQLModel, and_, create_engine, select
 
 from ..datamodel import DatabaseModel, Response, Team
@@ -198,6 +199,38 @@ class DatabaseManager:
             data=model.model_dump() if return_json else model,
         )
 
+    def insert_many(self, models: List[DatabaseModel]) -> Response:
+        """Insert a batch of new entities in a single transaction
+
+        Args:
+            models (List[DatabaseModel]): New model instances (without ids) to insert
+
+        Returns:
+            Response: Contains status, message and the number of inserted rows as data
+        """
+        if not models:
+            return Response(message="Nothing to insert", status=True, data=0)
+
+        model_name = type(models[0]).__name__
+        with Session(self.engine) as session:
+            try:
+                session.add_all(models)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error while bulk inserting {model_name}: {e}")
+                return Response(
+                    message=f"Error while bulk inserting {model_name}",
+                    status=False,
+                    data=0,
+                )
+
+        return Response(
+            message=f"{len(models)} {model_name} Created Successfully",
+            status=True,
+            data=len(models),
+        )
+
     def get(
         self,
         model_class: type[DatabaseModel],
@@ -245,6 +278,128 @@ class DatabaseManager:
 
             return Response(message=status_message, status=status, data=result)
 
+    @staticmethod
+    def _conditions(
+        model_class: type[SQLModel], filters: dict[str, Any] | None
+    ) -> List[Any]:
+        """Equality conditions for the filters; list/tuple/set values match any of their items"""
+        conditions: List[Any] = []
+        for col, value in (filters or {}).items():
+            column = getattr(model_class, col)
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(column.in_(list(value)))
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    def query(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        columns: Optional[List[str]] = None,
+        return_json: bool = False,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Response:
+        """List entities with column projection and pagination
+
+        Rows are ordered by id (insertion order) rather than created_at, so that keyset
+        pagination with `after_id` is stable.
+
+        Args:
+            model_class (type[DatabaseModel]): The table to query
+            filters (dict[str, Any], optional): Column filters like `get`; a list/tuple/set value matches any of its items. Default: None.
+            columns (List[str], optional): Only load these columns (`id` is always included) and return each row as a dict. Default: None loads whole rows.
+            return_json (bool, optional): Return JSON-serializable dicts instead of SQLModel instances/raw values. Default: False.
+            order (str, optional): "asc" or "desc" by id. Default: "desc".
+            limit (int, optional): Maximum number of rows. Default: None.
+            offset (int, optional): Number of rows to skip. Default: 0.
+            after_id (int, optional): Keyset cursor, the id of the last row of the previous page. Default: None.
+
+        Returns:
+            Response: Contains status, message and the list of rows as data
+        """
+        with Session(self.engine) as session:
+            result: List[Any] = []
+            status = True
+            status_message = ""
+
+            try:
+                id_column = getattr(model_class, "id")
+                names: List[str] = []
+                if columns:
+                    names = ["id"] + [name for name in columns if name != "id"]
+                    statement = select(*[getattr(model_class, name) for name in names])
+                else:
+                    statement = select(model_class)
+                conditions = self._conditions(model_class, filters)
+                if after_id is not None:
+                    conditions.append(
+                        id_column < after_id if order == "desc" else id_column > after_id
+                    )
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                statement = statement.order_by(getattr(id_column, order)())
+                if offset:
+                    statement = statement.offset(offset)
+                if limit is not None:
+                    statement = statement.limit(limit)
+
+                rows = session.exec(statement).all()
+                if columns:
+                    # A single selected column comes back as scalars
+                    result = [
+                        dict(zip(names, (row,) if len(names) == 1 else row))
+                        for row in rows
+                    ]
+                    if return_json:
+                        result = to_jsonable_python(result)
+                else:
+                    result = [
+                        row.model_dump(mode="json") if return_json else row
+                        for row in rows
+                    ]
+                status_message = f"{model_class.__name__} Retrieved Successfully"
+            except Exception as e:
+                session.rollback()
+                status = False
+                status_message = f"Error while fetching {model_class.__name__}"
+                logger.error(
+                    "Error while querying items: "
+                    + str(model_class.__name__)
+                    + " "
+                    + str(e)
+                )
+
+            return Response(message=status_message, status=status, data=result)
+
+    def count(
+        self, model_class: type[DatabaseModel], filters: dict[str, Any] | None = None
+    ) -> Response:
+        """Count entities matching the filters (same filter syntax as `query`)"""
+        with Session(self.engine) as session:
+            try:
+                statement = select(func.count()).select_from(model_class)
+                conditions = self._conditions(model_class, filters)
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                total = session.exec(statement).one()
+                return Response(
+                    message=f"{model_class.__name__} Counted Successfully",
+                    status=True,
+                    data=total,
+                )
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error while counting {model_class.__name__}: {e}")
+                return Response(
+                    message=f"Error while counting {model_class.__name__}",
+                    status=False,
+                    data=0,
+                )
+
     def delete(
         self, model_class: type[SQLModel], filters: dict[str, Any] | None = None
     ) -> Response:
@@ -289,6 +444,46 @@ class DatabaseManager:
 
         return Response(message=status_message, status=status, data=None)
 
+    def bulk_delete(
+        self,
+        model_class: type[SQLModel],
+        filters: dict[str, Any] | None = None,
+        before_id: Optional[int] = None,
+    ) -> Response:
+        """Delete all rows matching the filters with a single DELETE statement
+
+        Unlike `delete`, rows are not loaded and ORM cascades do not run, so this is meant
+        for append-only tables such as the checkpoint logs.
+
+        Args:
+            model_class (type[SQLModel]): The table to delete from
+            filters (dict[str, Any], optional): Column filters like `query`. Default: None.
+            before_id (int, optional): Only delete rows whose id is smaller. Default: None.
+
+        Returns:
+            Response: Contains status, message and the number of deleted rows as data
+        """
+        with Session(self.engine) as session:
+            try:
+                conditions = self._conditions(model_class, filters)
+                if before_id is not None:
+                    conditions.append(getattr(model_class, "id") < before_id)
+                statement = sa_delete(model_class)
+                if conditions:
+                    statement = statement.where(and_(*conditions))
+                deleted = session.execute(statement).rowcount
+                session.commit()
+                return Response(
+                    message=f"{model_class.__name__} Deleted Successfully",
+                    status=True,
+                    data=deleted,
+                )
+            except Exception as e:
+                session.rollback()
+                status_message = f"Error while deleting: {e}"
+                logger.error(status_message)
+                return Response(message=status_message, status=False, data=0)
+
     async def import_team(
         self,
         team_config: Union[str, Path, Dict[str, Any]],
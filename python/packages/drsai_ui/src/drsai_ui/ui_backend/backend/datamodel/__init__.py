@@ -3,6 +3,7 @@ from .db import (
     Message,
     Plan,
     Run,
+    RunCheckpoint,
     RunStatus,
     Session,
     Settings,
@@ -27,6 +28,7 @@ from .types import (
 __all__ = [
     "Team",
     "Run",
+    "RunCheckpoint",
     "RunStatus",
     "Session",
     "Team",
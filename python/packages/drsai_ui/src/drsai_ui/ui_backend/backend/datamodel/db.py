@@ -6,7 +6,7 @@ from typing import Any, List, Optional, Union
 
 from autogen_core import ComponentModel
 from pydantic import field_serializer
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlmodel import JSON, Column, DateTime, Field, SQLModel, func
 
 from .types import (
@@ -38,7 +38,12 @@ class Team(SQLModel, table=True):
 
 
 class Message(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_message_run_id_created_at", "run_id", "created_at"),
+        Index("ix_message_session_id", "session_id"),
+        Index("ix_message_user_id", "user_id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -67,7 +72,10 @@ class Message(SQLModel, table=True):
 
 
 class Session(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_session_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -103,7 +111,11 @@ class InputType(str, Enum):
 class Run(SQLModel, table=True):
     """Represents a single execution run within a session"""
 
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_run_session_id_created_at", "session_id", "created_at"),
+        Index("ix_run_user_id", "user_id"),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
@@ -151,6 +163,36 @@ class Run(SQLModel, table=True):
             return value.isoformat()
 
 
+class RunCheckpoint(SQLModel, table=True):
+    """Append-only delta checkpoint log of a run's team state (see drsai.utils.state_checkpoint)"""
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column=Column(DateTime(timezone=True), onupdate=func.now()),
+    )
+    run_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(
+            Integer, ForeignKey("run.id", ondelete="CASCADE"), index=True
+        ),
+    )
+    # True: data is a full state, False: data is a delta against the previous checkpoint
+    is_snapshot: bool = False
+    # compress_state() format
+    data: str = ""
+
+    @field_serializer("created_at", "updated_at")
+    def serialize_datetime(cls, value: datetime) -> str:
+        if isinstance(value, datetime):
+            return value.isoformat()
+
+
 class Gallery(SQLModel, table=True):
     __table_args__ = {"sqlite_autoincrement": True}
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -182,7 +224,10 @@ class Gallery(SQLModel, table=True):
 
 
 class Settings(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_settings_user_id", "user_id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -261,7 +306,10 @@ class AgentModeConfig(SQLModel, table=True):
 ### user files
 
 class UserFiles(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_userfiles_user_id_session_id", "user_id", "session_id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -298,4 +346,4 @@ class UserAgents(SQLModel, table=True):
 
 ##
 
-DatabaseModel = Team | Message | Session | Run | Gallery | Settings | Plan | AgentModeSettings | AgentModeConfig
+DatabaseModel = Team | Message | Session | Run | RunCheckpoint | Gallery | Settings | Plan | AgentModeSettings | AgentModeConfig
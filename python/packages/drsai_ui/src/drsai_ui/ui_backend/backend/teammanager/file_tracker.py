@@ -0,0 +1,57 @@
+import time
+from typing import Any, Dict, List, Set
+
+from autogen_agentchat.messages import ModelClientStreamingChunkEvent, ThoughtEvent
+
+from ..utils.utils import get_modified_files
+
+
+class RunFileTracker:
+    """
+    Tracks the files generated in a run directory while a team is streaming.
+
+    The run directory is only rescanned for messages that can create files (tool calls,
+    code execution, agent replies, the final TaskResult); token-level streaming events
+    reuse the last scan, so the cost of file detection does not grow with the number of
+    streamed tokens.
+
+    Args:
+        source_dir (str): Run directory to watch
+        start_timestamp (float): Only files modified after this timestamp are reported
+    """
+
+    # Events that never touch the filesystem and arrive at token rate
+    SKIP_SCAN_TYPES = (ModelClientStreamingChunkEvent, ThoughtEvent)
+
+    def __init__(self, source_dir: str, start_timestamp: float) -> None:
+        self.source_dir = source_dir
+        self.start_timestamp = start_timestamp
+        self.modified_files: List[Dict[str, str]] = []
+        self._known_files: Set[str] = set()
+
+    def needs_scan(self, message: Any) -> bool:
+        return not isinstance(message, self.SKIP_SCAN_TYPES)
+
+    def scan(self) -> List[Dict[str, str]]:
+        """Rescan the run directory and return all files modified since the start"""
+        self.modified_files = get_modified_files(
+            self.start_timestamp, time.time(), source_dir=self.source_dir
+        )
+        return self.modified_files
+
+    def reset_known_files(self) -> None:
+        """Mark the files currently in the run directory as already reported"""
+        self._known_files = {file["name"] for file in self.scan()}
+
+    def poll(self, message: Any) -> List[Dict[str, str]]:
+        """
+        Return the files that appeared since the previous scan, rescanning only if
+        `message` may have produced files.
+        """
+        if not self.needs_scan(message):
+            return []
+        modified_files = self.scan()
+        current_file_names = {file["name"] for file in modified_files}
+        new_file_names = current_file_names - self._known_files
+        self._known_files = current_file_names
+        return [file for file in modified_files if file["name"] in new_file_names]
@@ -30,7 +30,7 @@ from ...input_func import InputFuncType
 
 from ..datamodel.types import EnvironmentVariable, LLMCallEventMessage, TeamResult
 from ..datamodel.db import Run
-from ..utils.utils import get_modified_files
+from .file_tracker import RunFileTracker
 
 from ....agent_factory.magentic_one.task_team import create_magentic_one_team, create_magentic_round_team
 
@@ -349,11 +349,8 @@ class TeamManager:
         logger.handlers = [llm_event_logger]  # Replace all handlers
         logger.info(f"Running in docker: {self.inside_docker}")
         paths = self.prepare_run_paths(run=run)
-        known_files = set(
-            file["name"]
-            for file in get_modified_files(
-                0, time.time(), source_dir=str(paths.internal_run_dir)
-            )
+        file_tracker = RunFileTracker(
+            source_dir=str(paths.internal_run_dir), start_timestamp=start_time
         )
         global_new_files: List[Dict[str, str]] = []
         try:
@@ -375,10 +372,7 @@ class TeamManager:
                 )
 
                 # Initialize known files by name for tracking
-                initial_files = get_modified_files(
-                    start_time, time.time(), source_dir=str(paths.internal_run_dir)
-                )
-                known_files = {file["name"] for file in initial_files}
+                file_tracker.reset_known_files()
 
                
                 if self.mode in ["magentic-one"]:
@@ -401,22 +395,9 @@ class TeamManager:
                     if cancellation_token and cancellation_token.is_cancelled():
                         break
 
-                    # Get all current files with full metadata
-                    modified_files = get_modified_files(
-                        start_time, time.time(), source_dir=str(paths.internal_run_dir)
-                    )
-                    current_file_names = {file["name"] for file in modified_files}
-
-                    # Find new files
-                    new_file_names = current_file_names - known_files
-                    known_files = current_file_names  # Update for next iteration
-
-                    # Get the full data for new files
-                    new_files = [
-                        file
-                        for file in modified_files
-                        if file["name"] in new_file_names
-                    ]
+                    # Find new files, the run directory is only rescanned for
+                    # messages that can create files (not for streamed tokens)
+                    new_files = file_tracker.poll(message)
 
                     if new_files:
                         # filter files that start with "tmp_code"
@@ -443,7 +424,7 @@ class TeamManager:
                             task_result=message,
                             usage="",
                             duration=time.time() - start_time,
-                            files=modified_files,  # Full file data preserved
+                            files=file_tracker.modified_files,  # Full file data preserved
                         )
                     else:
                         yield message
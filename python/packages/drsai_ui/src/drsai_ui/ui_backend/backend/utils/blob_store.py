@@ -0,0 +1,163 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Set
+
+from loguru import logger
+
+# Key of the reference object that replaces an externalized image in the state
+BLOB_REF_KEY = "$blob"
+
+
+class BlobStore:
+    """
+    Content-addressed on-disk store for the images embedded in run state.
+
+    `autogen_core.Image` serializes to `{"data": <base64>}`, so every screenshot kept in
+    e.g. the orchestrator's message history would otherwise be written (and compressed)
+    again on every checkpoint. `store_state` swaps those payloads for `{"$blob": <sha256>}`
+    references and writes each distinct image once, shared across checkpoints and runs;
+    `load_state` reads them back only when a run is resumed. Every run records the blobs
+    its latest checkpoint references, and `release_runs` garbage-collects the blobs no
+    remaining run references.
+
+    Layout:
+        <root>/objects/<sha[:2]>/<sha>   raw image bytes
+        <root>/refs/<run_id>.json        digests referenced by the run's latest checkpoint
+
+    Args:
+        root (Path): Directory of the store.
+        min_size (int, optional): Only base64 payloads at least this long are externalized. Default: 4096
+    """
+
+    def __init__(self, root: Path, min_size: int = 4096) -> None:
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.refs_dir = self.root / "refs"
+        self.min_size = min_size
+        # Digests known to be on disk, saves a stat() per image per checkpoint
+        self._known: Set[str] = set()
+        # Serializes writes/ref updates against garbage collection
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _refs_path(self, run_id: int) -> Path:
+        return self.refs_dir / f"{run_id}.json"
+
+    def put(self, data: str) -> str | None:
+        """
+        Store a base64 payload and return its digest, or None if it is not canonical
+        base64 (it could not be restored byte for byte and is kept inline).
+        """
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        if base64.b64encode(raw).decode("ascii") != data:
+            return None
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest in self._known:
+            return digest
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(raw)
+            os.replace(tmp_path, path)
+        self._known.add(digest)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Return the base64 payload of a blob."""
+        return base64.b64encode(self._object_path(digest).read_bytes()).decode("ascii")
+
+    def _externalize(self, value: Any, digests: Set[str]) -> Any:
+        if isinstance(value, dict):
+            data = value.get("data")
+            if (
+                len(value) == 1
+                and isinstance(data, str)
+                and len(data) >= self.min_size
+            ):
+                digest = self.put(data)
+                if digest is not None:
+                    digests.add(digest)
+                    return {BLOB_REF_KEY: digest}
+            return {k: self._externalize(v, digests) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(v, digests) for v in value]
+        return value
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            digest = value.get(BLOB_REF_KEY)
+            if len(value) == 1 and isinstance(digest, str):
+                return {"data": self.get(digest)}
+            return {k: self._resolve(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(v) for v in value]
+        return value
+
+    def store_state(self, run_id: int, state: Any) -> Any:
+        """
+        Externalize the images of a checkpoint and record them as referenced by the run.
+
+        Returns:
+            The state with image payloads replaced by blob references.
+        """
+        digests: Set[str] = set()
+        with self._lock:
+            stored = self._externalize(state, digests)
+            self.refs_dir.mkdir(parents=True, exist_ok=True)
+            refs_path = self._refs_path(run_id)
+            tmp_path = refs_path.with_name(f"{refs_path.name}.tmp")
+            tmp_path.write_text(json.dumps(sorted(digests)))
+            os.replace(tmp_path, refs_path)
+        return stored
+
+    def load_state(self, state: Any) -> Any:
+        """Replace blob references in a stored state with the image payloads."""
+        return self._resolve(state)
+
+    def release_runs(self, run_ids: Iterable[int]) -> int:
+        """
+        Forget the references of deleted runs and delete the blobs no other run uses.
+
+        Returns:
+            int: The number of deleted blobs.
+        """
+        with self._lock:
+            for run_id in run_ids:
+                self._refs_path(run_id).unlink(missing_ok=True)
+            return self._collect_garbage()
+
+    def _collect_garbage(self) -> int:
+        """Mark-and-sweep over the run reference files (the lock must be held)."""
+        if not self.objects_dir.exists():
+            return 0
+        live: Set[str] = set()
+        if self.refs_dir.exists():
+            for refs_path in self.refs_dir.glob("*.json"):
+                try:
+                    live.update(json.loads(refs_path.read_text()))
+                except (OSError, ValueError) as e:
+                    # Keep everything rather than risk deleting blobs of a live run
+                    logger.warning(f"Unreadable blob refs {refs_path}, skipping GC: {e}")
+                    return 0
+        deleted = 0
+        for path in self.objects_dir.glob("*/*"):
+            if path.name.endswith(".tmp") or path.name in live:
+                continue
+            try:
+                path.unlink()
+                deleted += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete blob {path}: {e}")
+            self._known.discard(path.name)
+        return deleted
@@ -8,6 +8,9 @@ from fastapi import HTTPException, status
 from ..database import DatabaseManager
 from .config import settings
 from .managers.connection import WebSocketManager
+from ....agent_factory.components.tools.mcp_session_manager import mcp_session_manager
+from ....agent_factory.magentic_one.tools.playwright.browser import close_browser_pools
+from ....agent_factory.magentic_one.tools.playwright.utils.content_conversion import shutdown_conversion_executor
 
 logger = logging.getLogger(__name__)
 
@@ -120,6 +123,21 @@ async def cleanup_managers() -> None:
     # TeamManager doesn't need explicit cleanup since WebSocketManager handles it
     _team_manager = None
 
+    # Stop the shared MCP servers started by agent factories
+    try:
+        await mcp_session_manager.close_all()
+    except Exception as e:
+        logger.error(f"Error closing MCP servers: {str(e)}")
+
+    # Stop the pooled Chromium processes shared by the web surfers
+    try:
+        await close_browser_pools()
+    except Exception as e:
+        logger.error(f"Error closing browser pools: {str(e)}")
+
+    # Stop the page/PDF conversion worker processes
+    shutdown_conversion_executor()
+
     # Cleanup database manager last
     if _db_manager:
         try:
@@ -21,6 +21,7 @@ from ....input_func import InputFuncType, InputRequestType
 from autogen_core import CancellationToken
 from fastapi import WebSocket, WebSocketDisconnect
 from pathlib import Path
+from drsai.utils.state_checkpoint import CheckpointLog
 from ....types import CheckpointEvent
 from ...database import DatabaseManager
 from ...datamodel import (
@@ -28,13 +29,16 @@ from ...datamodel import (
     Message,
     MessageConfig,
     Run,
+    RunCheckpoint,
     RunStatus,
     Settings,
     SettingsConfig,
     TeamResult,
 )
 from ...teammanager import TeamManager
-from ...utils.utils import compress_state, decompress_state
+from ...utils.blob_store import BlobStore
+from ...utils.utils import decompress_state
+from .message_buffer import MessageWriteBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +53,10 @@ class WebSocketManager:
         external_workspace_root (Path): Path to the external root directory
         inside_docker (bool): Flag indicating if the application is running inside Docker
         config (dict): Configuration for Magentic-UI
+        message_batch_size (int, optional): Number of streamed messages written per bulk insert. Default: 50
+        message_flush_interval (float, optional): Maximum seconds a streamed message waits before being written. Default: 1.0
+        blob_store (BlobStore, optional): Store for the images of checkpointed states. Default: a store in `<internal_workspace_root>/blobs`
+        checkpoint_snapshot_interval (int, optional): Write a full state snapshot every this many delta checkpoints. Default: 20
     """
 
     def __init__(
@@ -58,6 +66,10 @@ class WebSocketManager:
         external_workspace_root: Path,
         inside_docker: bool,
         config: Dict[str, Any],
+        message_batch_size: int = 50,
+        message_flush_interval: float = 1.0,
+        blob_store: Optional[BlobStore] = None,
+        checkpoint_snapshot_interval: int = 20,
     ):
         self.db_manager = db_manager
         self.internal_workspace_root = internal_workspace_root
@@ -70,6 +82,15 @@ class WebSocketManager:
         self._closed_connections: set[int] = set()
         self._input_responses: Dict[int, asyncio.Queue[str]] = {}
         self._team_managers: Dict[int, TeamManager] = {}
+        self._message_buffers: Dict[int, MessageWriteBuffer] = {}
+        self.message_batch_size = message_batch_size
+        self.message_flush_interval = message_flush_interval
+        self.blob_store = blob_store or BlobStore(
+            Path(internal_workspace_root) / "blobs"
+        )
+        self.checkpoint_log = CheckpointLog(
+            db_manager, RunCheckpoint, snapshot_interval=checkpoint_snapshot_interval
+        )
         self._cancel_message = TeamResult(
             task_result=TaskResult(
                 messages=[TextMessage(source="user", content="Run cancelled by user")],
@@ -79,6 +100,11 @@ class WebSocketManager:
             duration=0,
         ).model_dump()
 
+    def _save_checkpoint(self, run_id: int, state: str) -> None:
+        """Move the images of a checkpoint into the blob store and append the rest to the run's checkpoint log"""
+        state_dict = self.blob_store.store_state(run_id, json.loads(state))
+        self.checkpoint_log.save({"run_id": run_id}, state_dict)
+
     def _get_stop_message(self, reason: str) -> dict[str, Any]:
         return TeamResult(
             task_result=TaskResult(
@@ -169,7 +195,11 @@ class WebSocketManager:
             if run:
                 run.task = MessageConfig(content=task, source="user").model_dump()
                 run.status = RunStatus.ACTIVE
-                state = run.state
+                state = await asyncio.to_thread(
+                    self.checkpoint_log.load, {"run_id": run_id}
+                )
+                # Runs checkpointed before the log existed keep their state in Run.state
+                state = state or run.state
                 self.db_manager.upsert(run)
                 await self._update_run_status(run_id, RunStatus.ACTIVE)
 
@@ -183,7 +213,11 @@ class WebSocketManager:
                         state_dict_decompress = json.loads(state)
                 else:
                     state_dict_decompress = state
-
+                if state_dict_decompress:
+                    # Images of the checkpoint live in the blob store
+                    state_dict_decompress = await asyncio.to_thread(
+                        self.blob_store.load_state, state_dict_decompress
+                    )
 
             # add task as message
             if isinstance(task, str):
@@ -237,12 +271,10 @@ class WebSocketManager:
 
                 if isinstance(message, CheckpointEvent):
                     # Save state to run
-                    run = await self._get_run(run_id)
-                    if run:
-                        # Use compress_state utility to compress the state
-                        state_dict = json.loads(message.state)
-                        run.state = compress_state(state_dict)
-                        self.db_manager.upsert(run)
+                    # Externalizing images, diffing and compressing is CPU/IO bound, keep it off the loop
+                    await asyncio.to_thread(
+                        self._save_checkpoint, run_id, message.state
+                    )
                     continue
 
                 # do not show internal messages
@@ -275,6 +307,8 @@ class WebSocketManager:
                     elif isinstance(message, TeamResult):
                         final_result = message.model_dump()
                     self._team_managers[run_id] = team_manager  # Track the team manager
+            # Persist the last messages before the client is told the run has finished
+            await self._flush_messages(run_id, close=True)
             if (
                 not cancellation_token.is_cancelled()
                 and run_id not in self._closed_connections
@@ -308,6 +342,7 @@ class WebSocketManager:
             traceback.print_exc()
             await self._handle_stream_error(run_id, e)
         finally:
+            await self._flush_messages(run_id, close=True)
             self._cancellation_tokens.pop(run_id, None)
             self._team_managers.pop(run_id, None)  # Remove the team manager when done
 
@@ -315,23 +350,49 @@ class WebSocketManager:
         self, run_id: int, message: Union[AgentEvent | ChatMessage, LLMCallEventMessage]
     ) -> None:
         """
-        Save a message to the database
+        Queue a message in the run's write-behind buffer, which writes it to the database
+        in batches
 
         Args:
             run_id (int): ID of the run
             message (Union[AgentEvent | ChatMessage, LLMCallEventMessage]): Message to save
         """
-
-        run = await self._get_run(run_id)
-        if run:
-            db_message = Message(
-                created_at=datetime.now(),
-                session_id=run.session_id,
+        buffer = self._message_buffers.get(run_id)
+        if buffer is None:
+            # Look up the run once and cache its session/user for all later messages;
+            # only those columns are loaded, not the state/team_result of the run
+            response = self.db_manager.query(
+                Run, filters={"id": run_id}, columns=["session_id", "user_id"], limit=1
+            )
+            if not response.status or not response.data:
+                return
+            run_info = response.data[0]
+            buffer = MessageWriteBuffer(
+                db_manager=self.db_manager,
                 run_id=run_id,
-                config=message.model_dump(),
-                user_id=run.user_id,  # Pass the user_id from the run object
+                session_id=run_info["session_id"],
+                user_id=run_info["user_id"],
+                max_size=self.message_batch_size,
+                flush_interval=self.message_flush_interval,
             )
-            self.db_manager.upsert(db_message)
+            self._message_buffers[run_id] = buffer
+        await buffer.add(message)
+
+    async def _flush_messages(self, run_id: int, close: bool = False) -> None:
+        """
+        Write all buffered messages of a run to the database
+
+        Args:
+            run_id (int): ID of the run
+            close (bool, optional): If True, also drop the run's buffer. Default: False
+        """
+        buffer = (
+            self._message_buffers.pop(run_id, None)
+            if close
+            else self._message_buffers.get(run_id)
+        )
+        if buffer is not None:
+            await buffer.flush()
 
     async def _update_run(
         self,
@@ -378,6 +439,9 @@ class WebSocketManager:
                 # resume run if it is paused
                 await self.resume_run(run_id)
 
+                # persist streamed messages before blocking on the user
+                await self._flush_messages(run_id)
+
                 # update run status to awaiting_input
                 await self._update_run_status(run_id, RunStatus.AWAITING_INPUT)
                 # Send input request to client
@@ -460,7 +524,8 @@ class WebSocketManager:
             stop_message = self._get_stop_message(reason)
 
             try:
-                # Update run record first
+                # Persist buffered messages and update run record first
+                await self._flush_messages(run_id)
                 await self._update_run(
                     run_id, status=RunStatus.STOPPED, team_result=stop_message
                 )
@@ -548,6 +613,8 @@ class WebSocketManager:
             run_id (int): ID of the run
             error (Exception): Exception that occurred
         """
+        # Persist the messages streamed before the error ahead of the final status
+        await self._flush_messages(run_id, close=True)
         if run_id not in self._closed_connections:
             error_result = TeamResult(
                 task_result=TaskResult(
@@ -705,6 +772,10 @@ class WebSocketManager:
                     run.team_result = interrupted_result
                     self.db_manager.upsert(run)
 
+            # Persist any buffered messages
+            for run_id in list(self._message_buffers.keys()):
+                await self._flush_messages(run_id, close=True)
+
             # Then disconnect all websockets with timeout
             # 10 second timeout for entire cleanup
             async def disconnect_all():
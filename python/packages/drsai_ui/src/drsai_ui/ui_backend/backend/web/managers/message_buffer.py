@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Union
+
+from autogen_agentchat.messages import AgentEvent, ChatMessage
+
+from ...database import DatabaseManager
+from ...datamodel import LLMCallEventMessage, Message
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for the messages streamed by a single run.
+
+    The run's session_id and user_id are resolved once when the buffer is created,
+    messages are accumulated in memory and written with one bulk insert when the
+    buffer reaches `max_size`, when `flush_interval` seconds have passed since the
+    first pending message, or when `flush` is called explicitly (run completion,
+    cancellation or waiting for user input). The insert runs in a worker thread; a
+    batch that fails to insert stays pending and is retried after `flush_interval`.
+
+    Args:
+        db_manager (DatabaseManager): Database manager used for the bulk inserts
+        run_id (int): ID of the run the messages belong to
+        session_id (int, optional): Session of the run
+        user_id (str, optional): Owner of the run
+        max_size (int, optional): Number of pending messages that triggers a flush. Default: 50
+        flush_interval (float, optional): Maximum seconds a message stays pending. Default: 1.0
+        max_retries (int, optional): Failed inserts retried before the pending messages are dropped. Default: 5
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        run_id: int,
+        session_id: Optional[int],
+        user_id: Optional[str],
+        max_size: int = 50,
+        flush_interval: float = 1.0,
+        max_retries: int = 5,
+    ) -> None:
+        self.db_manager = db_manager
+        self.run_id = run_id
+        self.session_id = session_id
+        self.user_id = user_id
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._failures = 0
+        self._pending: List[Message] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task[None]] = None
+
+    async def add(
+        self, message: Union[AgentEvent | ChatMessage, LLMCallEventMessage]
+    ) -> None:
+        """Buffer a message, flushing if the size threshold is reached"""
+        self._pending.append(
+            Message(
+                # Timestamp at buffering time keeps the original message order
+                created_at=datetime.now(),
+                session_id=self.session_id,
+                run_id=self.run_id,
+                config=message.model_dump(),
+                user_id=self.user_id,
+            )
+        )
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_after_interval())
+
+    async def flush(self) -> None:
+        """Write all pending messages with a single bulk insert"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                response = await asyncio.to_thread(self.db_manager.insert_many, batch)
+                error = None if response.status else response.message
+            except Exception as e:
+                error = str(e)
+            if error is None:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures > self.max_retries:
+                logger.error(
+                    f"Dropping {len(batch)} messages for run {self.run_id} after {self.max_retries} retries: {error}"
+                )
+                self._failures = 0
+                return
+            # Keep the batch ahead of the messages buffered meanwhile and retry later
+            self._pending[:0] = batch
+            logger.error(
+                f"Failed to save {len(batch)} messages for run {self.run_id}, retrying: {error}"
+            )
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_after_interval())
+
+    async def _flush_after_interval(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            return
+        # Once flushing, the timer must not be cancelled in the middle of an insert
+        if self._timer is asyncio.current_task():
+            self._timer = None
+        await self.flush()
+
+    def __len__(self) -> int:
+        return len(self._pending)
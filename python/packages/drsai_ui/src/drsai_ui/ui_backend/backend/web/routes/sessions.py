@@ -1,20 +1,53 @@
 # api/routes/sessions.py
-from typing import Dict
+import asyncio
+import json
+from typing import Any, Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from loguru import logger
+from pydantic_core import to_jsonable_python
 
 from ...datamodel import Message, Run, Session, RunStatus
-from ..deps import get_db
+from ..deps import get_db, get_websocket_manager
 
 router = APIRouter()
 
+# Run columns shown in the session history (never the checkpoint state)
+_RUN_HISTORY_COLUMNS = ["created_at", "status", "task", "team_result", "input_request"]
+_MESSAGE_QUERY_CHUNK = 500
+
 
 @router.get("/")
-async def list_sessions(user_id: str, db=Depends(get_db)) -> Dict:
-    """List all sessions for a user"""
-    response = db.get(Session, filters={"user_id": user_id})
-    return {"status": True, "data": response.data}
+async def list_sessions(
+    user_id: str,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    db=Depends(get_db),
+) -> Dict:
+    """List all sessions for a user, newest first
+
+    With `limit`, one page is returned together with the total count and the
+    `next_cursor` to pass as `after_id` for the next page (None on the last page).
+    """
+    if limit is None and after_id is None:
+        response = db.get(Session, filters={"user_id": user_id})
+        return {"status": True, "data": response.data}
+
+    response = db.query(
+        Session, filters={"user_id": user_id}, limit=limit, after_id=after_id
+    )
+    if not response.status:
+        raise HTTPException(status_code=500, detail=response.message)
+    sessions = response.data
+    total = db.count(Session, filters={"user_id": user_id}).data
+    next_cursor = sessions[-1].id if limit and len(sessions) == limit else None
+    return {
+        "status": True,
+        "data": sessions,
+        "total": total,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/{session_id}")
@@ -78,85 +111,98 @@ async def update_session(
 
 
 @router.delete("/{session_id}")
-async def delete_session(session_id: int, user_id: str, db=Depends(get_db)) -> Dict:
+async def delete_session(
+    session_id: int,
+    user_id: str,
+    db=Depends(get_db),
+    ws_manager=Depends(get_websocket_manager),
+) -> Dict:
     """Delete a session and all its associated runs and messages"""
+    # Collect the runs first so their checkpoint images can be garbage-collected
+    run_ids = []
+    session = db.get(Session, filters={"id": session_id, "user_id": user_id})
+    if session.status and session.data:
+        runs = db.get(Run, filters={"session_id": session_id}, return_json=False)
+        if runs.status and runs.data:
+            run_ids = [run.id for run in runs.data]
+
     # Delete the session
     db.delete(filters={"id": session_id, "user_id": user_id}, model_class=Session)
 
+    if run_ids:
+        try:
+            await asyncio.to_thread(ws_manager.blob_store.release_runs, run_ids)
+        except Exception as e:
+            logger.warning(f"Failed to release blobs of session {session_id}: {e}")
+
     return {"status": True, "message": "Session deleted successfully"}
 
 
+def _verify_session(db: Any, session_id: int, user_id: str) -> None:
+    """Raise a 404 unless the session exists and belongs to the user"""
+    session = db.query(
+        Session, filters={"id": session_id, "user_id": user_id}, columns=["id"], limit=1
+    )
+    if not session.status:
+        raise HTTPException(
+            status_code=500, detail="Database error while fetching session"
+        )
+    if not session.data:
+        raise HTTPException(
+            status_code=404, detail="Session not found or access denied"
+        )
+
+
+def _group_messages(db: Any, run_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Load the messages of several runs with one query per chunk of runs, grouped by run in creation order"""
+    grouped: Dict[int, List[Dict[str, Any]]] = {run_id: [] for run_id in run_ids}
+    # Chunk the IN list to stay below the bound-parameter limit of the database
+    for start in range(0, len(run_ids), _MESSAGE_QUERY_CHUNK):
+        messages = db.query(
+            Message,
+            filters={"run_id": run_ids[start : start + _MESSAGE_QUERY_CHUNK]},
+            order="asc",
+            return_json=True,
+        )
+        if not messages.status:
+            raise HTTPException(
+                status_code=500, detail="Database error while fetching messages"
+            )
+        for message in messages.data:
+            grouped[message["run_id"]].append(message)
+    return grouped
+
+
 @router.get("/{session_id}/runs")
 async def list_session_runs(session_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Get complete session history organized by runs"""
 
     try:
         # 1. Verify session exists and belongs to user
-        session = db.get(
-            Session, filters={"id": session_id, "user_id": user_id}, return_json=False
-        )
-        if not session.status:
-            raise HTTPException(
-                status_code=500, detail="Database error while fetching session"
-            )
-        if not session.data:
-            raise HTTPException(
-                status_code=404, detail="Session not found or access denied"
-            )
+        _verify_session(db, session_id, user_id)
 
-        # 2. Get ordered runs for session
-        runs = db.get(
-            Run, filters={"session_id": session_id}, order="asc", return_json=False
+        # 2. Get ordered runs for session, without their state
+        runs = db.query(
+            Run,
+            filters={"session_id": session_id},
+            columns=_RUN_HISTORY_COLUMNS,
+            order="asc",
         )
         if not runs.status:
             raise HTTPException(
                 status_code=500, detail="Database error while fetching runs"
             )
 
-        # 3. Build response with messages per run
-        run_data = []
-        if runs.data:  # It's ok to have no runs
-            for run in runs.data:
-                try:
-                    # Get messages for this specific run
-                    messages = db.get(
-                        Message,
-                        filters={"run_id": run.id},
-                        order="asc",
-                        return_json=False,
-                    )
-                    if not messages.status:
-                        logger.error(f"Failed to fetch messages for run {run.id}")
-                        # Continue processing other runs even if one fails
-                        messages.data = []
-
-                    run_data.append(
-                        {
-                            "id": str(run.id),
-                            "created_at": run.created_at,
-                            "status": run.status,
-                            "task": run.task,
-                            "team_result": run.team_result,
-                            "messages": messages.data or [],
-                            "input_request": getattr(run, "input_request", None),
-                        }
-                    )
-                except Exception as e:
-                    logger.error(f"Error processing run {run.id}: {str(e)}")
-                    # Include run with error state instead of failing entirely
-                    run_data.append(
-                        {
-                            "id": str(run.id),
-                            "created_at": run.created_at,
-                            "status": "ERROR",
-                            "task": run.task,
-                            "team_result": None,
-                            "messages": [],
-                            "error": f"Failed to process run: {str(e)}",
-                            "input_request": getattr(run, "input_request", None),
-                        }
-                    )
-
+        # 3. Get the messages of all runs at once
+        messages = _group_messages(db, [run["id"] for run in runs.data])
+        run_data = [
+            {
+                **run,
+                "id": str(run["id"]),
+                "messages": messages[run["id"]],
+            }
+            for run in runs.data
+        ]
         return {"status": True, "data": {"runs": run_data}}
 
     except HTTPException:
@@ -166,3 +212,96 @@ async def list_session_runs(session_id: int, user_id: str, db=Depends(get_db)) -
         raise HTTPException(
             status_code=500, detail="Internal server error while fetching session data"
         ) from e
+
+
+def _stream_history(
+    runs: List[Dict[str, Any]],
+    messages: Optional[Dict[int, List[Dict[str, Any]]]],
+    next_cursor: Optional[int],
+) -> Iterator[str]:
+    """Serialize the history one run at a time instead of building the whole document"""
+    yield '{"status": true, "data": {"runs": ['
+    for index, run in enumerate(runs):
+        entry = {**run, "id": str(run["id"])}
+        if messages is not None:
+            entry["messages"] = messages[run["id"]]
+        yield ("," if index else "") + json.dumps(
+            to_jsonable_python(entry), ensure_ascii=False
+        )
+    yield '], "next_cursor": ' + json.dumps(next_cursor) + "}}"
+
+
+@router.get("/{session_id}/history")
+async def get_session_history(
+    session_id: int,
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    after_id: Optional[int] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_messages: bool = True,
+    db=Depends(get_db),
+) -> StreamingResponse:
+    """Get one page of the session history
+
+    Loads a page of runs and (unless `include_messages` is false) all their messages in
+    two queries and streams the JSON. `next_cursor` is passed as `after_id` to get the
+    next page; it is null on the last page. Without messages, the messages of a run can be
+    loaded on demand from `/{session_id}/runs/{run_id}/messages`.
+    """
+    _verify_session(db, session_id, user_id)
+    runs = db.query(
+        Run,
+        filters={"session_id": session_id},
+        columns=_RUN_HISTORY_COLUMNS,
+        order=order,
+        limit=limit,
+        after_id=after_id,
+    )
+    if not runs.status:
+        raise HTTPException(status_code=500, detail="Database error while fetching runs")
+
+    messages = (
+        _group_messages(db, [run["id"] for run in runs.data])
+        if include_messages
+        else None
+    )
+    next_cursor = runs.data[-1]["id"] if len(runs.data) == limit else None
+    return StreamingResponse(
+        _stream_history(runs.data, messages, next_cursor),
+        media_type="application/json",
+    )
+
+
+@router.get("/{session_id}/runs/{run_id}/messages")
+async def list_run_messages(
+    session_id: int,
+    run_id: int,
+    user_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after_id: Optional[int] = None,
+    db=Depends(get_db),
+) -> Dict:
+    """Get the messages of one run of the session, oldest first, optionally paginated"""
+    _verify_session(db, session_id, user_id)
+    run = db.query(
+        Run, filters={"id": run_id, "session_id": session_id}, columns=["id"], limit=1
+    )
+    if not run.status or not run.data:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    messages = db.query(
+        Message,
+        filters={"run_id": run_id},
+        order="asc",
+        limit=limit,
+        after_id=after_id,
+        return_json=True,
+    )
+    if not messages.status:
+        raise HTTPException(
+            status_code=500, detail="Database error while fetching messages"
+        )
+    next_cursor = (
+        messages.data[-1]["id"] if limit and len(messages.data) == limit else None
+    )
+    return {"status": True, "data": messages.data, "next_cursor": next_cursor}
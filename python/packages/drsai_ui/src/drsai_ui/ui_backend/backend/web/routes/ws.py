@@ -28,7 +28,7 @@ async def run_websocket(
     - file_info: 用户在当前聊天界面上传的信息，post后直接返回
     """
     # Verify run exists and is in valid state
-    run_response = db.get(Run, filters={"id": run_id}, return_json=False)
+    run_response = db.query(Run, filters={"id": run_id}, columns=["id"], limit=1)
     if not run_response.status or not run_response.data:
         logger.warning(f"Run not found: {run_id}")
         await websocket.close(code=4004, reason="Run not found")
@@ -0,0 +1,31 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from autogen_core import CancellationToken
+from autogen_core.code_executor import CodeBlock
+from autogen_ext.code_executors.local import LocalCommandLineCodeExecutor
+
+from drsai_ui.agent_factory.magentic_one.agents._kernel_executor import PythonKernelExecutor
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(shutil.which("printf") is None, reason="needs the printf command")
+async def test_child_output_without_newline_keeps_kernel(tmp_path: Path) -> None:
+    executor = PythonKernelExecutor(tmp_path, LocalCommandLineCodeExecutor(work_dir=tmp_path), timeout=10)
+    try:
+        result = await executor.execute_code_blocks(
+            [CodeBlock(code="import subprocess\nx = 1\nsubprocess.run(['printf', 'abc'])", language="python")],
+            CancellationToken(),
+        )
+        assert result.exit_code == 0
+        assert result.output == "abc"
+
+        # The kernel was not restarted, so the variable is still defined
+        result = await executor.execute_code_blocks(
+            [CodeBlock(code="print(x)", language="python")], CancellationToken()
+        )
+        assert result.exit_code == 0
+        assert result.output == "1\n"
+    finally:
+        await executor.stop()
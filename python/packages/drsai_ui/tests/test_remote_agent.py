@@ -0,0 +1,97 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from drsai_ui.agent_factory.remote_agent.drsai_remote_agent import RemoteAgent
+
+
+class StubResponse:
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.released = False
+
+    def release(self) -> None:
+        self.released = True
+
+
+class StubSession:
+    """Records the posted bodies and answers with the given status codes in order."""
+
+    def __init__(self, statuses: List[int]) -> None:
+        self.statuses = list(statuses)
+        self.bodies: List[Dict[str, Any]] = []
+        self.responses: List[StubResponse] = []
+
+    async def post(self, url: str, headers: Dict[str, str], json: Dict[str, Any], timeout: Any) -> StubResponse:
+        self.bodies.append(json)
+        response = StubResponse(self.statuses.pop(0))
+        self.responses.append(response)
+        return response
+
+
+def make_agent(session: StubSession, delta_context: bool = False) -> RemoteAgent:
+    # Only the attributes used by _post_chat_completions, without a model client
+    agent = RemoteAgent.__new__(RemoteAgent)
+    agent._name = "remote"
+    agent._chat_id = "chat-1"
+    agent._run_info = {"name": "tester"}
+    agent._connection_timeout = 60
+    agent._delta_context = delta_context
+    agent._acked_messages = None
+    agent._acked_hash = None
+    agent._session = session
+    agent.url = "http://remote/apiv2/chat/completions"
+    agent.new_headers = {"Authorization": "Bearer key"}
+    return agent
+
+
+MESSAGES = [
+    {"role": "user", "content": "hello"},
+    {"role": "assistant", "content": "hi"},
+    {"role": "user", "content": "how are you?"},
+]
+
+
+@pytest.mark.asyncio
+async def test_post_chat_completions_sends_full_context() -> None:
+    session = StubSession([200])
+    agent = make_agent(session)
+
+    response = await agent._post_chat_completions("remote", MESSAGES)
+
+    assert response.status == 200
+    assert session.bodies == [
+        {"chat_id": "chat-1", "user": {"name": "tester"}, "model": "remote", "messages": MESSAGES}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_post_chat_completions_sends_delta() -> None:
+    session = StubSession([200])
+    agent = make_agent(session, delta_context=True)
+    agent._acked_messages = MESSAGES[:2]
+    agent._acked_hash = "hash"
+
+    await agent._post_chat_completions("remote", MESSAGES)
+
+    (body,) = session.bodies
+    assert body["messages"] == MESSAGES[2:]
+    assert body["context_mode"] == "delta"
+    assert body["history_length"] == 2
+    assert body["history_hash"] == "hash"
+
+
+@pytest.mark.asyncio
+async def test_post_chat_completions_falls_back_on_mismatch() -> None:
+    session = StubSession([409, 200])
+    agent = make_agent(session, delta_context=True)
+    agent._acked_messages = MESSAGES[:2]
+    agent._acked_hash = "stale"
+
+    response = await agent._post_chat_completions("remote", MESSAGES)
+
+    assert response.status == 200
+    assert session.responses[0].released
+    assert session.bodies[1]["messages"] == MESSAGES
+    assert "context_mode" not in session.bodies[1]
+    assert agent._acked_messages is None